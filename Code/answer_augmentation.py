@@ -4,76 +4,294 @@ Description: Uses an LLM to enhance real estate listing descriptions for better
 """
 
 import json
-import os
-from langchain_openai import ChatOpenAI
+import re
 from langchain_core.prompts import PromptTemplate
-from config_loader import load_config_value  # Ensure this is correctly implemented
+from config_loader import get_settings
+from openai_clients import get_chat_model
+from tracing import span
+from llm_cache import LlmResponseCache, estimate_tokens
+
+# Listing fields sent to the LLM (image paths and internal metadata only cost tokens)
+PROMPT_FIELDS = [
+    "id", "description", "city", "state", "neighborhood", "neighborhood_description",
+    "price", "bedrooms", "bathrooms", "house_size"
+]
+
+# Part of every cache key: bump it whenever `structured_prompt` changes so stale rewrites are not served
+AUGMENTATION_PROMPT_VERSION = "augment-v1"
 
 class LlmAugmentation:
     """Handles LLM-based augmentation of real estate listings."""
 
-    def __init__(self):
+    def __init__(self, llm=None, cache=None):
         """
         Initializes the LLM model using LangChain.
-        """
-        # Load API credentials securely (avoid hardcoding API keys)
-        os.environ["OPENAI_API_KEY"] = load_config_value("VOCAREUM_OPENAI_API_KEY")
-        os.environ["OPENAI_API_BASE"] = "https://openai.vocareum.com/v1"
 
-        self.llm = ChatOpenAI(
-            model_name="gpt-3.5-turbo",
-            temperature=0.9
-        )
+        Args:
+            llm (BaseChatModel, optional): Chat model to use; the configured chat model if omitted.
+            cache (LlmResponseCache, optional): Cache of augmented descriptions, one entry per listing.
+        """
+        if llm is None:
+            # Shared client: pooled connections, timeouts and retries (see `openai_clients`)
+            settings = get_settings()
+            llm = get_chat_model(settings.chat_model, temperature=settings.augmentation_temperature)
+            # JSON mode guarantees a parseable answer to the structured prompt
+            self.structured_llm = llm.bind(response_format={"type": "json_object"})
+        else:
+            self.structured_llm = llm
+        self.llm = llm
+        self.cache = cache
+        self.model_name = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+        self.temperature = getattr(llm, "temperature", None)
 
-        # Define the LLM prompt template
-        self.llm_prompt = PromptTemplate.from_template(
+        # Answered as JSON so each description can be matched back to its listing
+        self.structured_prompt = PromptTemplate.from_template(
             """
             Your role is to enhance real estate listing descriptions.
-            You will receive {n_answers} real estate listings retrieved using similarity search. 
+            You will receive {n_answers} real estate listings retrieved using similarity search.
             Each listing matches the buyer’s preferences in terms of location, property features, amenities, and neighborhood.
 
             Your task:
             - **Enhance the property descriptions**: Subtly emphasize features of the property to make it appealing to possible buyers.
             - **Maintain factual integrity**: Do not add fictional information. Keep the facts unchanged while improving appeal.
-            - **Do NOT** use bullet points or numered lists. Separate the listings by a new blank line.
-            - **Recommended lenght**: Use between 80 to 120 words.
+            - **Do NOT** use bullet points or numered lists.
+            - **Recommended lenght**: Use between 80 to 120 words per description.
 
             Here are the listings:
             {listings}
 
-            Now, rewrite the descriptions to highlight the aspects most relevant to the buyer.
+            Respond **strictly** with a JSON object of the form
+            {{"listings": [{{"id": "<listing id>", "description": "<enhanced description>"}}]}}
+            containing exactly one entry per listing, using the listing ids given above.
             """
         )
 
-    def generate_augmented_descriptions(self, listings):
+    def _augment_uncached(self, listings):
+        """
+        Sends listings to the LLM in one structured request and caches the answers.
+
+        Args:
+            listings (list): Listings missing from the cache.
+
+        Returns:
+            dict: Listing id to augmented description for every listing the LLM answered.
+        """
+        with span("llm.augment_request", listings=len(listings)) as trace:
+            try:
+                prompt = self.format_structured_prompt(listings)
+                response = self.structured_llm.invoke(prompt)
+                if not response or not hasattr(response, "content"):
+                    raise ValueError("Received invalid response from LLM.")
+                augmented = self.parse_structured_response(response.content, {listing["id"] for listing in listings})
+
+                usage = getattr(response, "usage_metadata", None) or {}
+                tokens = usage.get("total_tokens") or estimate_tokens(prompt) + estimate_tokens(response.content)
+                trace.set("tokens", tokens)
+                trace.set("parsed", len(augmented))
+                self._store_cached(listings, augmented, tokens)
+                return augmented
+
+            except Exception as e:
+                trace.add("errors")
+                print(f"❌ Error generating augmented descriptions: {e}")
+                return {}
+
+    def precompute(self, listings, batch_size=None):
+        """
+        Fills the cache with augmented descriptions ahead of any search (e.g. right after `store_listings`).
+
+        Args:
+            listings (list): Listings in the format returned by `VectorDatabase.search`.
+            batch_size (int, optional): Listings augmented per LLM request; `precompute_batch_size` if omitted.
+
+        Returns:
+            int: Number of listings newly augmented.
         """
-        Uses the LLM to augment property descriptions for better personalization.
+        batch_size = batch_size or get_settings().precompute_batch_size
+        if self.cache is None:
+            print("❌ No LLM cache configured; nothing to precompute.")
+            return 0
+
+        _, misses = self._lookup_cached(listings)
+        computed = 0
+        for i in range(0, len(misses), batch_size):
+            computed += len(self._augment_uncached(misses[i:i + batch_size]))
+        print(f"✅ Precomputed augmented descriptions: {computed} new, {len(listings) - len(misses)} already cached.")
+        return computed
+
+    def cache_key(self, listing):
+        """
+        Builds the cache key of a listing's augmented description from the fields sent to the LLM.
 
         Args:
-            listings (list): A list of retrieved real estate listings (dictionaries).
+            listing (dict): Listing to augment.
 
         Returns:
-            list: A list of augmented listing descriptions.
+            str: Cache key (the listing id is not part of it, only its content).
+        """
+        payload = {field: listing.get(field) for field in PROMPT_FIELDS if field != "id"}
+        return LlmResponseCache.make_key(AUGMENTATION_PROMPT_VERSION, self.model_name, self.temperature, payload)
+
+    def _lookup_cached(self, listings):
         """
+        Splits listings into cached descriptions and listings that still need the LLM.
+
+        Returns:
+            tuple: (listing id to cached description, list of uncached listings).
+        """
+        if self.cache is None:
+            return {}, list(listings)
+        keys = {listing["id"]: self.cache_key(listing) for listing in listings}
+        found = self.cache.get_many(list(set(keys.values())))
+        cached = {listing_id: found[key] for listing_id, key in keys.items() if key in found}
+        return cached, [listing for listing in listings if listing["id"] not in cached]
+
+    def _store_cached(self, listings, augmented, tokens):
+        """
+        Caches fresh descriptions, crediting each with its share of the request's tokens.
+
+        Args:
+            listings (list): Listings that were sent to the LLM.
+            augmented (dict): Listing id to augmented description.
+            tokens (int): Total tokens of the request.
+        """
+        if self.cache is None:
+            return
+        share = max(1, tokens // max(1, len(listings)))
+        for listing in listings:
+            if listing["id"] in augmented:
+                self.cache.set(self.cache_key(listing), augmented[listing["id"]], tokens=share)
+
+    def format_structured_prompt(self, listings):
+        """
+        Builds the structured-output prompt for a set of listings.
+
+        Args:
+            listings (list): Listings to augment.
+
+        Returns:
+            str: The formatted prompt.
+        """
+        trimmed = [{field: listing.get(field) for field in PROMPT_FIELDS if field in listing} for listing in listings]
+        return self.structured_prompt.format(n_answers=len(listings), listings=json.dumps(trimmed, indent=2))
+
+    async def astream_augmented_listings(self, listings):
+        """
+        Streams the structured augmentation, yielding each description as soon as its JSON object is complete.
+
+        The LLM request is awaited, so it does not block a thread. Fresh descriptions are cached.
+
+        Args:
+            listings (list): Retrieved real estate listings (dictionaries with an "id").
+
+        Yields:
+            tuple: (listing id, augmented description); cached descriptions first, then in the
+            order the LLM writes them. Listings never yielded keep their original description.
+        """
+        cached, misses = self._lookup_cached(listings)
+        for item in cached.items():
+            yield item
+        if not misses:
+            return
+
+        prompt = self.format_structured_prompt(misses)
+        parser = StreamingListingsParser({listing["id"] for listing in misses})
+        augmented = {}
+        with span("llm.augment_stream", listings=len(misses), cache_hits=len(cached)) as trace:
+            try:
+                async for chunk in self.structured_llm.astream(prompt):
+                    content = chunk.content if hasattr(chunk, "content") else str(chunk)
+                    for listing_id, description in parser.feed(content if isinstance(content, str) else ""):
+                        augmented[listing_id] = description
+                        yield listing_id, description
+
+            except Exception as e:
+                trace.add("errors")
+                print(f"❌ Error streaming augmented descriptions: {e}")
+
+            tokens = estimate_tokens(prompt) + estimate_tokens(parser.buffer)
+            trace.set("tokens", tokens)
+            trace.set("parsed", len(augmented))
+        self._store_cached(misses, augmented, tokens)
+
+    @staticmethod
+    def parse_structured_response(content, expected):
+        """
+        Extracts per-listing descriptions from the LLM's JSON answer.
+
+        Args:
+            content (str): Raw LLM output.
+            expected (set | dict): Listing ids that were requested (other ids are ignored).
+
+        Returns:
+            dict: Listing id to augmented description for every well-formed entry.
+        """
+        content = re.sub(r"```(?:json)?\s*(.*?)\s*```", r"\1", content.strip(), flags=re.DOTALL)
         try:
-            if not listings:
-                raise ValueError("Listings data is empty. Cannot generate augmented descriptions.")
+            entries = json.loads(content).get("listings", [])
+        except (json.JSONDecodeError, AttributeError) as e:
+            print(f"❌ Could not parse augmented descriptions: {e}")
+            return {}
+
+        parsed = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            listing_id, description = entry.get("id"), entry.get("description")
+            if listing_id in expected and isinstance(description, str) and description.strip():
+                parsed[listing_id] = description.strip()
+        return parsed
+
 
-            # Format listings into readable JSON
-            listings_text = json.dumps(listings, indent=2)
+class StreamingListingsParser:
+    """
+    Incrementally extracts `{"id", "description"}` entries from a streamed
+    `{"listings": [...]}` answer, one entry per completed JSON object.
+    """
 
-            # Generate augmented descriptions using LangChain's LLM
-            response = self.llm.invoke(
-                self.llm_prompt.format(n_answers=len(listings), listings=listings_text)
-            )
+    def __init__(self, expected):
+        """
+        Args:
+            expected (set): Listing ids that were requested (other ids are ignored).
+        """
+        self.expected = expected
+        self.buffer = ""
+        self.position = None  # Offset of the next unparsed entry inside the "listings" array
+        self.seen = set()
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, text):
+        """
+        Adds streamed text and returns the entries it completed.
 
-            # Ensure response is valid
-            if not response or not hasattr(response, "content"):
-                raise ValueError("Received invalid response from LLM.")
+        Args:
+            text (str): Next piece of the LLM output.
 
-            return response.content.strip()
+        Returns:
+            list: (listing id, description) tuples completed by this piece.
+        """
+        self.buffer += text
+        if self.position is None:
+            match = re.search(r'"listings"\s*:\s*\[', self.buffer)
+            if not match:
+                return []
+            self.position = match.end()
 
-        except Exception as e:
-            print(f"❌ Error generating augmented descriptions: {e}")
-            return []
+        completed = []
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n,":
+                self.position += 1
+            if self.position >= len(self.buffer) or self.buffer[self.position] != "{":
+                break  # End of the array, or the next entry has not started yet
+            try:
+                entry, self.position = self._decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                break  # Entry still incomplete; wait for more text
 
+            if not isinstance(entry, dict):
+                continue
+            listing_id, description = entry.get("id"), entry.get("description")
+            if listing_id in self.expected and listing_id not in self.seen and isinstance(description, str) and description.strip():
+                self.seen.add(listing_id)
+                completed.append((listing_id, description.strip()))
+        return completed
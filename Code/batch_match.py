@@ -0,0 +1,66 @@
+"""
+Module: batch_match
+Description: Command-line entry point that matches saved buyer profiles (JSONL) against the listings and writes matches (JSONL).
+
+Usage:
+    python batch_match.py --profiles ../Data/profiles.jsonl --output ../Data/matches.jsonl --k 5
+"""
+
+import argparse
+import json
+import time
+from config_loader import get_settings
+from inventory_updater import current_snapshot_paths
+from vector_database import VectorDatabase
+
+
+def iter_profiles(path):
+    """
+    Lazily reads buyer profiles, one JSON object per line.
+
+    Args:
+        path (str): Path to the profiles file.
+
+    Yields:
+        dict: User preferences in the format built by the Gradio search.
+    """
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"❌ Skipping malformed profile on line {line_number}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match buyer profiles against the listings in bulk.")
+    parser.add_argument("--profiles", required=True, help="JSONL file with one preferences object per line")
+    parser.add_argument("--output", required=True, help="JSONL file receiving one line of matches per profile")
+    parser.add_argument("--k", type=int, default=5, help="Matches per profile")
+    parser.add_argument("--batch-size", type=int, default=256, help="Profiles embedded and scored together")
+    parser.add_argument("--backend", default=get_settings().vector_backend, choices=["chroma", "numpy"], help="Vector store backend")
+    parser.add_argument("--sync", action="store_true", help="Sync the listings file into the vector store first")
+    args = parser.parse_args()
+
+    # Same index as the app: its embedding size, quantization and sharding, and its live snapshot if any
+    settings = get_settings()
+    snapshot = current_snapshot_paths(settings.snapshot_dir) or ()
+    vector_db = VectorDatabase.from_settings(settings, *snapshot, backend=args.backend)
+    if args.sync:
+        vector_db.store_listings()
+
+    start = time.perf_counter()
+    n_profiles = 0
+    with open(args.output, "w") as f:
+        for profile, matches in vector_db.search_many(iter_profiles(args.profiles), k=args.k, batch_size=args.batch_size):
+            f.write(json.dumps({"profile_id": profile.get("id"), "profile": profile, "matches": matches}) + "\n")
+            n_profiles += 1
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Matched {n_profiles} profiles in {elapsed:.1f}s ({n_profiles / elapsed if elapsed else 0:.1f} profiles/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,227 @@
 import os
 import json
+import threading
+import time
+from dataclasses import dataclass, fields, replace
+
+# Environment variables named HOMEMATCH_<KEY> override both config values and settings
+ENV_PREFIX = "HOMEMATCH_"
+
+# The config file is stat'ed at most this often (seconds) to notice edits
+RELOAD_CHECK_INTERVAL = 1.0
+
+_lock = threading.Lock()
+_configs = {}   # expanded path -> {"mtime": float, "checked": float, "data": dict}
+_invalid = {}   # expanded path -> mtime of the invalid version last reported
+_settings = {}  # expanded path -> (last check, config mtime, env snapshot, Settings)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Typed performance and model settings, read from the "homematch" section of the config file."""
+
+    # OpenAI access
+    openai_base_url: str = "https://openai.vocareum.com/v1"
+    chat_model: str = "gpt-3.5-turbo"
+    augmentation_temperature: float = 0.9
+    refinement_model: str = "gpt-3.5-turbo"
+    embedding_model: str = "text-embedding-3-large"
+    max_concurrent_requests: int = 16
+    request_timeout: float = 60.0
+    connect_timeout: float = 5.0
+    max_retries: int = 3
+
+    # Listing generation
+    total_listings: int = 300
+    listings_batch_size: int = 5
+    max_in_flight: int = 1
+    requests_per_second: float = 1.0
+    dedup_threshold: float = 0.7    # Drop generated listings whose description nearly repeats an earlier one; 0 disables
+    image_model: str = "stabilityai/sdxl-turbo"
+
+    # Data files
+    listings_path: str = "../Data/listings.jsonl"
+    images_dir: str = "../Data/Images"  # Generated images; the only directory the UI serves files from
+    city_choices_path: str = "../Data/city_choices.txt"
+    vector_db_path: str = ""        # Vector store directory; empty uses the backend default (see `vector_database`)
+    bm25_index_path: str = "../Data/bm25_index.json"
+    embedding_cache_path: str = "../Data/embedding_cache.sqlite3"
+    llm_cache_path: str = "../Data/llm_cache.sqlite3"
+
+    # Vector database
+    vector_backend: str = "chroma"
+    search_mode: str = "hybrid"
+    embedding_batch_size: int = 64
+    embedding_workers: int = 4
+    query_cache_size: int = 1024
+    query_cache_ttl: float = 3600
+    result_cache_size: int = 256
+    result_cache_ttl: float = 600
+    embedding_dimensions: int = 0   # Shortened embeddings; 0 keeps the model's full size
+    vector_quantization: str = ""   # "int8" or "binary" (numpy backend); empty searches float32 only
+    rerank_factor: int = 4
+    shard_by: str = ""              # "state" or "city": one index shard per market; empty keeps one collection
+    inventory_watch_interval: float = 0  # Seconds between checks for new listings while running; 0 disables
+    snapshot_dir: str = "../Data/snapshots"  # Index snapshots built by the inventory updater
+
+    # LLM usage
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+    refinement_threshold: float = 0.7
+    semantic_cache_size: int = 512          # Final answers reused by similar searches; 0 disables the cache
+    semantic_cache_threshold: float = 0.95  # Minimum cosine similarity of the query embeddings
+    semantic_cache_ttl: float = 3600
+    precompute_augmentations: bool = False
+    precompute_batch_size: int = 5  # Listings augmented per LLM request when precomputing
+
+    # Tracing (see `tracing`); disabled tracing costs one attribute check per span
+    tracing_enabled: bool = False
+    metrics_port: int = 0           # Serve /metrics and /metrics.json on this port; 0 disables the server
+    metrics_json_path: str = ""     # Write the stage statistics here on exit; empty disables the file
+
+
+def _coerce(value, field_type):
+    """
+    Converts a raw config or environment value to the type of a settings field.
+    """
+    if field_type in (bool, "bool"):
+        return value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes", "on")
+    if field_type in (int, "int"):
+        return int(value)
+    if field_type in (float, "float"):
+        return float(value)
+    return str(value)
+
+
+def load_config(config_path="~/config.json"):
+    """
+    Returns the parsed configuration file, re-reading it only when its modification time changes.
+
+    A version that is not valid JSON (e.g. half-written while being edited) is reported once and
+    the last valid data keeps being served until the file is fixed.
+
+    Args:
+        config_path (str): Path to the configuration file (default: "~/config.json").
+
+    Returns:
+        dict: The parsed configuration.
+
+    Raises:
+        FileNotFoundError: If the configuration file is not found.
+        json.JSONDecodeError: If the file is invalid and no valid version was read before.
+    """
+    config_path = os.path.expanduser(config_path)
+    now = time.monotonic()
+    with _lock:
+        cached = _configs.get(config_path)
+        if cached is not None and now - cached["checked"] < RELOAD_CHECK_INTERVAL:
+            return cached["data"]
+
+        try:
+            mtime = os.path.getmtime(config_path)
+        except FileNotFoundError:
+            _configs.pop(config_path, None)
+            raise FileNotFoundError(f"Configuration file not found at: {config_path}")
+
+        if cached is None or cached["mtime"] != mtime:
+            if _invalid.get(config_path) == mtime:
+                # The version already reported as invalid: not parsed again
+                if cached is None:
+                    raise json.JSONDecodeError(f"Invalid configuration in {config_path}", "", 0)
+            else:
+                try:
+                    with open(config_path, "r") as config_file:
+                        data = json.load(config_file)
+                except json.JSONDecodeError as e:
+                    _invalid[config_path] = mtime
+                    print(f"❌ Invalid configuration in {config_path}: {e}" + ("; keeping the last valid one." if cached else ""))
+                    if cached is None:
+                        raise
+                else:
+                    _invalid.pop(config_path, None)
+                    if cached is not None:
+                        print(f"🔄 Reloaded configuration from {config_path}")
+                    cached = {"mtime": mtime, "data": data}
+        cached["checked"] = now
+        _configs[config_path] = cached
+        return cached["data"]
+
 
 def load_config_value(key, config_path="~/config.json"):
     """
     Load a value from a configuration file based on the provided key.
-    
+
+    The file is parsed once and cached (see `load_config`); an environment variable
+    named HOMEMATCH_<key> takes precedence over the file.
+
     Args:
         key (str): The key whose value needs to be retrieved.
         config_path (str): Path to the configuration file (default: "~/config.json").
-    
+
     Returns:
         str: The value associated with the key in the configuration file.
-    
+
     Raises:
         FileNotFoundError: If the configuration file is not found.
         KeyError: If the key is not found in the configuration file.
     """
-    # Expand the user's home directory if needed
-    config_path = os.path.expanduser(config_path)
-    
-    # Open and parse the configuration file
-    try:
-        with open(config_path, "r") as config_file:
-            config = json.load(config_file)
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Configuration file not found at: {config_path}")
-    
+    override = os.environ.get(f"{ENV_PREFIX}{key}")
+    if override is not None:
+        return override
+
+    config = load_config(config_path)
+
     # Retrieve the value for the specified key
     if key not in config:
         raise KeyError(f"Key '{key}' not found in the configuration file.")
-    
+
     return config[key]
+
+
+def get_settings(config_path="~/config.json"):
+    """
+    Returns the typed settings: defaults, overridden by the "homematch" section of the
+    config file, overridden by HOMEMATCH_<FIELD> environment variables (e.g. HOMEMATCH_CHAT_MODEL).
+
+    The result is cached; the config file and environment are re-checked at most every
+    RELOAD_CHECK_INTERVAL seconds, so it is cheap to call on hot paths.
+
+    Args:
+        config_path (str): Path to the configuration file; a missing file means defaults only, and
+            while the file is invalid JSON the settings of its last valid version are kept.
+
+    Returns:
+        Settings: The current settings.
+    """
+    key = os.path.expanduser(config_path)
+    now = time.monotonic()
+    cached = _settings.get(key)
+    if cached is not None and now - cached[0] < RELOAD_CHECK_INTERVAL:
+        return cached[3]
+
+    try:
+        config = load_config(config_path)
+        mtime = _configs.get(key, {}).get("mtime")
+    except (FileNotFoundError, json.JSONDecodeError):
+        config, mtime = {}, None  # Invalid from the start: defaults (later, the last valid version is served)
+    env = tuple(sorted((name, value) for name, value in os.environ.items() if name.startswith(ENV_PREFIX)))
+    if cached is not None and cached[1] == mtime and cached[2] == env:
+        with _lock:
+            _settings[key] = (now, mtime, env, cached[3])
+        return cached[3]
+
+    overrides = {}
+    section = config.get("homematch", {}) if isinstance(config, dict) else {}
+    env_values = dict(env)
+    for field in fields(Settings):
+        raw = env_values.get(f"{ENV_PREFIX}{field.name.upper()}", section.get(field.name))
+        if raw is None:
+            continue
+        try:
+            overrides[field.name] = _coerce(raw, field.type)
+        except (TypeError, ValueError) as e:
+            print(f"❌ Ignoring invalid setting {field.name}={raw!r}: {e}")
+
+    settings = replace(Settings(), **overrides)
+    with _lock:
+        _settings[key] = (now, mtime, env, settings)
+    return settings
@@ -0,0 +1,238 @@
+"""
+Module: dedup
+Description: Near-duplicate detection of listing descriptions with MinHash signatures and locality-sensitive hashing,
+             used during generation to drop duplicates before their image is rendered and their text embedded.
+"""
+
+import argparse
+import json
+import re
+import threading
+import zlib
+import numpy as np
+from config_loader import get_settings
+from listing_store import iter_listings
+
+# Mersenne prime 2^31 - 1: a * x + b stays below 2^64 for 32-bit shingle hashes
+_PRIME = (1 << 31) - 1
+
+# Rough OpenAI tokens per character of English text, for the embedding estimate
+_TOKENS_PER_CHAR = 0.25
+
+
+def shingle_hashes(text, size=3):
+    """
+    Hashes the word shingles of a text, ignoring case and punctuation.
+
+    Args:
+        text (str): Description.
+        size (int): Words per shingle.
+
+    Returns:
+        np.ndarray: Unique 32-bit shingle hashes (uint64); a text shorter than `size` words is one shingle.
+    """
+    words = re.findall(r"[a-z0-9]+", str(text or "").lower())
+    shingles = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def lsh_bands(num_perm, threshold):
+    """
+    Picks the band layout whose LSH collision threshold (1/bands)^(1/rows) is closest to `threshold`.
+
+    Args:
+        num_perm (int): Signature length.
+        threshold (float): Jaccard similarity from which texts count as duplicates.
+
+    Returns:
+        tuple: (bands, rows) with bands * rows <= num_perm.
+    """
+    layouts = [(num_perm // rows, rows) for rows in range(1, num_perm + 1)]
+    return min(layouts, key=lambda layout: abs((1 / layout[0]) ** (1 / layout[1]) - threshold))
+
+
+class NearDuplicateIndex:
+    """
+    Thread-safe MinHash LSH index over listing descriptions.
+
+    Candidates sharing an LSH band with a new text are confirmed with the estimated Jaccard
+    similarity of their signatures, so the work per check is independent of the index size.
+    """
+
+    def __init__(self, threshold=0.7, num_perm=128, shingle_size=3, seed=1):
+        """
+        Args:
+            threshold (float): Estimated Jaccard similarity of word shingles from which a text is a duplicate.
+            num_perm (int): MinHash signature length.
+            shingle_size (int): Words per shingle.
+            seed (int): Seed of the hash permutations; indexes only compare with the same seed.
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self._buckets = [{} for _ in range(self.bands)]  # Band -> band hash -> ids
+        self._signatures = {}                            # Id -> signature
+        self.checked = 0
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+    def signature(self, text):
+        """
+        Computes the MinHash signature of a text.
+
+        Returns:
+            np.ndarray: `num_perm` minimum permuted shingle hashes.
+        """
+        hashes = shingle_hashes(text, self.shingle_size)
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def query(self, text, signature=None):
+        """
+        Finds the indexed text most similar to `text`, if it is a near duplicate.
+
+        Returns:
+            tuple: (id, estimated similarity) of the closest duplicate, or None.
+        """
+        signature = self.signature(text) if signature is None else signature
+        with self._lock:
+            return self._query(signature)
+
+    def _query(self, signature):
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+        best = None
+        for doc_id in candidates:
+            similarity = float(np.mean(self._signatures[doc_id] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (doc_id, similarity)
+        return best
+
+    def add(self, doc_id, text, signature=None):
+        """
+        Indexes a text under `doc_id`.
+        """
+        signature = self.signature(text) if signature is None else signature
+        with self._lock:
+            self._add(doc_id, signature)
+
+    def _add(self, doc_id, signature):
+        self._signatures[doc_id] = signature
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(key, []).append(doc_id)
+
+    def check_and_add(self, doc_id, text):
+        """
+        Atomically checks a text against the index and indexes it if it is new.
+
+        Returns:
+            tuple: (id, estimated similarity) of the duplicate it matches, or None if it was added.
+        """
+        signature = self.signature(text)
+        with self._lock:
+            self.checked += 1
+            match = self._query(signature)
+            if match is not None:
+                self.duplicates += 1
+                return match
+            self._add(doc_id, signature)
+            return None
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Indexed texts, checks, duplicates found and the LSH layout.
+        """
+        with self._lock:
+            return {
+                "indexed": len(self._signatures),
+                "checked": self.checked,
+                "duplicates": self.duplicates,
+                "threshold": self.threshold,
+                "bands": self.bands,
+                "rows": self.rows
+            }
+
+
+def find_duplicates(listings, threshold=0.7, **index_options):
+    """
+    Scans listings in order; each listing is compared with the unique listings before it.
+
+    Args:
+        listings (iterable): Listings with "id" and "Description".
+        threshold (float): See `NearDuplicateIndex`.
+
+    Returns:
+        tuple: (unique listings, list of (duplicate listing, id of the listing it repeats, similarity)).
+    """
+    index = NearDuplicateIndex(threshold=threshold, **index_options)
+    unique, duplicates = [], []
+    for listing in listings:
+        match = index.check_and_add(listing["id"], listing.get("Description", ""))
+        if match is None:
+            unique.append(listing)
+        else:
+            duplicates.append((listing, *match))
+    return unique, duplicates
+
+
+def savings_report(duplicates, seconds_per_image=None):
+    """
+    Estimates the generation and embedding work that dropping `duplicates` avoids.
+
+    Args:
+        duplicates (list): Duplicate listings (or (listing, ...) tuples from `find_duplicates`).
+        seconds_per_image (float, optional): Measured render time per image.
+
+    Returns:
+        dict: Images and embeddings avoided, estimated embedding tokens and render seconds.
+    """
+    listings = [item[0] if isinstance(item, tuple) else item for item in duplicates]
+    return {
+        "duplicates": len(listings),
+        "images_avoided": len(listings),
+        "embeddings_avoided": len(listings),
+        "embedding_tokens_avoided": int(sum(len(listing.get("Description", "")) for listing in listings) * _TOKENS_PER_CHAR),
+        "render_seconds_avoided": len(listings) * seconds_per_image if seconds_per_image else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate listing descriptions.")
+    parser.add_argument("--listings", default=get_settings().listings_path, help="Listings file (JSON Lines or legacy JSON array)")
+    parser.add_argument("--threshold", type=float, default=0.7, help="Estimated Jaccard similarity of duplicates")
+    parser.add_argument("--seconds-per-image", type=float, help="Render time per image, for the savings estimate")
+    parser.add_argument("--output", help="JSON Lines file receiving the listings without their duplicates")
+    parser.add_argument("--show", type=int, default=10, help="Duplicate pairs to print")
+    args = parser.parse_args()
+
+    unique, duplicates = find_duplicates(iter_listings(args.listings), threshold=args.threshold)
+    total = len(unique) + len(duplicates)
+    print(f"🔍 {len(duplicates)} near-duplicate(s) among {total} listings ({len(duplicates) / total if total else 0:.1%}).")
+    for listing, original_id, similarity in duplicates[:args.show]:
+        print(f"   {listing['id']} ≈ {original_id} ({similarity:.2f}): {listing.get('Description', '')[:80]}...")
+
+    report = savings_report(duplicates, args.seconds_per_image)
+    print(f"📈 Dropping them avoids {report['images_avoided']} image render(s) and {report['embeddings_avoided']} embedding(s) "
+          f"(~{report['embedding_tokens_avoided']} tokens" +
+          (f", ~{report['render_seconds_avoided']:.0f}s of rendering)." if report["render_seconds_avoided"] else ")."))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for listing in unique:
+                f.write(json.dumps(listing) + "\n")
+        print(f"✅ {len(unique)} unique listings saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Module: embedding_cache
+Description: Persistent SQLite cache around an embedding model, with batched and parallel dispatch of cache misses.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+
+def truncate_embedding(vector, dimensions):
+    """
+    Shortens an embedding to its first `dimensions` values and re-normalizes it.
+
+    This is how `text-embedding-3` models shorten embeddings (their leading dimensions carry
+    most of the information), so it matches requesting `dimensions` from the API.
+
+    Args:
+        vector (list): Full embedding.
+        dimensions (int): Target length; None or a larger value keeps the vector unchanged.
+
+    Returns:
+        list: The shortened, unit-length embedding.
+    """
+    if not dimensions or len(vector) <= dimensions:
+        return vector
+    vector = vector[:dimensions]
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embedding model so each (model, text) pair is only ever embedded once."""
+
+    def __init__(self, embeddings, cache_path="../Data/embedding_cache.sqlite3", model_name=None,
+                 batch_size=64, max_workers=4, dimensions=None):
+        """
+        Args:
+            embeddings (Embeddings): Underlying embedding model (e.g. OpenAIEmbeddings).
+            cache_path (str): SQLite file holding the cache; ":memory:" keeps it in RAM.
+            model_name (str, optional): Cache namespace; defaults to the model's `model` attribute.
+            batch_size (int): Texts per request to the underlying model.
+            max_workers (int): Batches sent to the underlying model in parallel.
+            dimensions (int, optional): Shorten every embedding to this many dimensions (see
+                `truncate_embedding`); part of the cache namespace, so full and short vectors never mix.
+        """
+        self.embeddings = embeddings
+        self.dimensions = dimensions
+        self.model_name = model_name or getattr(embeddings, "model", None) or type(embeddings).__name__
+        if dimensions:
+            self.model_name = f"{self.model_name}@{dimensions}d"
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(cache_path)
+        if cache_path != ":memory:" and directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        if cache_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def text_hash(text):
+        """
+        Hashes a text into its cache key.
+
+        Args:
+            text (str): Text to embed.
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts):
+        """
+        Embeds texts, serving cached vectors and embedding only the misses.
+
+        Args:
+            texts (list): Texts to embed.
+
+        Returns:
+            list: One embedding (list of floats) per text, in input order.
+        """
+        keys = [self.text_hash(text) for text in texts]
+        vectors = self._lookup(set(keys))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            new_vectors = self._embed_in_batches(list(missing.values()))
+            fresh = dict(zip(missing.keys(), new_vectors))
+            self._store(fresh)
+            vectors.update(fresh)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text):
+        """
+        Embeds a search query (not cached here; queries are cached by the caller).
+
+        Args:
+            text (str): Query text.
+
+        Returns:
+            list: The query embedding.
+        """
+        return truncate_embedding(self.embeddings.embed_query(text), self.dimensions)
+
+    def embed_queries(self, texts):
+        """
+        Embeds many search queries in batched calls, without caching them here (queries are cached by the caller).
+
+        Args:
+            texts (list): Query texts.
+
+        Returns:
+            list: One embedding per text, in input order.
+        """
+        return self._embed_in_batches(list(texts)) if texts else []
+
+    def stats(self):
+        """
+        Reports cache effectiveness.
+
+        Returns:
+            dict: Hits, misses, hit rate and number of cached vectors for this model.
+        """
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)
+            ).fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": entries
+            }
+
+    def _embed_in_batches(self, texts):
+        """
+        Sends texts to the underlying model in batches, several batches at a time.
+
+        Args:
+            texts (list): Texts missing from the cache.
+
+        Returns:
+            list: Embeddings in input order.
+        """
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1 or self.max_workers <= 1:
+            results = [self.embeddings.embed_documents(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+                results = list(pool.map(self.embeddings.embed_documents, batches))
+        return [truncate_embedding(vector, self.dimensions) for batch in results for vector in batch]
+
+    def _lookup(self, keys):
+        """
+        Fetches cached vectors for the given keys.
+
+        Args:
+            keys (set): Text hashes.
+
+        Returns:
+            dict: Text hash to embedding for every cached key.
+        """
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[i:i + _LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                    (self.model_name, *chunk)
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+        return found
+
+    def _store(self, vectors):
+        """
+        Persists freshly computed vectors as float32 blobs.
+
+        Args:
+            vectors (dict): Text hash to embedding.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(self.model_name, key, array("f", vector).tobytes()) for key, vector in vectors.items()]
+            )
+            self._conn.commit()
@@ -0,0 +1,360 @@
+"""
+Module: fakes
+Description: Deterministic local stand-ins for the external services (OpenAI, ...) used to test and benchmark HomeMatch offline.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Vocabulary used to assemble varied but deterministic fake descriptions
+FEATURES = [
+    "a gourmet kitchen", "hardwood floors", "a sunlit living room", "a private pool", "a two-car garage",
+    "a lush garden", "a cozy fireplace", "a home gym", "a finished basement", "a rooftop terrace",
+    "a wraparound porch", "vaulted ceilings", "a spacious balcony", "smart home features", "a walk-in closet"
+]
+VIBES = ["charming", "modern", "elegant", "bright", "spacious", "renovated", "historic", "quiet", "luxurious", "cozy"]
+NEIGHBORHOOD_TRAITS = [
+    "tree-lined streets", "top-rated schools", "local cafes", "parks and trails", "easy transit access",
+    "boutique shops", "a vibrant nightlife", "a strong community feel", "waterfront views", "farmers markets"
+]
+
+
+class FakeRateLimitError(Exception):
+    """Mimics `openai.RateLimitError` (HTTP 429)."""
+
+    status_code = 429
+
+    def __init__(self, message="Rate limit exceeded (fake)", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class FakeAPIError(Exception):
+    """Mimics a generic server-side OpenAI error (HTTP 500)."""
+
+    status_code = 500
+
+
+class FakeOpenAI:
+    """
+    Local stand-in for the `OpenAI` client exposing `chat.completions.create`.
+
+    Responses are listings JSON built from the fields of the listings prompt, so
+    `ListingsGenerator.request_listings` parses them exactly like real output.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=0):
+        """
+        Args:
+            latency (float): Seconds each request takes.
+            jitter (float): Extra random latency, uniformly drawn from [0, jitter].
+            error_rate (float): Probability that a request raises `FakeAPIError`.
+            rate_limit_rate (float): Probability that a request raises `FakeRateLimitError`.
+            seed (int): Seed for the latency, error and content draws.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, temperature=None, **kwargs):
+        """Handles a `chat.completions.create` call."""
+        with self._lock:
+            self.calls += 1
+            draw = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            content_seed = self._random.getrandbits(32)
+
+        if delay:
+            time.sleep(delay)
+
+        if draw < self.rate_limit_rate:
+            raise FakeRateLimitError()
+        if draw < self.rate_limit_rate + self.error_rate:
+            raise FakeAPIError("Internal server error (fake)")
+
+        prompt = messages[-1]["content"]
+        content = json.dumps({"listings": [fake_listing_from_prompt(prompt, random.Random(content_seed))]})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=len(prompt) // 4,
+                completion_tokens=len(content) // 4,
+                total_tokens=(len(prompt) + len(content)) // 4
+            )
+        )
+
+
+class FakeAsyncOpenAI:
+    """
+    Local stand-in for the `AsyncOpenAI` client used to refine search input.
+
+    The answer is the quoted user input of the prompt with its whitespace normalized.
+    """
+
+    def __init__(self, latency=0.0):
+        """
+        Args:
+            latency (float): Seconds each request takes (awaited, so requests overlap).
+        """
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, temperature=None, **kwargs):
+        """Handles a `chat.completions.create` call."""
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        prompt = messages[-1]["content"]
+        match = re.search(r'User Input: "(.*)"', prompt, flags=re.DOTALL)
+        content = " ".join((match.group(1) if match else prompt).split())
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(total_tokens=(len(prompt) + len(content)) // 4)
+        )
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Local LangChain chat model answering listing augmentation prompts.
+
+    Every listing id in the prompt gets a rewritten description in the `{"listings": [...]}`
+    format, streamed in small chunks so `StreamingListingsParser` sees realistic fragments.
+    """
+
+    latency: float = 0.0        # Seconds before the first chunk (time to first token)
+    chunk_latency: float = 0.0  # Seconds between chunks
+    chunk_size: int = 16        # Characters per streamed chunk
+    model: str = "fake-chat"
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _answer(self, messages):
+        prompt = messages[-1].content
+        ids = re.findall(r'"id": "([^"]+)"', prompt)
+        descriptions = [json.loads(f'"{text}"') for text in re.findall(r'"description": "((?:[^"\\]|\\.)*)"', prompt)]
+        descriptions += [""] * (len(ids) - len(descriptions))
+        self.calls += 1
+        return json.dumps({"listings": [
+            {"id": listing_id, "description": f"Welcome home: {description}"}
+            for listing_id, description in zip(ids, descriptions)
+        ]})
+
+    def _usage(self, messages, content):
+        prompt_tokens = len(messages[-1].content) // 4
+        return {"input_tokens": prompt_tokens, "output_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4}
+
+    def _chunks(self, content):
+        return [content[i:i + self.chunk_size] for i in range(0, len(content), self.chunk_size)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        content = self._answer(messages)
+        time.sleep(self.latency + self.chunk_latency * len(self._chunks(content)))
+        message = AIMessage(content=content, usage_metadata=self._usage(messages, content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        content = self._answer(messages)
+        time.sleep(self.latency)
+        for chunk in self._chunks(content):
+            if self.chunk_latency:
+                time.sleep(self.chunk_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        content = self._answer(messages)
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(content):
+            if self.chunk_latency:
+                await asyncio.sleep(self.chunk_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+
+class FakeImagePipeline:
+    """
+    Local stand-in for the diffusers text-to-image pipeline (see `ImagePipelineHolder(pipe=...)`).
+
+    Produces flat-colored images derived from each prompt after a configurable render time.
+    Pass `make_generator` as the holder's `generator_factory` so no torch generator is needed.
+    """
+
+    def __init__(self, latency=0.0, per_image_latency=0.0, size=512):
+        """
+        Args:
+            latency (float): Seconds each pipeline call takes.
+            per_image_latency (float): Extra seconds per image of the call.
+            size (int): Width and height of the produced images.
+        """
+        self.latency = latency
+        self.per_image_latency = per_image_latency
+        self.size = size
+        self.calls = 0
+
+    @staticmethod
+    def make_generator(seed):
+        """
+        Returns:
+            random.Random: Per-image generator seeded with `seed`, in place of a `torch.Generator`.
+        """
+        return random.Random(seed)
+
+    def __call__(self, prompt, negative_prompt=None, generator=None, **kwargs):
+        from PIL import Image  # Only needed when images are actually rendered
+
+        prompts = [prompt] if isinstance(prompt, str) else list(prompt)
+        self.calls += 1
+        time.sleep(self.latency + self.per_image_latency * len(prompts))
+        images = [
+            Image.new("RGB", (self.size, self.size), tuple(hashlib.md5(text.encode("utf-8")).digest()[:3]))
+            for text in prompts
+        ]
+        return SimpleNamespace(images=images)
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic local embedder based on feature hashing of lowercase tokens.
+
+    Texts that share words get similar vectors, so similarity search behaves
+    plausibly without any network call.
+    """
+
+    def __init__(self, dimensions=256, latency=0.0, model="fake-embedding", dense=False):
+        """
+        Args:
+            dimensions (int): Length of the produced vectors.
+            latency (float): Seconds each call takes.
+            model (str): Model name reported to caches.
+            dense (bool): Sum a pseudo-random Gaussian direction per token instead of hashing each token
+                into one dimension. Like real embeddings every dimension is then used, and the leading
+                dimensions alone still approximate the similarities (truncation, binary codes).
+        """
+        self.dimensions = dimensions
+        self.latency = latency
+        self.model = model
+        self.dense = dense
+        self._directions = {}
+        self.calls = 0
+        self.texts_embedded = 0
+        self._lock = threading.Lock()
+
+    def _direction(self, token, digest):
+        direction = self._directions.get(token)
+        if direction is None:
+            import numpy as np  # Only needed for dense vectors
+
+            rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+            direction = self._directions[token] = rng.standard_normal(self.dimensions)
+        return direction
+
+    def _embed(self, text):
+        if self.dense:
+            tokens = re.findall(r"[a-z0-9]+", text.lower())
+            vector = sum(self._direction(token, hashlib.md5(token.encode("utf-8")).digest()) for token in tokens)
+            if not tokens:
+                return [0.0] * self.dimensions
+            norm = math.sqrt(float(vector @ vector))
+            return (vector / norm).tolist() if norm else vector.tolist()
+
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def _record(self, n_texts):
+        with self._lock:
+            self.calls += 1
+            self.texts_embedded += n_texts
+        if self.latency:
+            time.sleep(self.latency)
+
+    def embed_documents(self, texts):
+        self._record(len(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self._record(1)
+        return self._embed(text)
+
+
+def fake_listing_from_prompt(prompt, rng):
+    """
+    Builds a listing that honours the ranges requested in a listings prompt.
+
+    Args:
+        prompt (str): Prompt built by `ListingsGenerator.request_listings`.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        dict: Listing in the listings file schema (without "id" and "image_path").
+    """
+    def field(name, default):
+        match = re.search(rf"- {name}: (.+)", prompt)
+        return match.group(1).strip() if match else default
+
+    def int_range(name, default):
+        numbers = [int(n) for n in re.findall(r"\d+", field(name, ""))]
+        return (numbers[0], numbers[1]) if len(numbers) >= 2 else default
+
+    property_type = field("Property Type", "Single-Family Home")
+    city = field("City", "Denver")
+    state = field("State", "Colorado")
+    min_price, max_price = int_range("Price", (200000, 800000))
+    min_beds, max_beds = int_range("Bedrooms", (2, 4))
+    min_baths, max_baths = int_range("Bathrooms", (1, 3))
+    min_size, max_size = int_range("House Size", (1000, 2500))
+    return fake_listing(rng, property_type, city, state, (min_price, max_price),
+                        (min_beds, max_beds), (min_baths, max_baths), (min_size, max_size))
+
+
+def fake_listing(rng, property_type, city, state, price_range, bed_range, bath_range, size_range):
+    """
+    Builds one listing in the listings file schema from the given ranges.
+
+    Returns:
+        dict: Listing without "id" and "image_path".
+    """
+    bedrooms = rng.randint(*bed_range)
+    bathrooms = rng.randint(*bath_range)
+    neighborhood = f"{rng.choice(['North', 'South', 'East', 'West', 'Old', 'Upper', 'Lower'])} {rng.choice(['Park', 'Hills', 'Village', 'Heights', 'Square', 'Gardens'])}"
+    features = rng.sample(FEATURES, 3)
+    return {
+        "Property Type": property_type,
+        "Neighborhood": neighborhood,
+        "City": city,
+        "State": state,
+        "Price": f"${rng.randrange(price_range[0], price_range[1] + 1, 1000):,}",
+        "Bedrooms": bedrooms,
+        "Bathrooms": bathrooms,
+        "House Size": f"{rng.randrange(size_range[0], size_range[1] + 1, 50)} sqft",
+        "Description": (
+            f"This {rng.choice(VIBES)} {property_type.lower()} in {neighborhood} offers {bedrooms} bedrooms, "
+            f"{bathrooms} bathrooms, {features[0]}, {features[1]} and {features[2]}."
+        ),
+        "Neighborhood Description": (
+            f"{neighborhood} in {city} is known for {' and '.join(rng.sample(NEIGHBORHOOD_TRAITS, 2))}."
+        )
+    }
@@ -0,0 +1,249 @@
+"""
+Module: generation_pipeline
+Description: Generates listings concurrently: rate-limited LLM requests feed an image-rendering stage through a bounded queue.
+"""
+
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openai_clients import get_openai_client
+
+# Marks the end of the text stage on the render queue
+_DONE = object()
+
+
+def is_rate_limit_error(error):
+    """
+    Checks whether an exception is an HTTP 429 rate-limit error.
+
+    Args:
+        error (Exception): Error raised by the OpenAI client.
+
+    Returns:
+        bool: True for rate-limit errors.
+    """
+    return getattr(error, "status_code", None) == 429
+
+
+def is_transient_error(error):
+    """
+    Checks whether an exception is worth retrying: rate limits, timeouts, conflicts, server errors and
+    connection failures (what the OpenAI SDK itself would retry).
+
+    Args:
+        error (Exception): Error raised by the OpenAI client.
+
+    Returns:
+        bool: True for retryable errors.
+    """
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(error):
+    """
+    Reads the server-suggested retry delay from a rate-limit error, if any.
+
+    Args:
+        error (Exception): Error raised by the OpenAI client.
+
+    Returns:
+        float: Seconds to wait, or None when the server gave no hint.
+    """
+    retry_after = getattr(error, "retry_after", None)
+    response = getattr(error, "response", None)
+    if retry_after is None and response is not None:
+        retry_after = response.headers.get("retry-after")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket that spaces out requests and slows down after rate-limit errors."""
+
+    def __init__(self, rate=1.0, capacity=None, min_rate=0.1):
+        """
+        Args:
+            rate (float): Sustained requests per second.
+            capacity (float, optional): Burst size; defaults to one second worth of requests.
+            min_rate (float): Floor for the rate after repeated backoffs.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._blocked_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._blocked_until - now
+            time.sleep(wait)
+
+    def backoff(self, seconds):
+        """
+        Pauses every caller for `seconds` and halves the sustained rate.
+
+        Args:
+            seconds (float): How long no request may be sent.
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._updated = self._blocked_until
+            self._tokens = 0.0
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def on_success(self):
+        """
+        Recovers the rate additively after a successful request.
+        """
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+
+class ConcurrentListingsPipeline:
+    """
+    Overlaps LLM listing requests with image rendering for a `ListingsGenerator`.
+
+    Retries are handled here, paced by the shared token bucket, so the OpenAI client is used with
+    the SDK's own retries disabled; retrying in both places would multiply the requests sent to a
+    server that is already rate limiting.
+    """
+
+    def __init__(self, generator, max_in_flight=4, requests_per_second=2.0, queue_size=8,
+                 max_retries=5, backoff_seconds=1.0):
+        """
+        Args:
+            generator (ListingsGenerator): Generator providing `request_listings`, `render_images` and `save_listings`.
+            max_in_flight (int): Maximum number of concurrent LLM requests.
+            requests_per_second (float): Sustained LLM request rate.
+            queue_size (int): Parsed batches that may wait for rendering before the text stage blocks.
+            max_retries (int): Attempts per batch after rate-limit or other transient errors.
+            backoff_seconds (float): Base delay for exponential backoff when the server gives no hint.
+        """
+        self.generator = generator
+        client = generator.client or get_openai_client()
+        with_options = getattr(client, "with_options", None)  # Fakes have no SDK retries to disable
+        self.client = with_options(max_retries=0) if callable(with_options) else client
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.limiter = TokenBucket(rate=requests_per_second)
+        self.stats = {"batches": 0, "failed_batches": 0, "rate_limited": 0, "retried_errors": 0, "listings": 0}
+        self._stats_lock = threading.Lock()
+        self._render_error = None  # First exception of the render stage, re-raised by `run`
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _text_stage(self, render_queue):
+        """
+        Requests one batch from the LLM, retrying transient errors, and queues it for rendering.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                listings = self.generator.request_listings(client=self.client)
+            except Exception as e:
+                if is_transient_error(e) and attempt < self.max_retries:
+                    self._count("rate_limited" if is_rate_limit_error(e) else "retried_errors")
+                    delay = retry_after_seconds(e) or self.backoff_seconds * 2 ** attempt
+                    self.limiter.backoff(random.uniform(delay / 2, delay))
+                    continue
+                print(f"❌ Error generating batch: {e}")
+                self._count("failed_batches")
+                return
+
+            self.limiter.on_success()
+            self._count("batches")
+            if listings:
+                render_queue.put(listings)  # Blocks while the renderer is behind
+            return
+
+        self._count("failed_batches")
+
+    def _render_stage(self, render_queue):
+        """
+        Renders images for queued batches and saves each batch as soon as it is done.
+
+        After an error the queue is still drained up to the end marker, so text-stage workers
+        blocked on the bounded queue (and `run`) never hang; the error is re-raised by `run`.
+        """
+        while True:
+            listings = render_queue.get()
+            if listings is _DONE:
+                return
+            if self._render_error is not None:
+                continue
+            try:
+                self.generator.save_listings(self.generator.render_images(listings))
+                self._count("listings", len(listings))
+            except Exception as e:
+                print(f"❌ Render stage failed, discarding the remaining batches: {e}")
+                self._render_error = e
+
+    def run(self, n_batches=None):
+        """
+        Generates the listings and saves them through the generator.
+
+        Args:
+            n_batches (int, optional): Batches to request; defaults to total_listings // batch_size.
+
+        Returns:
+            dict: Throughput report (batches, failures, rate limits, elapsed seconds, listings per second).
+
+        Raises:
+            Exception: The first error raised while rendering or saving a batch.
+        """
+        if n_batches is None:
+            n_batches = self.generator.total_listings // self.generator.batch_size
+
+        render_queue = queue.Queue(maxsize=self.queue_size)
+        renderer = threading.Thread(target=self._render_stage, args=(render_queue,), daemon=True)
+
+        start = time.perf_counter()
+        renderer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+                for _ in range(n_batches):
+                    pool.submit(self._text_stage, render_queue)
+        finally:
+            render_queue.put(_DONE)
+            renderer.join()
+        elapsed = time.perf_counter() - start
+        if self._render_error is not None:
+            raise self._render_error
+
+        report = dict(self.stats)
+        report["elapsed_seconds"] = elapsed
+        report["listings_per_second"] = report["listings"] / elapsed if elapsed else 0.0
+
+        print(
+            f"✅ Generated {report['listings']} listings in {elapsed:.1f}s "
+            f"({report['listings_per_second']:.2f} listings/s, {report['rate_limited']} rate-limited, "
+            f"{report['retried_errors']} other retried errors, {report['failed_batches']} failed batches)"
+        )
+        return report
@@ -1,11 +1,170 @@
+import asyncio
+import os
+import time
+from collections import deque
 import gradio as gr
-import openai
 from answer_augmentation import LlmAugmentation
+from config_loader import get_settings
+from image_derivatives import DerivativeManifest, files_size
+from inventory_updater import SnapshotHolder
+from llm_cache import LlmResponseCache
+from openai_clients import get_async_openai_client
+from query_normalizer import QueryNormalizer
+from semantic_cache import SemanticCache
+from tracing import span, tracer
 
-def create_gradio_interface(vector_db):
-    """Creates and returns the Gradio UI."""
+# Part of every refinement cache key: bump it whenever the refinement prompt changes
+REFINEMENT_PROMPT_VERSION = "refine-v1"
 
-    def call_llm(text):
+# Latencies (seconds) of the most recent searches, for `search_timing_report`
+SEARCH_TIMINGS = deque(maxlen=1000)
+
+
+def search_timing_report():
+    """
+    Summarizes the latency of recent searches.
+
+    Returns:
+        dict: Number of searches, the mean gallery bytes served per search (and what the original
+        PNGs would have cost), the share that skipped the LLM input refinement, the share answered
+        by the semantic cache, and the median / p95 time to first result, to the first enhanced
+        description and to completion (overall, and for searches run while a new inventory
+        snapshot was being built).
+    """
+    def percentile(values, q):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+    timings = list(SEARCH_TIMINGS)
+    gallery_bytes = [timing["gallery_bytes"] for timing in timings if "gallery_bytes" in timing]
+    original_bytes = [timing["original_gallery_bytes"] for timing in timings if "original_gallery_bytes" in timing]
+    report = {
+        "searches": len(timings),
+        "gallery_bytes_mean": sum(gallery_bytes) / len(gallery_bytes) if gallery_bytes else None,
+        "original_gallery_bytes_mean": sum(original_bytes) / len(original_bytes) if original_bytes else None,
+        "refinement_skipped_rate": (
+            sum(not timing["refined_with_llm"] for timing in timings) / len(timings) if timings else 0.0
+        ),
+        "semantic_cache_hit_rate": (
+            sum(timing.get("semantic_cache_hit", False) for timing in timings) / len(timings) if timings else 0.0
+        ),
+        "searches_during_update": sum(timing.get("during_update", False) for timing in timings)
+    }
+    for key in ("time_to_first_result", "time_to_first_description", "total"):
+        values = [timing[key] for timing in timings if timing.get(key) is not None]
+        report[f"{key}_p50"] = percentile(values, 0.50)
+        report[f"{key}_p95"] = percentile(values, 0.95)
+    during_update = [timing["total"] for timing in timings if timing.get("during_update") and timing.get("total") is not None]
+    report["total_during_update_p50"] = percentile(during_update, 0.50)
+    report["total_during_update_p95"] = percentile(during_update, 0.95)
+    return report
+
+
+def format_results(search_results, descriptions):
+    """
+    Builds the rows of the results table.
+
+    Args:
+        search_results (list): Listings returned by `VectorDatabase.search`.
+        descriptions (dict): Listing id to the description to show.
+
+    Returns:
+        list: One [Title, Location, Price, Description] row per listing.
+    """
+    return [
+        [
+            f"{result['bedrooms']} Bed | {result['bathrooms']} Bath | {result['house_size']} sq ft",  # Title
+            f"{result['state']}, {result['city']}, {result.get('neighborhood', 'N/A')}",  # Location
+            f"${result['price']}",  # Price
+            descriptions.get(result["id"], result["description"])  # Description
+        ]
+        for result in search_results
+    ]
+
+
+def warn_if_incomplete(search_results):
+    """
+    Tells the user when the search found nothing, or only listings outside their filters.
+    """
+    if not search_results:
+        gr.Warning("No listings found. Try another location or a higher maximum price.")
+    elif search_results[0].get("filters_relaxed"):
+        gr.Warning("No listing matches every filter (location, price, bedrooms): showing the closest listings instead.")
+
+
+def semantic_cache_query(db, user_prefs, k):
+    """
+    Builds what a search is matched on in the semantic cache.
+
+    Only the free-text description is compared by embedding similarity; the structured fields
+    (location, price, size, rooms, amenities) and the number of results must match exactly
+    through the scope. A search without a description only matches identical searches.
+
+    Args:
+        db (VectorDatabase): Database the search runs on.
+        user_prefs (dict): Preferences of the search, with the normalized description.
+        k (int): Number of results.
+
+    Returns:
+        tuple: (text to embed, scope for `SemanticCache.lookup`).
+    """
+    description = (user_prefs.get("description") or "").strip()
+    structured = {key: value for key, value in user_prefs.items() if key != "description"}
+    scope = SemanticCache.make_scope(
+        db.build_filter(user_prefs), k, mode=db.search_mode, has_description=bool(description), **structured
+    )
+    return description or db.format_user_prefs(user_prefs), scope
+
+
+def build_search_handler(vector_db, llm_augm=None, llm_cache=None, client=None, normalizer=None,
+                         refine_in_background=True, image_manifest=None, semantic_cache=None):
+    """
+    Builds the search handler wired to the "Search" button, usable without the UI (e.g. by benchmarks).
+
+    Args:
+        vector_db (VectorDatabase | SnapshotHolder): Database used for the searches; with a `SnapshotHolder`
+            (see `inventory_updater`) each search uses the snapshot current when it starts.
+        llm_augm (LlmAugmentation, optional): Augmentation service shared by every search; created once if omitted.
+        llm_cache (LlmResponseCache, optional): Cache shared by every worker thread for refined inputs
+            (and for augmented descriptions when `llm_augm` is created here).
+        client (AsyncOpenAI, optional): Client refining user input; the shared pooled client if omitted.
+        normalizer (QueryNormalizer, optional): Local clean-up deciding whether the LLM refinement is needed;
+            by default it also knows every term of the BM25 index (of the current snapshot).
+        refine_in_background (bool): Show results for the locally normalized text while the LLM refinement
+            runs; if False, a needed refinement completes before searching.
+        image_manifest (DerivativeManifest, optional): Image derivatives; the gallery shows thumbnails and
+            the full image is loaded only when a thumbnail is selected.
+        semantic_cache (SemanticCache, optional): Final answers of earlier searches; a search whose query
+            embedding is close enough to a cached one (same hard constraints) skips retrieval and every LLM call.
+
+    Returns:
+        Callable: The `search_houses` async generator function.
+    """
+    llm_augm = llm_augm or LlmAugmentation(cache=llm_cache)
+    snapshots = vector_db if isinstance(vector_db, SnapshotHolder) else SnapshotHolder(vector_db)
+    normalizers = {}  # Snapshot -> default normalizer knowing its BM25 terms (only the latest is kept)
+
+    def normalizer_for(db):
+        if normalizer is not None:
+            return normalizer
+        if db not in normalizers:
+            normalizers.clear()
+            normalizers[db] = QueryNormalizer(vocabulary=db.lexical_index.postings, threshold=get_settings().refinement_threshold)
+        return normalizers[db]
+
+    normalizer_for(snapshots.current)
+    image_manifest = image_manifest or DerivativeManifest(os.path.join(get_settings().images_dir, "derivatives"))
+
+    def gallery_for(search_results):
+        """
+        Returns the gallery thumbnails and the full images they open, recording the bytes they cost.
+        """
+        originals = [result["image_path"] for result in search_results]
+        thumbnails = [image_manifest.thumbnail_for(path) for path in originals]
+        full_images = [image_manifest.full_image_for(path) for path in originals]
+        return thumbnails, full_images, files_size(thumbnails), files_size(originals)
+
+    async def call_llm(text):
         """Refines user input for clarity and consistency using LLM."""
         prompt = f"""
         Please improve the following user input by:
@@ -17,25 +176,58 @@ def create_gradio_interface(vector_db):
         Improved Output:
         """
 
-        try:
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an AI that refines user input for structured data."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0
-            )
-            return response.choices[0].message.content.strip()
-        
-        except Exception as e:
-            print(f"❌ LLM Error: {e}")
-            return text  # Return original input if LLM fails
-
-    def search_houses(location, house_size, max_price, num_bedrooms, num_bathrooms, amenities, description, num_listings):
-        """Retrieves property listings and enhances descriptions using LLM."""
-        
-        description = call_llm(description)  # Refine input description
+        with span("search.refine_llm") as trace:
+            model = get_settings().refinement_model
+            key = LlmResponseCache.make_key(REFINEMENT_PROMPT_VERSION, model, 0, text.strip())
+            if llm_cache is not None:
+                cached = llm_cache.get(key)
+                trace.set("cache_hit", cached is not None)
+                if cached is not None:
+                    return cached
+
+            try:
+                response = await (client or get_async_openai_client()).chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "You are an AI that refines user input for structured data."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0
+                )
+                refined = response.choices[0].message.content.strip()
+                tokens = getattr(getattr(response, "usage", None), "total_tokens", None)
+                if tokens:
+                    trace.set("tokens", tokens)
+                if llm_cache is not None:
+                    llm_cache.set(key, refined, tokens=tokens)
+                return refined
+
+            except Exception as e:
+                trace.add("errors")
+                print(f"❌ LLM Error: {e}")
+                return text  # Return original input if LLM fails
+
+    async def search_houses(location, house_size, max_price, num_bedrooms, num_bathrooms, amenities, description, num_listings):
+        """
+        Retrieves property listings and streams LLM-enhanced descriptions into them.
+
+        Yields:
+            tuple: (table rows, gallery thumbnails, full images). The first yield shows the raw descriptions as soon as the
+            vector search returns; later yields update the rows as enhanced descriptions arrive.
+            LLM calls are awaited on the event loop, so one worker serves many concurrent searches.
+        """
+        start = time.perf_counter()
+        db = snapshots.current  # Kept for the whole search, even if a newer snapshot is swapped in
+        timing = {"time_to_first_result": None, "time_to_first_description": None, "total": None,
+                  "semantic_cache_hit": False, "during_update": snapshots.updating}
+
+        # Rule-based clean-up first; the LLM is only asked when the normalizer is unsure, and then gets the
+        # user's own text so a wrong local correction can still be repaired
+        with span("search.normalize") as trace:
+            normalized = normalizer_for(db).normalize(description)
+            trace.set("needs_llm", normalized["needs_llm"])
+        raw_description, description = description, normalized["text"]
+        timing["refined_with_llm"] = normalized["needs_llm"]
         city, state = location.split(", ")
 
         user_prefs = {
@@ -49,29 +241,107 @@ def create_gradio_interface(vector_db):
             "description": description
         }
 
-        search_results = vector_db.search(user_prefs, num_listings)
+        # A near-identical earlier search answers directly: no retrieval, refinement or augmentation
+        if semantic_cache is not None:
+            version = db.collection_version
+            cache_text, scope = semantic_cache_query(db, user_prefs, num_listings)
+            query_embedding = await asyncio.to_thread(db.embed_query, cache_text)
+            with span("search.semantic_cache") as trace:
+                cached = semantic_cache.lookup(query_embedding, scope, version)
+                trace.set("cache_hit", cached is not None)
+            if cached is not None:
+                search_results = cached["results"]
+                warn_if_incomplete(search_results)
+                thumbnails, full_images, timing["gallery_bytes"], timing["original_gallery_bytes"] = gallery_for(search_results)
+                timing["refined_with_llm"] = False
+                timing["semantic_cache_hit"] = True
+                timing["time_to_first_result"] = timing["time_to_first_description"] = timing["total"] = time.perf_counter() - start
+                SEARCH_TIMINGS.append(timing)
+                tracer.observe("search.time_to_first_result", timing["total"])
+                tracer.observe("search.total", timing["total"], semantic_cache_hit=True, gallery_bytes=timing["gallery_bytes"])
+                print(
+                    f"⏱️ Search: answered by the semantic cache in {timing['total'] * 1000:.0f} ms "
+                    f"(similarity {cached['similarity']:.3f}, ~{cached['llm_seconds'] * 1000:.0f} ms of LLM calls saved)"
+                )
+                yield format_results(search_results, cached["descriptions"]), thumbnails, full_images
+                return
 
-        if not search_results:
-            return [], []  # Empty lists to avoid breaking Gradio
+        llm_seconds = 0.0  # Time spent waiting on the LLM, credited to later semantic cache hits
+        refined = asyncio.create_task(call_llm(raw_description)) if normalized["needs_llm"] else None
+        if refined is not None and not refine_in_background:
+            llm_start = time.perf_counter()
+            description = user_prefs["description"] = await refined
+            llm_seconds += time.perf_counter() - llm_start
+            refined = None
 
-        llm_augm = LlmAugmentation()
-        augmented_results = [llm_augm.generate_augmented_descriptions(result) for result in search_results]
+        # The search is CPU-bound (plus a cached query embedding); keep it off the event loop
+        search_results = await asyncio.to_thread(db.search, user_prefs, num_listings)
+        warn_if_incomplete(search_results)
+        timing["time_to_first_result"] = time.perf_counter() - start
+        tracer.observe("search.time_to_first_result", timing["time_to_first_result"])
+        thumbnails, full_images, timing["gallery_bytes"], timing["original_gallery_bytes"] = gallery_for(search_results)
+        yield format_results(search_results, {}), thumbnails, full_images
 
-        # **Formatted Data for Text Table**
-        formatted_text = [
-            [
-                f"{result['bedrooms']} Bed | {result['bathrooms']} Bath | {result['house_size']} sq ft",  # Title
-                f"{result['state']}, {result['city']}, {result.get('neighborhood', 'N/A')}",  # Location
-                f"${result['price']}",  # Price
-                augmented_results[i] if i < len(augmented_results) else "N/A"  # Description
-            ]
-            for i, result in enumerate(search_results)
-        ]
+        # Re-run the search only if the refined description changes the matches
+        llm_start = time.perf_counter()
+        refined_description = await refined if refined is not None else description
+        llm_seconds += time.perf_counter() - llm_start
+        if refined_description != description:
+            user_prefs["description"] = refined_description
+            refined_results = await asyncio.to_thread(db.search, user_prefs, num_listings)
+            if [r["id"] for r in refined_results] != [r["id"] for r in search_results]:
+                search_results = refined_results
+                thumbnails, full_images, gallery_bytes, original_bytes = gallery_for(search_results)
+                timing["gallery_bytes"] += gallery_bytes
+                timing["original_gallery_bytes"] += original_bytes
+                yield format_results(search_results, {}), thumbnails, full_images
+
+        # Stream the enhanced descriptions; the gallery is left untouched
+        descriptions = {}
+        llm_start = time.perf_counter()
+        async for listing_id, augmented in llm_augm.astream_augmented_listings(search_results):
+            if timing["time_to_first_description"] is None:
+                timing["time_to_first_description"] = time.perf_counter() - start
+                tracer.observe("search.time_to_first_description", timing["time_to_first_description"])
+            descriptions[listing_id] = augmented
+            yield format_results(search_results, descriptions), gr.update(), full_images
+        llm_seconds += time.perf_counter() - llm_start
+
+        # Only complete answers are reused
+        if semantic_cache is not None and search_results and all(r["id"] in descriptions for r in search_results):
+            semantic_cache.store(query_embedding, scope, version, search_results, descriptions, llm_seconds=llm_seconds)
+
+        timing["total"] = time.perf_counter() - start
+        SEARCH_TIMINGS.append(timing)
+        tracer.observe(
+            "search.total", timing["total"], refined_with_llm=timing["refined_with_llm"], semantic_cache_hit=False,
+            gallery_bytes=timing["gallery_bytes"], original_gallery_bytes=timing["original_gallery_bytes"]
+        )
+        print(
+            f"⏱️ Search: first results {timing['time_to_first_result'] * 1000:.0f} ms, "
+            f"first description {(timing['time_to_first_description'] or 0) * 1000:.0f} ms, "
+            f"total {timing['total'] * 1000:.0f} ms, "
+            f"gallery {timing['gallery_bytes'] / 1024:.0f} KB (originals {timing['original_gallery_bytes'] / 1024:.0f} KB), "
+            f"input refinement {'LLM' if timing['refined_with_llm'] else 'local'}"
+        )
+
+    return search_houses
 
-        # **List of Image Paths for Gallery**
-        image_paths = [result["image_path"] for result in search_results]
 
-        return formatted_text, image_paths
+def create_gradio_interface(vector_db, llm_augm=None, llm_cache=None, client=None, normalizer=None,
+                            refine_in_background=True, image_manifest=None, semantic_cache=None):
+    """
+    Creates and returns the Gradio UI.
+
+    Args:
+        vector_db (VectorDatabase | SnapshotHolder): Database used for the searches.
+        llm_augm, llm_cache, client, normalizer, refine_in_background, image_manifest, semantic_cache:
+            See `build_search_handler`.
+    """
+    search_houses = build_search_handler(
+        vector_db, llm_augm=llm_augm, llm_cache=llm_cache, client=client, normalizer=normalizer,
+        refine_in_background=refine_in_background, image_manifest=image_manifest, semantic_cache=semantic_cache
+    )
 
     with gr.Blocks() as demo:
         gr.Markdown("## Welcome to HomeMatch 🏡\nFill in your preferences and press 'Search' to find a home!")
@@ -112,12 +382,21 @@ def create_gradio_interface(vector_db):
             )
 
         image_gallery = gr.Gallery(label="Listing Images", columns=3, height=300)
+        full_image = gr.Image(label="Selected Listing", visible=False, interactive=False)
+        full_images = gr.State([])  # Full-size image of each thumbnail, loaded only when selected
+
+        def show_full_image(paths, evt: gr.SelectData):
+            """Loads the full-size image of the selected thumbnail."""
+            if evt.index is None or evt.index >= len(paths):
+                return gr.update(visible=False)
+            return gr.update(value=paths[evt.index], visible=True)
 
         # **Button Action**
         search_button.click(
             search_houses,
             inputs=[location, house_size, max_price, num_bedrooms, num_bathrooms, amenities, description, num_listings],
-            outputs=[results_table, image_gallery]  # ✅ Now outputs images separately
+            outputs=[results_table, image_gallery, full_images]  # ✅ Now outputs images separately
         )
+        image_gallery.select(show_full_image, inputs=[full_images], outputs=[full_image])
 
     return demo
\ No newline at end of file
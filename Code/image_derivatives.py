@@ -0,0 +1,202 @@
+"""
+Module: image_derivatives
+Description: Writes web-friendly derivatives (WebP thumbnails and full-size WebP) of the generated listing
+             images, tracked in a JSON manifest, plus a backfill command for existing images.
+
+Usage:
+    python image_derivatives.py --images ../Data/Images
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from config_loader import get_settings
+
+DERIVATIVES_DIR = "../Data/Images/derivatives"
+THUMBNAIL_SIZE = (384, 384)  # Bounding box; the aspect ratio is kept
+THUMBNAIL_QUALITY = 70
+WEBP_QUALITY = 85
+
+
+class DerivativeManifest:
+    """
+    JSON manifest mapping each original image (by file name) to its derivatives and their sizes.
+    Shared between threads; every update is written atomically.
+    """
+
+    def __init__(self, output_dir=DERIVATIVES_DIR):
+        """
+        Args:
+            output_dir (str): Directory holding the derivatives and `manifest.json`.
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, "manifest.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except json.JSONDecodeError as e:
+            print(f"❌ Error loading image manifest, starting empty: {e}")
+            self.entries = {}
+
+    def get(self, image_path):
+        """
+        Returns the manifest entry of an original image, or None.
+        """
+        return self.entries.get(os.path.basename(image_path or ""))
+
+    def is_current(self, image_path):
+        """
+        Returns True if the image has derivatives at least as recent as the image itself.
+        """
+        entry = self.get(image_path)
+        return bool(entry) and entry["source_mtime"] >= os.path.getmtime(image_path) and all(
+            os.path.exists(os.path.join(self.output_dir, entry[kind])) for kind in ("thumbnail", "webp")
+        )
+
+    def thumbnail_for(self, image_path):
+        """
+        Returns the thumbnail to show in the gallery, falling back to the original image.
+        """
+        entry = self.get(image_path)
+        return os.path.join(self.output_dir, entry["thumbnail"]) if entry else image_path
+
+    def full_image_for(self, image_path):
+        """
+        Returns the full-size image to show on demand (WebP if available, else the original).
+        """
+        entry = self.get(image_path)
+        return os.path.join(self.output_dir, entry["webp"]) if entry else image_path
+
+    def update(self, image_path, entry, save=True):
+        """
+        Records the derivatives of an image.
+
+        Args:
+            image_path (str): Path of the original image.
+            entry (dict): Entry built by `create_derivatives`.
+            save (bool): Write the manifest right away (bulk callers save once at the end).
+        """
+        with self._lock:
+            self.entries[os.path.basename(image_path)] = entry
+            if save:
+                self._save()
+
+    def save(self):
+        """
+        Atomically writes the manifest.
+        """
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def create_derivatives(image_path, manifest, image=None, save=True):
+    """
+    Writes the thumbnail and full-size WebP of an image and records them in the manifest.
+
+    Args:
+        image_path (str): Path of the original (PNG) image.
+        manifest (DerivativeManifest): Manifest to update.
+        image (PIL.Image.Image, optional): The already-decoded image, to avoid reading it back from disk.
+        save (bool): Write the manifest right away.
+
+    Returns:
+        dict: The manifest entry, or None if the derivatives could not be written.
+    """
+    try:
+        os.makedirs(manifest.output_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(image_path))[0]
+        thumbnail_name, webp_name = f"{stem}_thumb.webp", f"{stem}.webp"
+
+        if image is None:
+            with Image.open(image_path) as source:
+                image = source.convert("RGB")
+        else:
+            image = image.convert("RGB")
+
+        image.save(os.path.join(manifest.output_dir, webp_name), "WEBP", quality=WEBP_QUALITY, method=4)
+        thumbnail = image.copy()
+        thumbnail.thumbnail(THUMBNAIL_SIZE, Image.LANCZOS)
+        thumbnail.save(os.path.join(manifest.output_dir, thumbnail_name), "WEBP", quality=THUMBNAIL_QUALITY, method=4)
+
+        entry = {
+            "thumbnail": thumbnail_name,
+            "webp": webp_name,
+            "width": image.width,
+            "height": image.height,
+            "source_mtime": os.path.getmtime(image_path),
+            "bytes": {
+                "original": os.path.getsize(image_path),
+                "webp": os.path.getsize(os.path.join(manifest.output_dir, webp_name)),
+                "thumbnail": os.path.getsize(os.path.join(manifest.output_dir, thumbnail_name))
+            }
+        }
+        manifest.update(image_path, entry, save=save)
+        return entry
+
+    except Exception as e:
+        print(f"❌ Error creating derivatives for {image_path}: {e}")
+        return None
+
+
+def files_size(paths):
+    """
+    Sums the sizes of the existing files among `paths`.
+
+    Args:
+        paths (list): File paths (missing files count as 0 bytes).
+
+    Returns:
+        int: Total size in bytes.
+    """
+    return sum(os.path.getsize(path) for path in paths if path and os.path.exists(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create WebP thumbnails and derivatives for existing listing images.")
+    parser.add_argument("--images", default=get_settings().images_dir, help="Directory of the original PNG images")
+    parser.add_argument("--output", help="Directory receiving derivatives and manifest.json (default: <images>/derivatives)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Images encoded in parallel")
+    parser.add_argument("--force", action="store_true", help="Rebuild derivatives that are already up to date")
+    parser.add_argument("--k", type=int, default=3, help="Images per search, for the bytes-per-search estimate")
+    args = parser.parse_args()
+
+    manifest = DerivativeManifest(args.output or os.path.join(args.images, "derivatives"))
+    images = sorted(
+        os.path.join(args.images, name) for name in os.listdir(args.images) if name.lower().endswith(".png")
+    )
+    todo = [path for path in images if args.force or not manifest.is_current(path)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        created = sum(entry is not None for entry in pool.map(lambda path: create_derivatives(path, manifest, save=False), todo))
+    manifest.save()
+    print(f"✅ Created derivatives for {created}/{len(todo)} image(s) in {time.perf_counter() - start:.1f}s "
+          f"({len(images) - len(todo)} already up to date).")
+
+    entries = [manifest.get(path) for path in images if manifest.get(path)]
+    if entries:
+        totals = {kind: sum(entry["bytes"][kind] for entry in entries) for kind in ("original", "webp", "thumbnail")}
+        per_image = {kind: total / len(entries) for kind, total in totals.items()}
+        print(f"📦 Bytes per image: original {per_image['original'] / 1024:.0f} KB, "
+              f"WebP {per_image['webp'] / 1024:.0f} KB, thumbnail {per_image['thumbnail'] / 1024:.0f} KB")
+        print(f"📦 Gallery bytes per search (k={args.k}): before {args.k * per_image['original'] / 1024:.0f} KB, "
+              f"after {args.k * per_image['thumbnail'] / 1024:.0f} KB "
+              f"({per_image['thumbnail'] / per_image['original']:.1%} of the original)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Module: inventory_updater
+Description: Picks up new or changed listings while the app is running. A background thread watches the listings
+             file, syncs the changes into a copy of the live index and atomically swaps the copy in; searches
+             read whichever snapshot is current when they start and never wait for an update.
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import deque
+
+
+class SnapshotHolder:
+    """
+    Holds the `VectorDatabase` searches read from.
+
+    Reading `current` is a single attribute load, so readers never lock; a search keeps the
+    snapshot it started with until it finishes, even if a newer one is swapped in meanwhile.
+    """
+
+    def __init__(self, database):
+        """
+        Args:
+            database (VectorDatabase): Initial snapshot.
+        """
+        self._current = database
+        self.version = 0
+        self.updating = False  # True while a new snapshot is being built
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        """
+        Returns:
+            VectorDatabase: The snapshot new searches should use.
+        """
+        return self._current
+
+    def swap(self, database):
+        """
+        Makes `database` the current snapshot.
+
+        Returns:
+            VectorDatabase: The replaced snapshot.
+        """
+        with self._lock:
+            previous, self._current = self._current, database
+            self.version += 1
+        return previous
+
+
+def snapshot_paths(path):
+    """
+    Returns:
+        tuple: (db_path, lexical_index_path) of the snapshot stored in directory `path`.
+    """
+    return os.path.join(path, "vectors"), os.path.join(path, "bm25_index.json")
+
+
+def current_snapshot_paths(snapshot_root):
+    """
+    Finds the snapshot that was live when the app last ran, so a restart keeps the swapped-in updates.
+
+    Args:
+        snapshot_root (str): Snapshot directory of an `InventoryUpdater`.
+
+    Returns:
+        tuple: (db_path, lexical_index_path) named by the `CURRENT` pointer, or None if there is none.
+    """
+    try:
+        with open(os.path.join(snapshot_root, "CURRENT"), "r") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(snapshot_root, name)
+    return snapshot_paths(path) if name and os.path.isdir(path) else None
+
+
+class InventoryUpdater:
+    """
+    Rebuilds and swaps in a new snapshot whenever the listings file changes.
+
+    Each update first checks the live snapshot for changes, then builds a new snapshot directory
+    and runs the incremental `store_listings` there; the live files are never written. With the
+    NumPy backend the live vectors are copied (its files are only ever replaced atomically, and a
+    live snapshot is not written at all); a Chroma snapshot is rebuilt from the listings file, since
+    an open Chroma directory cannot be copied consistently, with embeddings served by the shared
+    embedding cache. The query embedding cache is shared too; result caches start empty, and
+    `collection_version` keeps increasing so version-keyed caches (e.g. `SemanticCache`) drop
+    answers from older snapshots.
+
+    `CURRENT` in the snapshot directory names the live snapshot (see `current_snapshot_paths`).
+    Replaced snapshots are closed and deleted after `grace_seconds`, once searches that started on
+    them are done.
+    """
+
+    def __init__(self, holder, database_factory, snapshot_root="../Data/snapshots", interval=5.0, grace_seconds=60.0):
+        """
+        Args:
+            holder (SnapshotHolder): Holder the new snapshots are swapped into.
+            database_factory (callable): Opens a `VectorDatabase` from `(db_path, lexical_index_path)`,
+                configured like the initial snapshot.
+            snapshot_root (str): Directory receiving one subdirectory per snapshot.
+            interval (float): Seconds between two checks of the listings file.
+            grace_seconds (float): Delay before a replaced snapshot is closed and its directory deleted.
+        """
+        self.holder = holder
+        self.database_factory = database_factory
+        self.snapshot_root = snapshot_root
+        self.interval = interval
+        self.grace_seconds = grace_seconds
+        self.swap_seconds = deque(maxlen=1000)
+        self.build_seconds = deque(maxlen=1000)
+        self.last_summary = None
+        self._signature = self._listings_signature()
+        self._retiring = {}  # Replaced snapshot -> timer closing it
+        self._update_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._remove_unused_snapshots()
+
+    # ------------------------------------------------------------------ watcher
+
+    def start(self):
+        """
+        Starts watching the listings file in a daemon thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="inventory-updater", daemon=True)
+        self._thread.start()
+        print(f"🔄 Watching {self.holder.current.listings_path} for new listings every {self.interval:g}s.")
+
+    def stop(self, timeout=None):
+        """
+        Stops the watcher thread (an update in progress completes first) and closes replaced snapshots now.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        for database, timer in list(self._retiring.items()):
+            timer.cancel()
+            self._close_snapshot(database)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if self._listings_signature() != self._signature:
+                try:
+                    self.update()
+                except Exception as e:
+                    print(f"❌ Inventory update failed: {e}")
+
+    def _listings_signature(self):
+        """
+        Returns:
+            tuple: Modification time and size of the listings file, or None if it does not exist.
+        """
+        try:
+            stat = os.stat(self.holder.current.listings_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    # ------------------------------------------------------------------ updates
+
+    def update(self):
+        """
+        Syncs the listings file into a new snapshot and swaps it in if anything changed.
+
+        Returns:
+            dict: Counts of "added", "updated", "skipped" and "removed" listings plus
+            "swapped", "build_seconds" and "swap_seconds".
+        """
+        with self._update_lock:
+            start = time.perf_counter()
+            # Taken first: a write landing during the build triggers another update
+            self._signature = self._listings_signature()
+            base = self.holder.current
+            changes = base.pending_changes()
+            if not (changes["added"] or changes["updated"] or changes["removed"]):
+                self.last_summary = {**changes, "swapped": False, "build_seconds": time.perf_counter() - start}
+                return self.last_summary
+
+            self.holder.updating = True
+            path = self._new_snapshot_path()
+            try:
+                db_path, lexical_index_path = self._prepare_snapshot(base, path)
+                database = self.database_factory(db_path, lexical_index_path)
+                database.query_embedding_cache = base.query_embedding_cache  # Query embeddings never go stale
+                database.store_listings()
+                database.collection_version = base.collection_version + 1
+                build_seconds = time.perf_counter() - start
+
+                swap_start = time.perf_counter()
+                self.holder.swap(database)
+                swap_seconds = time.perf_counter() - swap_start
+            except Exception:
+                shutil.rmtree(path, ignore_errors=True)
+                raise
+            finally:
+                self.holder.updating = False
+
+            self._write_current(path)
+            self._retire(base)
+            self.build_seconds.append(build_seconds)
+            self.swap_seconds.append(swap_seconds)
+            self.last_summary = {**changes, "swapped": True, "build_seconds": build_seconds, "swap_seconds": swap_seconds}
+            print(
+                f"✅ Inventory snapshot {self.holder.version} live: {changes['added']} added, {changes['updated']} updated, "
+                f"{changes['removed']} removed (built in {build_seconds:.2f}s, swapped in {swap_seconds * 1e6:.0f} µs)."
+            )
+            return self.last_summary
+
+    def _new_snapshot_path(self):
+        os.makedirs(self.snapshot_root, exist_ok=True)
+        return os.path.join(self.snapshot_root, f"snapshot_{int(time.time() * 1000)}_{self.holder.version + 1:06d}")
+
+    @staticmethod
+    def _prepare_snapshot(database, path):
+        """
+        Creates the directory of a new snapshot, seeded with the files of `database` that can be copied safely.
+
+        Returns:
+            tuple: (db_path, lexical_index_path) of the new snapshot.
+        """
+        db_path, lexical_index_path = snapshot_paths(path)
+        if database.backend == "numpy" and os.path.isdir(database.db_path):
+            shutil.copytree(database.db_path, db_path)
+        else:
+            os.makedirs(db_path)
+        if os.path.exists(database.lexical_index_path):
+            shutil.copy2(database.lexical_index_path, lexical_index_path)  # Saved by atomic replace
+        return db_path, lexical_index_path
+
+    def _write_current(self, path):
+        """
+        Atomically points `CURRENT` at the snapshot directory `path`.
+        """
+        pointer = os.path.join(self.snapshot_root, "CURRENT")
+        with open(f"{pointer}.tmp", "w") as f:
+            f.write(os.path.basename(path))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{pointer}.tmp", pointer)
+
+    def _retire(self, database):
+        """
+        Schedules a replaced snapshot to be closed and deleted once its grace period is over.
+        """
+        timer = threading.Timer(self.grace_seconds, self._close_snapshot, args=(database,))
+        timer.daemon = True
+        self._retiring[database] = timer
+        timer.start()
+
+    def _close_snapshot(self, database):
+        """
+        Closes a replaced snapshot and deletes its directory if the updater created it.
+        """
+        self._retiring.pop(database, None)
+        try:
+            database.close()
+        except Exception as e:
+            print(f"❌ Error closing snapshot {database.db_path}: {e}")
+        directory = self._snapshot_directory(database)
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _snapshot_directory(self, database):
+        """
+        Returns:
+            str: The snapshot directory holding `database`, or None if it lives outside `snapshot_root`.
+        """
+        parent = os.path.dirname(os.path.abspath(database.db_path))
+        if os.path.dirname(parent) == os.path.abspath(self.snapshot_root):
+            return parent
+        return None
+
+    def _remove_unused_snapshots(self):
+        """
+        Deletes snapshot directories left by earlier runs, except the one the holder is serving.
+        """
+        if not os.path.isdir(self.snapshot_root):
+            return
+        in_use = self._snapshot_directory(self.holder.current)
+        for name in os.listdir(self.snapshot_root):
+            path = os.path.abspath(os.path.join(self.snapshot_root, name))
+            if name.startswith("snapshot_") and path != in_use:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self):
+        """
+        Reports update activity.
+
+        Returns:
+            dict: Snapshot version, number of swaps, median / max swap latency (seconds),
+            median build time and the summary of the last update.
+        """
+        def median(values):
+            values = sorted(values)
+            return values[len(values) // 2] if values else None
+
+        return {
+            "snapshot_version": self.holder.version,
+            "swaps": len(self.swap_seconds),
+            "swap_seconds_p50": median(self.swap_seconds),
+            "swap_seconds_max": max(self.swap_seconds, default=None),
+            "build_seconds_p50": median(self.build_seconds),
+            "last_update": self.last_summary
+        }
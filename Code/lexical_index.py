@@ -0,0 +1,216 @@
+"""
+Module: lexical_index
+Description: Incremental, disk-persisted BM25 inverted index over listing texts, plus reciprocal rank fusion.
+"""
+
+import json
+import math
+import os
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in", "is", "it", "its",
+    "of", "on", "or", "that", "the", "this", "to", "with", "your", "you", "none"
+}
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase terms, dropping stopwords and plural "s" endings.
+
+    Args:
+        text (str): Text to tokenize.
+
+    Returns:
+        list: Terms in order of appearance.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]  # "pools" -> "pool", "fireplaces" -> "fireplace"
+        terms.append(token)
+    return terms
+
+
+def reciprocal_rank_fusion(rankings, rrf_k=60):
+    """
+    Fuses several rankings with reciprocal rank fusion.
+
+    Args:
+        rankings (list): Lists of document ids, best first.
+        rrf_k (int): Damping constant; larger values flatten the contribution of top ranks.
+
+    Returns:
+        list: Document ids ordered by fused score, best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class BM25Index:
+    """Okapi BM25 inverted index that supports upserts and deletions of single documents."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        """
+        Args:
+            k1 (float): Term-frequency saturation.
+            b (float): Document-length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings = {}      # term -> {doc_id: term frequency}
+        self.doc_lengths = {}   # doc_id -> number of terms
+        self.doc_terms = {}     # doc_id -> distinct terms, so removals only touch their own postings
+        self.doc_hashes = {}    # doc_id -> content hash of the indexed text
+        self.total_length = 0
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_lengths
+
+    def doc_ids(self):
+        """
+        Returns:
+            list: Ids of every indexed document.
+        """
+        return list(self.doc_lengths)
+
+    def upsert(self, doc_id, text, content_hash=None):
+        """
+        Indexes a document, replacing any previous version.
+
+        Args:
+            doc_id (str): Document id.
+            text (str): Text to index.
+            content_hash (str, optional): If equal to the indexed hash, the document is left untouched.
+
+        Returns:
+            bool: True if the index changed.
+        """
+        if content_hash is not None and self.doc_hashes.get(doc_id) == content_hash:
+            return False
+        self.remove(doc_id)
+
+        terms = tokenize(text)
+        frequencies = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+
+        self.doc_lengths[doc_id] = len(terms)
+        self.doc_terms[doc_id] = list(frequencies)
+        self.doc_hashes[doc_id] = content_hash
+        self.total_length += len(terms)
+        self.dirty = True
+        return True
+
+    def remove(self, doc_id):
+        """
+        Removes a document from the index.
+
+        Args:
+            doc_id (str): Document id.
+
+        Returns:
+            bool: True if the document was indexed.
+        """
+        if doc_id not in self.doc_lengths:
+            return False
+        for term in self.doc_terms.pop(doc_id, []):
+            docs = self.postings.get(term, {})
+            docs.pop(doc_id, None)
+            if not docs:
+                self.postings.pop(term, None)
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        self.doc_hashes.pop(doc_id, None)
+        self.dirty = True
+        return True
+
+    def search(self, query, k=10):
+        """
+        Ranks documents against a query with BM25.
+
+        Args:
+            query (str): Query text.
+            k (int): Number of results.
+
+        Returns:
+            list: (doc_id, score) tuples, best first.
+        """
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+        avg_length = self.total_length / n_docs or 1.0
+
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, frequency in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, path):
+        """
+        Atomically writes the index to disk.
+
+        Args:
+            path (str): Destination JSON file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "postings": self.postings,
+                "doc_lengths": self.doc_lengths,
+                "doc_terms": self.doc_terms,
+                "doc_hashes": self.doc_hashes
+            }, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads an index saved with `save`, or returns an empty index.
+
+        Args:
+            path (str): JSON file written by `save`.
+
+        Returns:
+            BM25Index: The loaded (or empty) index.
+        """
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except json.JSONDecodeError as e:
+            print(f"❌ Error loading BM25 index, starting empty: {e}")
+            return cls()
+
+        index = cls(k1=data["k1"], b=data["b"])
+        index.postings = data["postings"]
+        index.doc_lengths = data["doc_lengths"]
+        index.doc_terms = data["doc_terms"]
+        index.doc_hashes = data["doc_hashes"]
+        index.total_length = sum(index.doc_lengths.values())
+        return index
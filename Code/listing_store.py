@@ -0,0 +1,233 @@
+"""
+Module: listing_store
+Description: Append-only, crash-safe JSON Lines storage for generated listings, with lazy streaming reads.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+# Trailing bytes of the committed data fingerprinted in the checkpoint
+_FINGERPRINT_BYTES = 4096
+
+
+def iter_listings(path):
+    """
+    Lazily yields listings from a JSON Lines file, one listing per line.
+
+    Legacy files holding a single JSON array are still accepted (loaded in one go).
+    A truncated last line, left behind by a crash mid-write, is skipped.
+
+    Args:
+        path (str): Path to the listings file.
+
+    Yields:
+        dict: One listing at a time.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        json.JSONDecodeError: If a line other than the last one is malformed.
+    """
+    with open(path, "r") as f:
+        first_char = f.read(1)
+        while first_char.isspace():
+            first_char = f.read(1)
+        f.seek(0)
+
+        if first_char == "[":
+            yield from json.load(f)
+            return
+
+        pending_error = None
+        for line in f:
+            if not line.strip():
+                continue
+            if pending_error:
+                raise pending_error
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                pending_error = e  # Only tolerated if it turns out to be the last line
+
+        if pending_error:
+            print(f"⚠️ Skipping truncated last line in {path}: {pending_error}")
+
+
+class JsonlListingWriter:
+    """
+    Appends listings to a JSON Lines file, fsyncing each batch and checkpointing the committed length.
+
+    Before each batch the checkpoint records where the batch will end, and it fingerprints the
+    last committed bytes, so `recover` can tell the remains of its own interrupted batch (truncated)
+    from a file that changed since (kept as is).
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path to the JSON Lines file; the checkpoint is stored next to it.
+        """
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoint"
+        self.count = 0
+        self.offset = 0
+        self._tail = b""  # Last committed bytes, for the checkpoint fingerprint
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """
+        Starts a fresh file, discarding any previous listings and checkpoint.
+        """
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "w"):
+                pass
+            self.count = 0
+            self.offset = 0
+            self._tail = b""
+            self._write_checkpoint()
+
+    def recover(self):
+        """
+        Reopens an existing file for appending after a previous (possibly crashed) run.
+
+        Bytes past the checkpoint are truncated only when the checkpoint still describes the file
+        (same fingerprint) and they lie within the batch it was writing: they are the remains of
+        that interrupted batch. Otherwise the file changed since (e.g. listings appended by another
+        tool): the checkpoint is discarded, the listings are counted and the file is kept as is,
+        except for an unterminated last line, which holds no complete listing.
+
+        Returns:
+            int: Number of listings already committed to the file.
+        """
+        with self._lock:
+            if not os.path.exists(self.path):
+                self.count = 0
+                self.offset = 0
+                self._tail = b""
+                return 0
+
+            size = os.path.getsize(self.path)
+            checkpoint = self._read_checkpoint()
+            if checkpoint is not None and self._matches(checkpoint, size):
+                self.count, self.offset = checkpoint["count"], checkpoint["offset"]
+                if size > self.offset:
+                    with open(self.path, "r+b") as f:
+                        f.truncate(self.offset)
+            else:
+                if checkpoint is not None:
+                    print(f"⚠️ {self.checkpoint_path} does not match {self.path}; keeping the file and discarding the checkpoint.")
+                self.count, self.offset = self._scan()
+                if self.offset < size:
+                    with open(self.path, "r+b") as f:
+                        f.seek(self.offset)
+                        if b"\n" not in f.read():
+                            f.truncate(self.offset)  # A single unterminated line: a crashed write, not a listing
+                        else:
+                            print(f"⚠️ {self.path} has {size - self.offset} byte(s) after its last valid listing; keeping them.")
+                            f.seek(size - 1)
+                            if f.read(1) != b"\n":
+                                f.write(b"\n")  # New listings start on their own line
+                                size += 1
+                            self.offset = size
+
+            with open(self.path, "rb") as f:
+                f.seek(max(0, self.offset - _FINGERPRINT_BYTES))
+                self._tail = f.read(self.offset - f.tell())
+            self._write_checkpoint()
+            return self.count
+
+    def finish(self):
+        """
+        Removes the checkpoint once a run completed: the file no longer holds a partial batch.
+        """
+        with self._lock:
+            for path in (self.checkpoint_path, f"{self.checkpoint_path}.tmp"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def append(self, listings):
+        """
+        Durably appends a batch of listings.
+
+        Args:
+            listings (list): Listings to append.
+        """
+        if not listings:
+            return
+
+        data = "".join(json.dumps(listing) + "\n" for listing in listings).encode("utf-8")
+        with self._lock:
+            self._write_checkpoint(pending=self.offset + len(data))
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.count += len(listings)
+            self.offset += len(data)
+            self._tail = (self._tail + data)[-_FINGERPRINT_BYTES:]
+            self._write_checkpoint()
+
+    def _scan(self):
+        """
+        Counts the complete, valid lines at the start of the file.
+
+        Returns:
+            tuple: (listing count, byte offset just after the last valid line).
+        """
+        count = offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if line.strip():
+                    try:
+                        json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    count += 1
+                offset += len(line)
+        return count, offset
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                checkpoint = json.load(f)
+            return checkpoint if {"count", "offset", "fingerprint"} <= checkpoint.keys() else None
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            return None
+
+    def _matches(self, checkpoint, size):
+        """
+        Checks that the file still starts with the data the checkpoint committed and that
+        anything after it can only be the batch that was being written.
+        """
+        offset = checkpoint["offset"]
+        pending = checkpoint.get("pending")
+        if size < offset or (size > offset and (pending is None or size > pending)):
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(max(0, offset - _FINGERPRINT_BYTES))
+            return hashlib.sha256(f.read(offset - f.tell())).hexdigest() == checkpoint["fingerprint"]
+
+    def _write_checkpoint(self, pending=None):
+        """
+        Atomically replaces the checkpoint file.
+
+        Args:
+            pending (int, optional): Offset the batch about to be written will end at.
+        """
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "count": self.count,
+                "offset": self.offset,
+                "pending": pending,
+                "fingerprint": hashlib.sha256(self._tail).hexdigest()
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
@@ -8,12 +8,16 @@ import time
 import re
 import uuid
 import os
-import torch
 import random
-from openai import OpenAI
-from PIL import Image
-from diffusers import AutoPipelineForText2Image
-from config_loader import load_config_value
+import threading
+from config_loader import get_settings
+from openai_clients import get_openai_client
+from listing_store import JsonlListingWriter, iter_listings
+from dedup import NearDuplicateIndex, savings_report
+from image_derivatives import DerivativeManifest, create_derivatives
+
+# Terms the image should avoid, shared by every prompt in a batch
+NEGATIVE_PROMPT = ", ".join(["overexposed", "underexposed", "low quality", "unrealistic", "artifacts", "distortion"])
 
 # 🔹 Load city choices from file
 def load_city_choices(file_path="../Data/city_choices.txt"):
@@ -21,7 +25,7 @@ def load_city_choices(file_path="../Data/city_choices.txt"):
     try:
         with open(file_path, "r") as f:
             for line in f:
-                city, state = line.strip().split(", ")
+                city, state = line.strip().rstrip(",").split(", ")
                 city_list.append({"city": city, "state": state})
     except Exception as e:
         print(f"❌ Error loading city choices: {e}")
@@ -30,19 +34,46 @@ def load_city_choices(file_path="../Data/city_choices.txt"):
 class ListingsGenerator:
     """Generates real estate listings using OpenAI's LLM and realistic images using Stable Diffusion."""
 
-    def __init__(self, total_listings=10, batch_size=5, output_file="../Data/listings.json"):
+    def __init__(self, total_listings=10, batch_size=5, output_file="../Data/listings.jsonl",
+                 image_dir="../Data/Images", batch_images=True, client=None,
+                 max_in_flight=1, requests_per_second=1.0, resume=False, pipeline=None,
+                 dedup_threshold=0.7, dedup_rounds=2, city_choices_path="../Data/city_choices.txt"):
         """
         Initializes the listing generator with OpenAI API settings.
 
         Args:
             total_listings (int): Total number of listings to generate.
             batch_size (int): Number of listings per API request.
-            output_file (str): Path to store generated listings.
+            output_file (str): Path of the JSON Lines file storing generated listings.
+            image_dir (str): Directory where generated images are saved.
+            batch_images (bool): Render all images of a batch in one pipeline call.
+            client (OpenAI, optional): Chat completions client; the shared Vocareum client if omitted.
+            max_in_flight (int): LLM requests kept in flight; above 1 generation runs concurrently.
+            requests_per_second (float): Sustained LLM request rate for the concurrent pipeline.
+            resume (bool): Keep the listings already in `output_file` and only generate the remainder.
+            pipeline (ImagePipelineHolder, optional): Image pipeline holder; the process-wide one if omitted.
+            dedup_threshold (float): Listings whose description is this similar (estimated Jaccard of word
+                shingles) to an earlier one are dropped before rendering; 0 disables the check.
+            dedup_rounds (int): Extra request rounds replacing the listings dropped as duplicates.
+            city_choices_path (str): File of "City, State" lines the listings are placed in.
         """
         self.total_listings = total_listings
         self.batch_size = batch_size
         self.output_file = output_file
-        self.city_choices = load_city_choices()
+        self.image_dir = image_dir
+        self.batch_images = batch_images
+        self.derivatives = DerivativeManifest(os.path.join(image_dir, "derivatives"))
+        self.client = client
+        self.image_pipeline = pipeline or image_pipeline
+        self.max_in_flight = max_in_flight
+        self.requests_per_second = requests_per_second
+        self.resume = resume
+        self.writer = JsonlListingWriter(output_file)
+        self.city_choices = load_city_choices(city_choices_path)
+        self.dedup = NearDuplicateIndex(threshold=dedup_threshold) if dedup_threshold else None
+        self.dedup_rounds = dedup_rounds
+        self.rejected = []  # Listings dropped as near duplicates
+        self._rejected_lock = threading.Lock()
 
     @staticmethod
     def clean_json_output(response_text):
@@ -64,6 +95,27 @@ class ListingsGenerator:
         Returns:
             list: A list of generated property listings (dictionaries).
         """
+        try:
+            listings = self.request_listings()
+            return self.render_images(listings)  # Generate & store image paths
+
+        except Exception as e:
+            print(f"❌ Error generating batch: {e}")
+            return []
+
+    def request_listings(self, client=None):
+        """
+        Requests one batch of listings from the LLM, without images.
+
+        API errors (e.g. rate limits) are raised so callers can retry; malformed
+        responses yield an empty list.
+
+        Args:
+            client (OpenAI, optional): Client for this request; `self.client` (or the shared one) if omitted.
+
+        Returns:
+            list: Parsed listings, each with a unique "id".
+        """
 
         city_data = random.choice(self.city_choices) if self.city_choices else {"city": "Unknown", "state": "Unknown"}
 
@@ -100,75 +152,172 @@ class ListingsGenerator:
         where "listings" is a list of dictionary objects.
         """
 
-        client = OpenAI(
-            base_url="https://openai.vocareum.com/v1",
-            api_key=load_config_value("VOCAREUM_OPENAI_API_KEY")
+        client = client or self.client or get_openai_client()  # Shared, connection-pooled client
+
+        response = client.chat.completions.create(
+            model=get_settings().chat_model,
+            messages=[
+                {"role": "system", "content": "You are an experienced real estate agent."},
+                {"role": "user", "content": listings_prompt}
+            ],
+            temperature=0.8
         )
 
+        raw_output = response.choices[0].message.content
+        clean_output = self.clean_json_output(raw_output)  # Remove Markdown JSON wrapping
+
+        # print("🔍 Raw OpenAI Output:\n", clean_output)  # Debugging
+
+        # Try parsing JSON safely
         try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an experienced real estate agent."},
-                    {"role": "user", "content": listings_prompt}
-                ],
-                temperature=0.8
-            )
-
-            raw_output = response.choices[0].message.content
-            clean_output = self.clean_json_output(raw_output)  # Remove Markdown JSON wrapping
-            
-            # print("🔍 Raw OpenAI Output:\n", clean_output)  # Debugging
-
-            # Try parsing JSON safely
-            try:
-                listings_json = json.loads(clean_output)
-                # print("✅ Parsed JSON Structure:", listings_json)  # Debugging
-                
-                if "listings" not in listings_json or not isinstance(listings_json["listings"], list):
-                    raise ValueError("❌ 'listings' key missing or not a list in OpenAI response.")
-
-                listings = listings_json["listings"]
-
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON Decoding Error: {e}")
-                return []
-            except Exception as e:
-                print(f"❌ Unexpected Error in JSON parsing: {e}")
-                return []
-
-            # 🔹 Assign a unique ID and generate an image for each listing
-            for listing in listings:
-                listing["id"] = str(uuid.uuid4())
-                listing["image_path"] = self.generate_image(listing)  # Generate & store image path
+            listings_json = json.loads(clean_output)
+            # print("✅ Parsed JSON Structure:", listings_json)  # Debugging
 
-            return listings
+            if "listings" not in listings_json or not isinstance(listings_json["listings"], list):
+                raise ValueError("❌ 'listings' key missing or not a list in OpenAI response.")
+
+            listings = listings_json["listings"]
 
+        except json.JSONDecodeError as e:
+            print(f"❌ JSON Decoding Error: {e}")
+            return []
         except Exception as e:
-            print(f"❌ Error generating batch: {e}")
+            print(f"❌ Unexpected Error in JSON parsing: {e}")
             return []
-    
+
+        # 🔹 Assign a unique ID to each listing
+        for listing in listings:
+            listing["id"] = str(uuid.uuid4())
+
+        return self.drop_duplicates(listings)
+
+    def drop_duplicates(self, listings):
+        """
+        Drops listings whose description nearly repeats an earlier one, before any image or embedding is paid for.
+
+        Args:
+            listings (list): Listings with an "id".
+
+        Returns:
+            list: The listings that are not near duplicates (now part of the index).
+        """
+        if self.dedup is None:
+            return listings
+        unique = []
+        for listing in listings:
+            match = self.dedup.check_and_add(listing["id"], listing.get("Description", ""))
+            if match is None:
+                unique.append(listing)
+                continue
+            with self._rejected_lock:
+                self.rejected.append(listing)
+            print(f"♻️ Dropped near-duplicate listing in {listing.get('City', 'Unknown City')} "
+                  f"(similarity {match[1]:.2f} with {match[0]})")
+        return unique
+
     def generate_listings(self):
         """
-        Generates all real estate listings in batches and saves them to a file.
+        Generates all real estate listings in batches, appending each batch to the output file.
+
+        In resume mode only the listings missing from the output file are generated.
+        """
+        existing = self.writer.recover() if self.resume else 0
+        if not self.resume:
+            self.writer.reset()
+        if self.dedup is not None and existing:
+            for listing in iter_listings(self.output_file):
+                self.dedup.add(listing["id"], listing.get("Description", ""))
+
+        remaining = max(0, self.total_listings - existing)
+        if existing:
+            print(f"🔁 Resuming: {existing} listings already saved, generating {remaining} more.")
+
+        # Later rounds only replace the listings dropped as duplicates
+        for round_ in range(1 + (self.dedup_rounds if self.dedup is not None else 0)):
+            rejected_before = len(self.rejected)
+            remaining = max(0, self.total_listings - self.writer.count)
+            if not remaining:
+                break
+            self.run_batches(-(-remaining // self.batch_size))  # Round up so the total is reached
+            if len(self.rejected) == rejected_before:
+                break
+
+        self.writer.finish()
+        print(f"✅ Successfully generated {self.writer.count - existing} listings ({self.writer.count} total) and saved to {self.output_file}")
+        self.print_timing_report()
+        self.print_dedup_report()
+
+    def run_batches(self, n_batches):
+        """
+        Requests, renders and saves `n_batches` batches, concurrently if `max_in_flight` is above 1.
         """
-        all_listings = []
+        if self.max_in_flight > 1:
+            from generation_pipeline import ConcurrentListingsPipeline
+
+            ConcurrentListingsPipeline(
+                self,
+                max_in_flight=self.max_in_flight,
+                requests_per_second=self.requests_per_second
+            ).run(n_batches)
+        else:
+            for _ in range(n_batches):
+                batch = self.generate_batch()
+                if batch:
+                    self.save_listings(batch)
+
+                time.sleep(1)  # Prevent rate limit issues
+
+    def save_listings(self, listings):
+        """
+        Appends a batch of listings to the output file (fsynced and checkpointed).
 
-        for _ in range(self.total_listings // self.batch_size):
-            batch = self.generate_batch()
-            if batch:
-                all_listings.extend(batch)
+        Args:
+            listings (list): Listings of one batch.
+        """
+        try:
+            self.writer.append(listings)
+        except IOError as e:
+            print(f"❌ Error saving listings to file: {e}")
 
-                # Save listings to file
-                try:
-                    with open(self.output_file, "w") as f:
-                        json.dump(all_listings, f, indent=4)
-                except IOError as e:
-                    print(f"❌ Error saving listings to file: {e}")
+    @staticmethod
+    def build_image_prompt(listing):
+        """
+        Builds the Stable Diffusion prompt for a listing.
+
+        Args:
+            listing (dict): Dictionary containing details about the house.
 
-            time.sleep(1)  # Prevent rate limit issues
+        Returns:
+            str: Text prompt describing the house exterior.
+        """
+        return (
+            f"A {listing.get('Property Type', 'house')} in "
+            f"{listing.get('Neighborhood', 'a neighborhood')}, {listing.get('City', 'a city')}, {listing.get('State', 'a state')}. "
+            f"It has {listing.get('Bedrooms', 'an unknown number of')} bedrooms, "
+            f"{listing.get('Bathrooms', 'an unknown number of')} bathrooms, and is "
+            f"{listing.get('House Size', 'unknown')} sqft. "
+            f"The house features a {random.choice(['red brick', 'white stucco', 'blue wooden', 'gray stone', 'tan adobe'])} exterior, "
+            f"a {random.choice(['spacious front yard', 'lush garden', 'swimming pool', 'rooftop terrace', 'wraparound porch', 'spacious basement'])}."
+        )
 
-        print(f"✅ Successfully generated {len(all_listings)} listings and saved to {self.output_file}")
+    def render_images(self, listings):
+        """
+        Generates images for a list of listings, batched or one by one depending on `batch_images`.
+
+        Args:
+            listings (list): Listings that already have an "id".
+
+        Returns:
+            list: The same listings with "image_path" filled in.
+        """
+        if self.batch_images:
+            image_paths = self.generate_images(listings)
+        else:
+            image_paths = [self.generate_image(listing) for listing in listings]
+
+        for listing, image_path in zip(listings, image_paths):
+            listing["image_path"] = image_path
+        return listings
 
     def generate_image(self, listing):
         """
@@ -180,54 +329,207 @@ class ListingsGenerator:
         Returns:
             str: Path to the saved generated image, or None if an error occurs.
         """
+        return self.generate_images([listing])[0]
+
+    def generate_images(self, listings):
+        """
+        Generates the images for several listings in a single pipeline call.
+
+        Each listing gets its own seed, stored as "image_seed" together with the
+        prompt ("image_prompt") so every image can be reproduced later.
+
+        Args:
+            listings (list): Listings that already have an "id".
+
+        Returns:
+            list: Paths to the saved images (None for listings whose image failed).
+        """
+        if not listings:
+            return []
+
         try:
-            # Select device: prioritize CUDA if available, otherwise use MPS (Mac) or CPU
-            device = "cuda" if torch.cuda.is_available() else "mps" if torch.backends.mps.is_available() else "cpu"
-
-            # Load the Stable Diffusion pipeline
-            pipe = AutoPipelineForText2Image.from_pretrained(
-                "stabilityai/sdxl-turbo",
-                torch_dtype=torch.float16,
-                variant="fp16"
-            ).to(device)
-
-            # Construct a safe prompt from the listing details
-            prompt = (
-                f"A {listing.get('Property Type', 'house')} in "
-                f"{listing.get('Neighborhood', 'a neighborhood')}, {listing.get('City', 'a city')}, {listing.get('State', 'a state')}. "
-                f"It has {listing.get('Bedrooms', 'an unknown number of')} bedrooms, "
-                f"{listing.get('Bathrooms', 'an unknown number of')} bathrooms, and is "
-                f"{listing.get('House Size', 'unknown')} sqft. "
-                f"The house features a {random.choice(['red brick', 'white stucco', 'blue wooden', 'gray stone', 'tan adobe'])} exterior, "
-                f"a {random.choice(['spacious front yard', 'lush garden', 'swimming pool', 'rooftop terrace', 'wraparound porch', 'spacious basement'])}."
-                )
-
-            # Use a unique random seed for each image.
-            # This ensures each house image is unique but still reproducible if needed.
-            random_seed = random.randint(1, 1_000_000)  
-            torch.manual_seed(random_seed)  # Different seed for each listing
-
-            # Generate the image
-            print(f"🖼️ Generating image for listing in {listing.get('City', 'Unknown City')}...")
-            image = pipe(
-                prompt=prompt,
+            pipe = self.image_pipeline.get()
+
+            prompts = []
+            generators = []
+            for listing in listings:
+                # Use a unique random seed for each image.
+                # This ensures each house image is unique but still reproducible if needed.
+                listing["image_seed"] = random.randint(1, 1_000_000)
+                listing["image_prompt"] = self.build_image_prompt(listing)
+                prompts.append(listing["image_prompt"])
+                generators.append(self.image_pipeline.make_generator(listing["image_seed"]))
+
+            # Generate the images
+            print(f"🖼️ Generating {len(listings)} image(s) for listings in {', '.join(l.get('City', 'Unknown City') for l in listings)}...")
+            start = time.perf_counter()
+            images = pipe(
+                prompt=prompts,
                 num_inference_steps=1,
                 guidance_scale=1.0,
-                negative_prompt=["overexposed", "underexposed", "low quality", "unrealistic", "artifacts", "distortion"]
-            ).images[0]
+                negative_prompt=[NEGATIVE_PROMPT] * len(prompts),
+                generator=generators
+            ).images
+            self.image_pipeline.record_render(time.perf_counter() - start, len(images))
 
             # Ensure output directory exists
-            image_dir = "../Data/Images"
-            os.makedirs(image_dir, exist_ok=True)
+            os.makedirs(self.image_dir, exist_ok=True)
 
-            # Save the image with the listing's unique ID
-            image_path = os.path.join(image_dir, f"{listing.get('id', 'unknown')}.png")
-            image.save(image_path)
+            image_paths = []
+            for listing, image in zip(listings, images):
+                # Save the image with the listing's unique ID
+                image_path = os.path.join(self.image_dir, f"{listing.get('id', 'unknown')}.png")
+                image.save(image_path)
+                print(f"✅ Image saved: {image_path}")
+                # Thumbnail + WebP served by the gallery, encoded from the in-memory image
+                create_derivatives(image_path, self.derivatives, image)
+                image_paths.append(image_path)
 
-            print(f"✅ Image saved: {image_path}")
-            return image_path
+            return image_paths
 
         except Exception as e:
-            print(f"❌ Error generating image: {e}")
-            return None
+            print(f"❌ Error generating images: {e}")
+            return [None] * len(listings)
+
+    def dedup_report(self):
+        """
+        Summarizes the near-duplicate check of this run.
+
+        Returns:
+            dict: Index stats plus the image renders, embeddings and time the dropped listings did not cost
+            (see `dedup.savings_report`).
+        """
+        seconds_per_image = self.image_pipeline.timing_report()["seconds_per_image"] or None
+        return {**(self.dedup.stats() if self.dedup else {}), **savings_report(self.rejected, seconds_per_image)}
+
+    def print_dedup_report(self):
+        """
+        Prints how much rendering and embedding work the near-duplicate check saved.
+        """
+        if not self.rejected:
+            return
+        report = self.dedup_report()
+        rendering = f", ~{report['render_seconds_avoided']:.1f}s of rendering" if report["render_seconds_avoided"] else ""
+        print(
+            f"♻️ Dedup: {report['duplicates']} near-duplicate(s) dropped out of {report['checked']} checked, "
+            f"saving {report['images_avoided']} image render(s){rendering} and {report['embeddings_avoided']} "
+            f"embedding(s) (~{report['embedding_tokens_avoided']} tokens)"
+        )
+
+    def print_timing_report(self):
+        """
+        Prints how the image generation time splits between the one-time pipeline load and rendering.
+        """
+        report = self.image_pipeline.timing_report()
+        if not report["images_rendered"]:
+            return
+        print(
+            f"⏱️ Image timing: pipeline load {report['load_seconds']:.1f}s (once), "
+            f"{report['images_rendered']} image(s) in {report['render_seconds']:.1f}s "
+            f"({report['seconds_per_image']:.2f}s per image)"
+        )
+
 
+class ImagePipelineHolder:
+    """Process-wide holder that loads the Stable Diffusion pipeline lazily, exactly once."""
+
+    def __init__(self, model_name=None, pipe=None, generator_factory=None):
+        """
+        Args:
+            model_name (str, optional): Hugging Face model id of the text-to-image pipeline;
+                the configured `image_model` when the pipeline is loaded if omitted.
+            pipe (callable, optional): Ready pipeline used instead of loading `model_name`
+                (e.g. `fakes.FakeImagePipeline` for offline benchmarks).
+            generator_factory (callable, optional): Builds the random generator of one image from its seed,
+                for pipelines that do not take a `torch.Generator`; seeded torch generators if omitted.
+        """
+        self.model_name = model_name
+        self.device = None
+        self.load_seconds = 0.0
+        self.render_seconds = 0.0
+        self.images_rendered = 0
+        self._pipe = pipe
+        self.generator_factory = generator_factory
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns the shared pipeline, loading the weights on first use.
+
+        Returns:
+            AutoPipelineForText2Image: The loaded pipeline, already moved to the best device.
+        """
+        if self._pipe is None:
+            with self._lock:
+                if self._pipe is None:
+                    start = time.perf_counter()
+                    self.model_name = self.model_name or get_settings().image_model
+                    # Heavy imports (seconds) are deferred until an image is actually needed
+                    import torch
+                    from diffusers import AutoPipelineForText2Image
+
+                    # Select device: prioritize CUDA if available, otherwise use MPS (Mac) or CPU
+                    device = "cuda" if torch.cuda.is_available() else "mps" if torch.backends.mps.is_available() else "cpu"
+
+                    # Load the Stable Diffusion pipeline
+                    pipe = AutoPipelineForText2Image.from_pretrained(
+                        self.model_name,
+                        torch_dtype=torch.float16,
+                        variant="fp16"
+                    ).to(device)
+
+                    self.device = device
+                    self.load_seconds = time.perf_counter() - start
+                    self._pipe = pipe
+                    print(f"✅ Loaded {self.model_name} on {device} in {self.load_seconds:.1f}s")
+        return self._pipe
+
+    def make_generator(self, seed):
+        """
+        Creates a seeded torch generator for one image.
+
+        Args:
+            seed (int): Seed recorded in the listing.
+
+        Returns:
+            torch.Generator: Generator seeded with `seed`, or whatever `generator_factory` builds from it.
+        """
+        if self.generator_factory is not None:
+            return self.generator_factory(seed)
+
+        import torch
+
+        # MPS generators are not reliably reproducible, so seed on the CPU there.
+        generator_device = "cpu" if self.device in (None, "mps") else self.device
+        return torch.Generator(device=generator_device).manual_seed(seed)
+
+    def record_render(self, seconds, n_images):
+        """
+        Records the wall time spent rendering a batch of images.
+
+        Args:
+            seconds (float): Duration of the pipeline call.
+            n_images (int): Number of images produced by the call.
+        """
+        self.render_seconds += seconds
+        self.images_rendered += n_images
+
+    def timing_report(self):
+        """
+        Summarizes load time versus per-image render time.
+
+        Returns:
+            dict: Load seconds, render seconds, image count, and seconds per image.
+        """
+        return {
+            "model": self.model_name,
+            "device": self.device,
+            "load_seconds": self.load_seconds,
+            "render_seconds": self.render_seconds,
+            "images_rendered": self.images_rendered,
+            "seconds_per_image": self.render_seconds / self.images_rendered if self.images_rendered else 0.0
+        }
+
+
+# Shared by every ListingsGenerator in the process
+image_pipeline = ImagePipelineHolder()
@@ -0,0 +1,159 @@
+"""
+Module: llm_cache
+Description: Persistent, content-addressed SQLite cache of LLM responses with size-based LRU eviction.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def estimate_tokens(text):
+    """
+    Roughly estimates the number of tokens in a text (about 4 characters per token).
+
+    Args:
+        text (str): Text sent to or received from the LLM.
+
+    Returns:
+        int: Estimated token count.
+    """
+    return max(1, len(text or "") // 4)
+
+
+class LlmResponseCache:
+    """
+    Caches LLM responses under a hash of (prompt template version, model, temperature, input).
+
+    A single instance can be shared by every Gradio worker thread. When the stored
+    responses exceed `max_bytes`, the least recently used ones are evicted.
+    """
+
+    def __init__(self, cache_path="../Data/llm_cache.sqlite3", max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            cache_path (str): SQLite file holding the cache; ":memory:" keeps it in RAM.
+            max_bytes (int): Maximum total size of the cached responses.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(cache_path)
+        if cache_path != ":memory:" and directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        if cache_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, tokens INTEGER NOT NULL, "
+            "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(template_version, model, temperature, payload):
+        """
+        Builds the cache key of an LLM request.
+
+        Args:
+            template_version (str): Version of the prompt template; bump it whenever the prompt changes.
+            model (str): Model name.
+            temperature (float): Sampling temperature.
+            payload (str | dict | list): The input filled into the template.
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        key = json.dumps([template_version, model, temperature, payload], sort_keys=True)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached response for `key`, or None.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT response, tokens FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_tokens += row[1]
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def get_many(self, keys):
+        """
+        Returns the cached responses for several keys at once.
+
+        Args:
+            keys (list): Cache keys.
+
+        Returns:
+            dict: Key to response for every cached key.
+        """
+        return {key: response for key in keys if (response := self.get(key)) is not None}
+
+    def set(self, key, response, tokens=None):
+        """
+        Stores a response, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (str): Key built with `make_key`.
+            response (str): LLM response.
+            tokens (int, optional): Tokens the request cost, credited as saved on every hit; estimated if omitted.
+        """
+        size = len(response.encode("utf-8"))
+        tokens = tokens if tokens is not None else estimate_tokens(response)
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, tokens, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, response, tokens, size, time.time())
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """
+        Deletes least recently used entries until the cache fits in `max_bytes` (caller holds the lock).
+        """
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_used LIMIT 64").fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    return
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+
+    def stats(self):
+        """
+        Reports cache effectiveness.
+
+        Returns:
+            dict: Hits, misses, hit rate, tokens saved by hits, number of entries and their total size.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "saved_tokens": self.saved_tokens,
+                "entries": entries,
+                "bytes": self._total_bytes
+            }
@@ -1,29 +1,106 @@
+import time
+
+_START = time.perf_counter()  # Measured before the imports below, for the startup profile
+
+import argparse
+import atexit
 import os
-import gradio as gr
-from listings_generator import ListingsGenerator
 from vector_database import VectorDatabase
 from gradio_ui import create_gradio_interface
+from inventory_updater import InventoryUpdater, SnapshotHolder, current_snapshot_paths
+from answer_augmentation import LlmAugmentation
+from config_loader import get_settings
+from llm_cache import LlmResponseCache
+from semantic_cache import SemanticCache
+from startup_profile import StartupProfiler, print_importtime_breakdown
+from tracing import tracer
 
+_IMPORT_SECONDS = time.perf_counter() - _START
 
 
-"""Generates listings, populates the vector DB, and simulates user input."""
-    
-vector_db = VectorDatabase()
-    
-# Generate Listings if Not Present and Upload to Vector Database
-if not os.path.exists("../Data/listings.json"):
-    print("📝 Listings file not found. Generating real estate listings...")
-    generator = ListingsGenerator(total_listings=300, batch_size=5)
-    generator.generate_listings()
+def main():
+    """Generates listings, populates the vector DB, and launches the Gradio UI."""
+    parser = argparse.ArgumentParser(description="Run the HomeMatch app.")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print startup phase timings and an import-time breakdown, then exit")
+    args = parser.parse_args()
 
-    print("\n📥 Loading listings into ChromaDB...")
-    real_estate_db = VectorDatabase()
-    real_estate_db.store_listings()
-else:
-    print("✅ Listings file found. Skipping generation and storing.")
+    profiler = StartupProfiler(enabled=args.profile_startup, start=_START)
+    profiler.record("imports (gradio, langchain, ...)", _IMPORT_SECONDS)
+    settings = get_settings()
 
-if __name__ == "__main__":
-    demo = create_gradio_interface(vector_db)
+    tracer.enabled = settings.tracing_enabled
+    if tracer.enabled and settings.metrics_port:
+        tracer.serve(settings.metrics_port)
+    if tracer.enabled and settings.metrics_json_path:
+        atexit.register(tracer.export_json, settings.metrics_json_path)
+
+    # Generate Listings if Not Present
+    with profiler.phase("listings check / generation"):
+        if not os.path.exists(settings.listings_path):
+            print("📝 Listings file not found. Generating real estate listings...")
+            # Imported only here: the generation stack pulls in torch and diffusers
+            from listings_generator import ListingsGenerator
+
+            generator = ListingsGenerator(
+                total_listings=settings.total_listings,
+                batch_size=settings.listings_batch_size,
+                output_file=settings.listings_path,
+                image_dir=settings.images_dir,
+                city_choices_path=settings.city_choices_path,
+                max_in_flight=settings.max_in_flight,
+                requests_per_second=settings.requests_per_second,
+                dedup_threshold=settings.dedup_threshold,
+                resume=True
+            )
+            generator.generate_listings()
+        else:
+            print("✅ Listings file found. Skipping generation.")
+
+    # Sync listings into the vector database (incremental: only new or changed listings are embedded)
+    print(f"\n📥 Syncing listings into the {settings.vector_backend} vector store...")
+    with profiler.phase("VectorDatabase()"):
+        # Reopen the snapshot the inventory updater last swapped in, if any, so its updates survive a restart
+        snapshot = current_snapshot_paths(settings.snapshot_dir)
+        vector_db = VectorDatabase.from_settings(settings, *snapshot) if snapshot else VectorDatabase.from_settings(settings)
+    with profiler.phase("LLM cache and augmentation"):
+        llm_cache = LlmResponseCache(settings.llm_cache_path, max_bytes=settings.llm_cache_max_bytes)
+        llm_augm = LlmAugmentation(cache=llm_cache)
+    with profiler.phase("store_listings()"):
+        # Optionally rewrite every listing description ahead of time so searches are served from the LLM cache
+        if settings.precompute_augmentations:
+            vector_db.store_listings(augmenter=llm_augm)
+        elif vector_db.listings_changed():
+            vector_db.store_listings()
+        else:
+            # Unchanged since the last complete sync: skip reading the listings file and the full store scan
+            print("✅ Listings file unchanged since the last sync. Skipping it.")
+
+    with profiler.phase("create_gradio_interface()"):
+        semantic_cache = SemanticCache(
+            threshold=settings.semantic_cache_threshold,
+            max_entries=settings.semantic_cache_size,
+            ttl_seconds=settings.semantic_cache_ttl
+        ) if settings.semantic_cache_size else None
+        # New listings appended while running are indexed into a fresh snapshot and swapped in
+        snapshots = SnapshotHolder(vector_db)
+        if settings.inventory_watch_interval > 0 and not args.profile_startup:
+            updater = InventoryUpdater(
+                snapshots, lambda db_path, lexical_index_path: VectorDatabase.from_settings(settings, db_path, lexical_index_path),
+                snapshot_root=settings.snapshot_dir, interval=settings.inventory_watch_interval
+            )
+            updater.start()
+        demo = create_gradio_interface(snapshots, llm_augm=llm_augm, llm_cache=llm_cache, semantic_cache=semantic_cache)
     if demo is None:
         raise ValueError("❌ create_gradio_interface() did not return a valid Gradio Blocks object.")
-    demo.queue().launch(share=True, allowed_paths=["/Users/francescascipioni/Library/Mobile Documents/com~apple~CloudDocs/Work/Online courses/Nanodegrees/Generative AI Nanodegree/05 - Final Project/HomeMatch/Data/Images"])
\ No newline at end of file
+
+    if args.profile_startup:
+        profiler.report()
+        print_importtime_breakdown("main")
+        return
+
+    demo.queue().launch(share=True, allowed_paths=[os.path.abspath(settings.images_dir)])
+
+
+if __name__ == "__main__":
+    main()
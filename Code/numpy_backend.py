@@ -0,0 +1,477 @@
+"""
+Module: numpy_backend
+Description: In-memory vector store holding normalized float32 embeddings in one contiguous (optionally memory-mapped) matrix,
+             optionally searched through compact int8 or binary codes with a full-precision re-rank.
+"""
+
+import json
+import os
+import threading
+import numpy as np
+from langchain_core.documents import Document
+
+QUANTIZATIONS = (None, "int8", "binary")
+
+# Rows converted at a time when scoring or building compact codes: small enough to stay in the CPU cache
+_CHUNK_ROWS = 2048
+
+
+class NumpyVectorStore:
+    """
+    Drop-in alternative to `langchain_chroma.Chroma` for the calls made by `VectorDatabase`.
+
+    Embeddings are L2-normalized rows of a float32 matrix, so cosine similarity is a single
+    matrix-vector product; top-k uses `argpartition`. Metadata is kept column by column and
+    Chroma-style `where` filters are evaluated as boolean masks over those columns.
+
+    With `quantization`, searches first score compact codes kept in RAM (int8: 1 byte per
+    dimension plus a scale per row; binary: 1 bit per dimension, the signs of the rows minus
+    their mean so that directions shared by every listing do not fill the bits) and re-rank the best
+    `k * rerank_factor` candidates with the float32 rows, which are then memory-mapped from disk.
+    """
+
+    def __init__(self, embedding_function, persist_directory=None, mmap=False, quantization=None, rerank_factor=4):
+        """
+        Args:
+            embedding_function (Embeddings): Model used to embed added documents.
+            persist_directory (str, optional): Directory for `persist`/load; None keeps the store in memory only.
+            mmap (bool): Memory-map the persisted matrix instead of reading it into RAM (always on with `quantization`).
+            quantization (str, optional): None, "int8" or "binary" compact codes for the first search pass.
+            rerank_factor (int): Candidates re-ranked with full precision per requested result.
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self.mmap = mmap or quantization is not None
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self._codes = None   # Compact codes of the first `_size` rows, rebuilt lazily after writes
+        self._scales = None  # Per-row int8 scales
+        self._center = None  # Mean row, subtracted before taking binary signs
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._ids = []
+        self._row_of = {}
+        self._documents = []
+        self._columns = {}
+        self._column_arrays = {}
+        self._lock = threading.RLock()
+
+        if persist_directory and os.path.exists(os.path.join(persist_directory, "index.json")):
+            self._load()
+
+    # ------------------------------------------------------------------ writes
+
+    def add_documents(self, documents, ids=None):
+        """
+        Embeds and upserts documents.
+
+        Args:
+            documents (list): Documents to store.
+            ids (list, optional): Ids of the documents; defaults to `metadata["id"]`.
+
+        Returns:
+            list: The ids of the stored documents.
+        """
+        if not documents:
+            return []
+        ids = list(ids) if ids is not None else [doc.metadata["id"] for doc in documents]
+        vectors = self._normalize(np.asarray(
+            self.embedding_function.embed_documents([doc.page_content for doc in documents]), dtype=np.float32
+        ))
+
+        with self._lock:
+            self._ensure_writable(len(documents), vectors.shape[1])
+            for doc_id, doc, vector in zip(ids, documents, vectors):
+                row = self._row_of.get(doc_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._row_of[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._documents.append(doc.page_content)
+                    for column in self._columns.values():
+                        column.append(None)
+                else:
+                    self._documents[row] = doc.page_content
+                    for column in self._columns.values():
+                        column[row] = None
+
+                self._matrix[row] = vector
+                for key, value in doc.metadata.items():
+                    if key not in self._columns:
+                        self._columns[key] = [None] * self._size
+                    self._columns[key][row] = value
+            self._column_arrays.clear()
+            self._codes = self._scales = self._center = None
+        return ids
+
+    def delete(self, ids=None):
+        """
+        Deletes documents by id, compacting the matrix.
+
+        Args:
+            ids (list): Ids to delete; unknown ids are ignored.
+        """
+        with self._lock:
+            doomed = {self._row_of[doc_id] for doc_id in ids or [] if doc_id in self._row_of}
+            if not doomed:
+                return
+            keep = [row for row in range(self._size) if row not in doomed]
+            self._matrix = np.ascontiguousarray(self._matrix[keep])
+            self._size = len(keep)
+            self._ids = [self._ids[row] for row in keep]
+            self._documents = [self._documents[row] for row in keep]
+            self._columns = {key: [column[row] for row in keep] for key, column in self._columns.items()}
+            self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._column_arrays.clear()
+            self._codes = self._scales = self._center = None
+
+    def persist(self):
+        """
+        Writes the matrix (`embeddings.npy`), ids/texts/metadata columns (`index.json`) and, with
+        quantization, the compact codes (`codes_<quantization>.npz`) atomically.
+        """
+        if not self.persist_directory:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with self._lock:
+            matrix_path = os.path.join(self.persist_directory, "embeddings.npy")
+            index_path = os.path.join(self.persist_directory, "index.json")
+            with open(f"{matrix_path}.tmp", "wb") as f:
+                np.save(f, self._matrix[:self._size])
+            with open(f"{index_path}.tmp", "w") as f:
+                json.dump({"ids": self._ids, "documents": self._documents, "columns": self._columns}, f)
+            if self.quantization:
+                codes, scales = self._compact()
+                with open(f"{self._codes_path()}.tmp", "wb") as f:
+                    center = self._center if self._center is not None else np.zeros(0, dtype=np.float32)
+                    np.savez(f, codes=codes, scales=scales, center=center)
+                os.replace(f"{self._codes_path()}.tmp", self._codes_path())
+            os.replace(f"{matrix_path}.tmp", matrix_path)
+            os.replace(f"{index_path}.tmp", index_path)
+
+    # ------------------------------------------------------------------- reads
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None):
+        """
+        Fetches stored documents, like `Chroma.get`.
+
+        Args:
+            ids (list, optional): Only return these ids.
+            where (dict, optional): Chroma-style metadata filter.
+            include (list): Any of "documents", "metadatas", "embeddings".
+            limit (int, optional): Maximum number of results.
+
+        Returns:
+            dict: "ids" plus the requested fields, as parallel lists.
+        """
+        with self._lock:
+            if ids is None:
+                rows = np.arange(self._size)
+            else:
+                rows = np.array([self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of], dtype=np.int64)
+            if where:
+                rows = rows[self._mask(where)[rows]]
+            if limit is not None:
+                rows = rows[:limit]
+
+            result = {"ids": [self._ids[row] for row in rows]}
+            if "documents" in include:
+                result["documents"] = [self._documents[row] for row in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [self._metadata(row) for row in rows]
+            if "embeddings" in include:
+                result["embeddings"] = self._matrix[rows].tolist()
+            return result
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        """
+        Returns the k documents most similar to `embedding`.
+
+        Args:
+            embedding (list): Query embedding.
+            k (int): Number of results.
+            filter (dict, optional): Chroma-style metadata filter.
+
+        Returns:
+            list: Documents, most similar first.
+        """
+        return [doc for doc, _ in self.similarity_search_by_vector_with_scores(embedding, k=k, filter=filter)]
+
+    def similarity_search_by_vector_with_scores(self, embedding, k=4, filter=None):
+        """
+        Like `similarity_search_by_vector` but also returns the cosine similarities.
+
+        Returns:
+            list: (Document, similarity) tuples, most similar first.
+        """
+        query = self._normalize(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        with self._lock:
+            if not self._size or k <= 0:
+                return []
+            rows, scores = self._ranked_rows(query, k, self._mask(filter) if filter else None)
+            return [(self._document(row), float(score)) for row, score in zip(rows, scores)]
+
+    def similarity_search_by_vectors(self, embeddings, k=4, filters=None):
+        """
+        Searches many queries at once with a single matrix-matrix product.
+
+        Args:
+            embeddings (list): Query embeddings.
+            k (int): Number of results per query.
+            filters (list, optional): One Chroma-style filter (or None) per query.
+
+        Returns:
+            list: For each query, its Documents, most similar first.
+        """
+        queries = self._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1))
+        filters = filters or [None] * len(queries)
+        with self._lock:
+            if not self._size or k <= 0:
+                return [[] for _ in range(len(queries))]
+            if self.quantization:
+                return [
+                    [self._document(row) for row in self._ranked_rows(query, k, self._mask(where) if where else None)[0]]
+                    for query, where in zip(queries, filters)
+                ]
+            scores = queries @ self._matrix[:self._size].T
+
+            # Profiles often share a filter, so each distinct filter is evaluated once
+            masks = {}
+            for i, where in enumerate(filters):
+                if where:
+                    key = json.dumps(where, sort_keys=True)
+                    if key not in masks:
+                        masks[key] = self._mask(where)
+                    scores[i, ~masks[key]] = -np.inf
+
+            return [[self._document(row) for row in self._top_k(scores[i], k)] for i in range(len(queries))]
+
+    def memory_footprint(self):
+        """
+        Reports how many bytes the embeddings take.
+
+        Returns:
+            dict: Vector count and dimensions, the float32 matrix bytes, the compact code bytes,
+            and the bytes held in RAM (the float32 matrix is excluded while memory-mapped).
+        """
+        with self._lock:
+            dimensions = self._matrix.shape[1] if self._size else 0
+            float32_bytes = self._size * dimensions * 4
+            compact_bytes = 0
+            if self.quantization and self._size:
+                codes, scales = self._compact()
+                compact_bytes = codes.nbytes + scales.nbytes
+            return {
+                "vectors": self._size,
+                "dimensions": dimensions,
+                "quantization": self.quantization,
+                "float32_bytes": float32_bytes,
+                "compact_bytes": compact_bytes,
+                "resident_bytes": compact_bytes + (0 if isinstance(self._matrix, np.memmap) else float32_bytes)
+            }
+
+    def __len__(self):
+        return self._size
+
+    # ----------------------------------------------------------------- helpers
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @staticmethod
+    def _top_k(scores, k):
+        """
+        Indices of the k highest finite scores, best first.
+        """
+        valid = int(np.isfinite(scores).sum())
+        k = min(k, valid)
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates])][:k]
+
+    def _ranked_rows(self, query, k, mask=None):
+        """
+        Ranks the rows for one normalized query.
+
+        Without quantization every float32 row is scored. With it, the compact codes pick
+        `k * rerank_factor` candidates and only their float32 rows are read and scored.
+
+        Returns:
+            tuple: (rows, cosine similarities), best first.
+        """
+        if not self.quantization:
+            scores = self._matrix[:self._size] @ query
+            if mask is not None:
+                scores = np.where(mask, scores, -np.inf)
+            rows = self._top_k(scores, k)
+            return rows, scores[rows] if len(rows) else []
+
+        approximate = self._approximate_scores(query)
+        if mask is not None:
+            approximate = np.where(mask, approximate, -np.inf)
+        candidates = self._top_k(approximate, k * self.rerank_factor)
+        if not len(candidates):
+            return [], []
+        candidates = np.sort(candidates)  # Ascending rows read the memory-mapped matrix sequentially
+        exact = self._matrix[candidates] @ query
+        order = np.argsort(-exact)[:k]
+        return candidates[order], exact[order]
+
+    def _approximate_scores(self, query):
+        """
+        Scores every row from its compact code (higher is more similar).
+        """
+        codes, scales = self._compact()
+        if self.quantization == "binary":
+            query_bits = np.packbits(query - self._center > 0)
+            distances = np.empty(self._size, dtype=np.int32)
+            for start in range(0, self._size, _CHUNK_ROWS):
+                distances[start:start + _CHUNK_ROWS] = _popcount(codes[start:start + _CHUNK_ROWS] ^ query_bits).sum(axis=1)
+            return 1.0 - 2.0 * distances / len(query)  # Share of agreeing signs, as a similarity
+
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, _CHUNK_ROWS):
+            chunk = codes[start:start + _CHUNK_ROWS].astype(np.float32)
+            scores[start:start + _CHUNK_ROWS] = (chunk @ query) * scales[start:start + _CHUNK_ROWS]
+        return scores
+
+    def _compact(self):
+        """
+        Returns the compact codes (and int8 scales), building them from the float32 rows if needed.
+        """
+        if self._codes is None or len(self._codes) != self._size:
+            dimensions = self._matrix.shape[1]
+            if self.quantization == "binary":
+                codes = np.empty((self._size, (dimensions + 7) // 8), dtype=np.uint8)
+                scales = np.zeros(0, dtype=np.float32)
+                center = np.zeros(dimensions, dtype=np.float64)
+                for start in range(0, self._size, _CHUNK_ROWS):
+                    center += np.asarray(self._matrix[start:min(start + _CHUNK_ROWS, self._size)]).sum(axis=0)
+                self._center = (center / max(self._size, 1)).astype(np.float32)
+            else:
+                codes = np.empty((self._size, dimensions), dtype=np.int8)
+                scales = np.empty(self._size, dtype=np.float32)
+            for start in range(0, self._size, _CHUNK_ROWS):
+                rows = np.asarray(self._matrix[start:min(start + _CHUNK_ROWS, self._size)])
+                if self.quantization == "binary":
+                    codes[start:start + len(rows)] = np.packbits(rows - self._center > 0, axis=1)
+                else:
+                    row_scales = np.abs(rows).max(axis=1) / 127.0
+                    row_scales[row_scales == 0] = 1.0
+                    codes[start:start + len(rows)] = np.round(rows / row_scales[:, None]).astype(np.int8)
+                    scales[start:start + len(rows)] = row_scales
+            self._codes, self._scales = codes, scales
+        return self._codes, self._scales
+
+    def _codes_path(self):
+        return os.path.join(self.persist_directory, f"codes_{self.quantization}.npz")
+
+    def _ensure_writable(self, extra_rows, dimensions):
+        """
+        Makes sure the matrix is an in-memory array with room for `extra_rows` more rows.
+        """
+        if self._matrix.shape[1] not in (0, dimensions):
+            raise ValueError(f"Embedding dimension {dimensions} does not match the store ({self._matrix.shape[1]}).")
+        needed = self._size + extra_rows
+        if isinstance(self._matrix, np.memmap) or needed > self._matrix.shape[0] or self._matrix.shape[1] == 0:
+            capacity = max(needed, 2 * self._matrix.shape[0], 1024)
+            grown = np.zeros((capacity, dimensions), dtype=np.float32)
+            if self._size:
+                grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+
+    def _metadata(self, row):
+        return {key: column[row] for key, column in self._columns.items() if column[row] is not None}
+
+    def _document(self, row):
+        return Document(page_content=self._documents[row], metadata=self._metadata(row))
+
+    def _column_array(self, key):
+        """
+        Returns a metadata column as a NumPy array (float64 for numeric columns, object otherwise).
+        """
+        array = self._column_arrays.get(key)
+        if array is None:
+            column = self._columns.get(key, [None] * self._size)
+            values = [value for value in column if value is not None]
+            if values and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+                array = np.array([np.nan if value is None else value for value in column], dtype=np.float64)
+            else:
+                array = np.empty(self._size, dtype=object)
+                array[:] = column
+            self._column_arrays[key] = array
+        return array
+
+    def _mask(self, where):
+        """
+        Evaluates a Chroma-style `where` filter into a boolean mask over all rows.
+        """
+        if "$and" in where:
+            return np.logical_and.reduce([self._mask(clause) for clause in where["$and"]])
+        if "$or" in where:
+            return np.logical_or.reduce([self._mask(clause) for clause in where["$or"]])
+
+        mask = np.ones(self._size, dtype=bool)
+        for key, condition in where.items():
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            column = self._column_array(key)
+            for operator, value in condition.items():
+                if operator == "$eq":
+                    mask &= column == value
+                elif operator == "$ne":
+                    mask &= column != value
+                elif operator == "$in":
+                    mask &= np.logical_or.reduce([column == v for v in value]) if value else False
+                elif operator == "$nin":
+                    mask &= ~np.logical_or.reduce([column == v for v in value]) if value else True
+                elif operator in ("$gt", "$gte", "$lt", "$lte"):
+                    numeric = column if column.dtype == np.float64 else np.full(self._size, np.nan)
+                    with np.errstate(invalid="ignore"):
+                        mask &= {
+                            "$gt": numeric > value,
+                            "$gte": numeric >= value,
+                            "$lt": numeric < value,
+                            "$lte": numeric <= value
+                        }[operator]
+                else:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+        return mask
+
+    def _load(self):
+        """
+        Loads a store written by `persist`.
+        """
+        matrix_path = os.path.join(self.persist_directory, "embeddings.npy")
+        with open(os.path.join(self.persist_directory, "index.json"), "r") as f:
+            index = json.load(f)
+        self._matrix = np.load(matrix_path, mmap_mode="r" if self.mmap else None)
+        self._size = len(index["ids"])
+        self._ids = index["ids"]
+        self._documents = index["documents"]
+        self._columns = index["columns"]
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        if self.quantization and os.path.exists(self._codes_path()):
+            with np.load(self._codes_path()) as compact:
+                if len(compact["codes"]) == self._size:
+                    self._codes, self._scales = compact["codes"], compact["scales"]
+                    self._center = compact["center"] if compact["center"].size else None
+
+
+def _popcount(array):
+    """
+    Counts the set bits of every byte of a uint8 array.
+    """
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(array)
+    return _POPCOUNT_TABLE[array]
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
@@ -0,0 +1,145 @@
+"""
+Module: openai_clients
+Description: Shared, connection-pooled OpenAI clients (sync and async) used by every part of HomeMatch.
+"""
+
+import threading
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from config_loader import get_settings, load_config_value
+
+# Limits, timeouts and retries come from `config_loader.Settings` and apply to clients created afterwards:
+# - max_concurrent_requests: requests in flight per pool. Extra requests wait for a free connection
+#   (no pool timeout), so this is the concurrency cap of the whole process towards the API.
+# - request_timeout / connect_timeout: generous read timeout for long completions, short connect
+#   timeout to fail fast on network issues.
+# - max_retries: retried by the OpenAI SDK on connection errors, 408/409/429 and 5xx responses, with
+#   exponential backoff plus random jitter (honouring Retry-After headers when present).
+
+_lock = threading.RLock()  # Re-entrant: factories fetch other shared instances
+_instances = {}
+
+
+def _shared(key, factory):
+    """
+    Returns the process-wide instance stored under `key`, creating it on first use.
+    """
+    instance = _instances.get(key)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(key)
+            if instance is None:
+                instance = _instances[key] = factory()
+    return instance
+
+
+def _limits():
+    max_connections = get_settings().max_concurrent_requests
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+
+def _timeout():
+    settings = get_settings()
+    return httpx.Timeout(settings.request_timeout, connect=settings.connect_timeout, pool=None)
+
+
+def get_http_client():
+    """
+    Returns:
+        httpx.Client: Pooled keep-alive HTTP client shared by all synchronous calls.
+    """
+    return _shared("http", lambda: httpx.Client(limits=_limits(), timeout=_timeout()))
+
+
+def get_async_http_client():
+    """
+    Returns:
+        httpx.AsyncClient: Pooled keep-alive HTTP client shared by all asynchronous calls.
+    """
+    return _shared("async_http", lambda: httpx.AsyncClient(limits=_limits(), timeout=_timeout()))
+
+
+def get_api_key():
+    """
+    Returns:
+        str: The Vocareum OpenAI API key (cached by `config_loader`, so this is cheap).
+    """
+    return load_config_value("VOCAREUM_OPENAI_API_KEY")
+
+
+def get_openai_client():
+    """
+    Returns:
+        OpenAI: Shared synchronous OpenAI client.
+    """
+    return _shared("openai", lambda: OpenAI(
+        base_url=get_settings().openai_base_url,
+        api_key=get_api_key(),
+        http_client=get_http_client(),
+        timeout=_timeout(),
+        max_retries=get_settings().max_retries
+    ))
+
+
+def get_async_openai_client():
+    """
+    Returns:
+        AsyncOpenAI: Shared asynchronous OpenAI client.
+    """
+    return _shared("async_openai", lambda: AsyncOpenAI(
+        base_url=get_settings().openai_base_url,
+        api_key=get_api_key(),
+        http_client=get_async_http_client(),
+        timeout=_timeout(),
+        max_retries=get_settings().max_retries
+    ))
+
+
+def get_chat_model(model=None, temperature=0.0):
+    """
+    Returns a LangChain chat model that sends both sync (`invoke`/`stream`) and async
+    (`ainvoke`/`astream`) requests through the shared connection pools.
+
+    Args:
+        model (str, optional): Chat model name; `Settings.chat_model` if omitted.
+        temperature (float): Sampling temperature.
+
+    Returns:
+        ChatOpenAI: Shared chat model for this (model, temperature).
+    """
+    model = model or get_settings().chat_model
+    return _shared(("chat", model, temperature), lambda: ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        base_url=get_settings().openai_base_url,
+        api_key=get_api_key(),
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        timeout=_timeout(),
+        max_retries=get_settings().max_retries
+    ))
+
+
+def get_embeddings_model(model=None, dimensions=None):
+    """
+    Returns a LangChain embedding model using the shared connection pools.
+
+    Args:
+        model (str, optional): Embedding model name; `Settings.embedding_model` if omitted.
+        dimensions (int, optional): Ask the API for shortened embeddings (`text-embedding-3` models).
+
+    Returns:
+        OpenAIEmbeddings: Shared embedding model for this (model, dimensions).
+    """
+    model = model or get_settings().embedding_model
+    return _shared(("embeddings", model, dimensions), lambda: OpenAIEmbeddings(
+        model=model,
+        dimensions=dimensions,
+        base_url=get_settings().openai_base_url,
+        api_key=get_api_key(),
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        timeout=_timeout(),
+        max_retries=get_settings().max_retries
+    ))
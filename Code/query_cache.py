@@ -0,0 +1,95 @@
+"""
+Module: query_cache
+Description: Thread-safe in-memory LRU cache with per-entry time-to-live, used for query embeddings and search results.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(text):
+    """
+    Normalizes a query string so trivially different spellings share a cache entry.
+
+    Args:
+        text (str): Query text.
+
+    Returns:
+        str: Lowercased text with collapsed whitespace.
+    """
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class LRUCache:
+    """Least-recently-used cache bounded by size, whose entries expire after `ttl_seconds`."""
+
+    def __init__(self, max_size=1024, ttl_seconds=3600):
+        """
+        Args:
+            max_size (int): Maximum number of entries; 0 disables the cache.
+            ttl_seconds (float, optional): Entry lifetime; None keeps entries until evicted.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for `key`, or `default` if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Stores `value` under `key`, evicting the least recently used entries if full.
+        """
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drops every entry (hit/miss counters are kept).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Reports cache size and effectiveness.
+
+        Returns:
+            dict: Size, limit, hits, misses and hit rate.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
@@ -0,0 +1,178 @@
+"""
+Module: query_normalizer
+Description: Local, rule-based clean-up of free-text search descriptions, with a confidence score
+             deciding whether the LLM refinement is still worth a round-trip.
+"""
+
+import difflib
+import re
+
+# Frequent misspellings of real-estate vocabulary
+TYPOS = {
+    "appartment": "apartment", "apartement": "apartment", "aparment": "apartment",
+    "bedrom": "bedroom", "bedroms": "bedrooms", "bedrm": "bedroom", "bdrm": "bedroom", "bdr": "bedroom",
+    "bathrom": "bathroom", "bathroms": "bathrooms", "bathrm": "bathroom", "bth": "bathroom",
+    "balcany": "balcony", "balconey": "balcony", "basment": "basement", "basemnt": "basement",
+    "backyrd": "backyard", "bakyard": "backyard", "condoo": "condo",
+    "firplace": "fireplace", "fireplce": "fireplace", "fire place": "fireplace",
+    "garadge": "garage", "garge": "garage", "grage": "garage", "gardn": "garden", "garen": "garden",
+    "kitchn": "kitchen", "kichen": "kitchen", "kitchin": "kitchen",
+    "neighbourhood": "neighborhood", "neighbrhood": "neighborhood", "neigborhood": "neighborhood",
+    "pool side": "poolside", "pol": "pool", "poool": "pool",
+    "spacios": "spacious", "spaceous": "spacious", "sqft": "sq ft", "sq.ft": "sq ft", "sq. ft.": "sq ft",
+    "townhose": "townhouse", "town house": "townhouse", "vew": "view", "veiw": "view", "veiws": "views",
+    "walkin": "walk-in", "scool": "school", "schol": "school"
+}
+
+# Correctly spelled words rewritten to the term listings use, applied after typo correction
+SYNONYMS = {
+    "condominium": "condo", "condominiums": "condos", "wardrobe": "closet", "wardrobes": "closets"
+}
+
+# Words a search description is expected to contain; used for fuzzy correction and confidence
+VOCABULARY = {
+    "apartment", "backyard", "balcony", "basement", "bathroom", "bathrooms", "beach", "bedroom", "bedrooms",
+    "big", "bright", "cabin", "close", "closet", "condo", "cozy", "deck", "downtown", "elegant", "family",
+    "fireplace", "floor", "floors", "garage", "garden", "gym", "hardwood", "historic", "home", "house",
+    "kitchen", "large", "lake", "luxury", "modern", "mountain", "near", "neighborhood", "office", "open",
+    "park", "parking", "patio", "pet", "pets", "pool", "porch", "quiet", "renovated", "rooftop", "safe",
+    "school", "schools", "small", "spacious", "storage", "studio", "sunny", "terrace", "townhouse",
+    "transit", "updated", "view", "views", "villa", "walk-in", "waterfront", "yard"
+}
+
+# Correctly spelled words outside the vocabulary: known for confidence and never fuzzy-corrected into a vocabulary term
+COMMON_WORDS = {
+    "air", "area", "bike", "bus", "children", "city", "commute", "conditioning", "country", "dining", "distance",
+    "dog", "dogs", "energy", "family-friendly", "ft", "hiking", "kids", "laundry", "light", "living", "master",
+    "natural", "new", "ocean", "old", "public", "quick", "restaurants", "river", "room", "rooms", "rural",
+    "shopping", "shops", "solar", "space", "sq", "station", "street", "suburb", "suburban", "suite", "trails",
+    "train", "urban", "walk", "walkable", "walking", "washer", "windows", "work"
+}
+
+FILLER_WORDS = {
+    "a", "an", "and", "at", "by", "for", "from", "good", "great", "i", "in", "is", "it", "like", "looking",
+    "me", "my", "near", "nice", "no", "of", "on", "or", "some", "the", "to", "very", "w", "want", "we", "with", "would"
+}
+
+WORD_PATTERN = re.compile(r"[a-z][a-z'-]*", re.IGNORECASE)
+SEPARATOR_PATTERN = re.compile(r"\s*(?:\band\b|\bor\b|&|;)\s*", re.IGNORECASE)
+
+# Typos spanning several words or punctuation, matched as whole words only ("fire place" but not "bonfire places")
+PHRASE_TYPOS = [
+    (re.compile(rf"(?<!\w){re.escape(typo)}(?!\w)", re.IGNORECASE), typo, fix)
+    for typo, fix in TYPOS.items() if not WORD_PATTERN.fullmatch(typo)
+]
+
+
+class QueryNormalizer:
+    """
+    Cleans a description locally (typo dictionary, fuzzy vocabulary matches, synonyms, "and"/"or" to commas)
+    and scores how confident it is that the result needs no LLM refinement.
+
+    The confidence is one minus the share of content words (filler words excluded) the normalizer
+    could not place, where a fuzzy guess counts as half an unknown word. With the default threshold
+    the LLM is asked once more than 30% of the content words are uncertain, e.g. one unknown word
+    out of three.
+    """
+
+    def __init__(self, vocabulary=None, threshold=0.7, fuzzy_cutoff=0.88, max_words=30):
+        """
+        Args:
+            vocabulary (iterable, optional): Extra known words, e.g. the terms of the BM25 index.
+            threshold (float): Confidence below which the LLM refinement is requested, i.e. the LLM
+                is asked when more than `1 - threshold` of the content words are uncertain.
+            fuzzy_cutoff (float): Minimum similarity for an unknown word to be corrected to a known one
+                starting with the same letter; known English words (`COMMON_WORDS`) are never corrected.
+            max_words (int): Descriptions longer than this are considered worth condensing by the LLM.
+        """
+        self.vocabulary = VOCABULARY | {word.lower() for word in vocabulary or []}
+        self._fuzzy_targets = sorted(VOCABULARY)  # Only curated words are used as corrections
+        self.threshold = threshold
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.max_words = max_words
+
+    def normalize(self, text):
+        """
+        Normalizes a free-text description.
+
+        Args:
+            text (str): Description typed by the user.
+
+        Returns:
+            dict: "text" (normalized description, in the user's casing), "confidence" (0-1), "corrections" and "synonyms"
+            (lists of (original, replacement) pairs), "unknown" (content words that could not be
+            placed) and "needs_llm" (confidence below threshold).
+        """
+        text = re.sub(r"\s+", " ", text or "").strip()
+        if not text:
+            return {"text": "", "confidence": 1.0, "corrections": [], "synonyms": [], "unknown": 0, "needs_llm": False}
+
+        corrections = []
+
+        # Multi-word typos first, then word by word
+        for pattern, typo, fix in PHRASE_TYPOS:
+            text, count = pattern.subn(fix, text)
+            if count:
+                corrections.append((typo, fix))
+
+        synonyms = []
+        guesses = 0
+        unknown = 0
+        content_words = 0
+        words = []
+        for token in text.split(" "):
+            match = WORD_PATTERN.search(token)
+            word = match.group().lower() if match else ""
+            if not word or word in FILLER_WORDS:
+                words.append(token)
+                continue
+            content_words += 1
+            replacement = None
+            if not self._is_known(word) and word not in SYNONYMS:
+                replacement = TYPOS.get(word)
+                if replacement is None:
+                    replacement = self._fuzzy_match(word)
+                    if replacement:
+                        guesses += 1
+                    else:
+                        unknown += 1
+                if replacement:
+                    corrections.append((word, replacement))
+            if (replacement or word) in SYNONYMS:
+                synonyms.append((replacement or word, SYNONYMS[replacement or word]))
+                replacement = SYNONYMS[replacement or word]
+            if replacement:
+                token = token[:match.start()] + replacement + token[match.end():]
+            words.append(token)
+
+        normalized = ", ".join(
+            part.strip(" ,") for part in SEPARATOR_PATTERN.split(" ".join(words)) if part.strip(" ,")
+        )
+
+        # Words we cannot place (and, half as much, fuzzy guesses) are what the LLM could still fix
+        confidence = 1.0 - (unknown + 0.5 * guesses) / max(1, content_words)
+        if len(words) > self.max_words:
+            confidence -= 0.3
+        confidence = max(0.0, min(1.0, confidence))
+        return {
+            "text": normalized,
+            "confidence": confidence,
+            "corrections": corrections,
+            "synonyms": synonyms,
+            "unknown": unknown,
+            "needs_llm": confidence < self.threshold
+        }
+
+    def _is_known(self, word):
+        return any(
+            word in words or (word.endswith("s") and word[:-1] in words) for words in (self.vocabulary, COMMON_WORDS)
+        )
+
+    def _fuzzy_match(self, word):
+        """
+        Returns:
+            str: The curated vocabulary word `word` is most likely a misspelling of, or None.
+        """
+        targets = [target for target in self._fuzzy_targets if target[0] == word[0]]
+        close = difflib.get_close_matches(word, targets, n=1, cutoff=self.fuzzy_cutoff)
+        return close[0] if close else None
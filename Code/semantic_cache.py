@@ -0,0 +1,154 @@
+"""
+Module: semantic_cache
+Description: In-memory cache of final search answers (listings plus augmented descriptions) keyed by query
+             embedding similarity, so near-identical preferences reuse an earlier answer without any LLM call.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class SemanticCache:
+    """
+    LRU cache whose lookups match any stored query with cosine similarity above `threshold`.
+
+    Entries are partitioned by scope (hard constraints and number of results), so a similar
+    wording never returns listings for another city or budget, and are dropped as soon as
+    the collection version they were computed from is outdated.
+    """
+
+    def __init__(self, threshold=0.95, max_entries=512, ttl_seconds=3600):
+        """
+        Args:
+            threshold (float): Minimum cosine similarity between query embeddings for a hit.
+            max_entries (int): Maximum number of cached answers; 0 disables the cache.
+            ttl_seconds (float, optional): Answer lifetime; None keeps answers until evicted.
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.llm_seconds_saved = 0.0
+        self._entries = OrderedDict()  # id -> entry dict, least recently used first
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_scope(where, k, **constraints):
+        """
+        Builds the scope an answer is valid for.
+
+        Args:
+            where (dict): Metadata filter of the search (see `VectorDatabase.build_filter`).
+            k (int): Number of results.
+            **constraints: Other exact-match inputs, e.g. the search mode or the selected amenities.
+
+        Returns:
+            str: Scope key; only entries with an identical scope can match.
+        """
+        return json.dumps({"where": where, "k": k, **constraints}, sort_keys=True, default=str)
+
+    def lookup(self, embedding, scope, version):
+        """
+        Returns the most similar cached answer in `scope`, if similar enough.
+
+        Args:
+            embedding (list): Query embedding.
+            scope (str): Scope built by `make_scope`.
+            version (int): Current collection version; older answers are evicted.
+
+        Returns:
+            dict: The entry ("results", "descriptions", "similarity", ...), or None on a miss.
+        """
+        if self.max_entries <= 0:
+            return None
+        query = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            best, best_similarity = None, self.threshold
+            for entry_id, entry in list(self._entries.items()):
+                if entry["version"] != version or (entry["expires_at"] is not None and entry["expires_at"] <= now):
+                    del self._entries[entry_id]
+                    continue
+                if entry["scope"] != scope:
+                    continue
+                similarity = float(entry["embedding"] @ query)
+                if similarity >= best_similarity:
+                    best, best_similarity = entry, similarity
+
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best["id"])
+            self.hits += 1
+            self.llm_seconds_saved += best["llm_seconds"]
+            return {**best, "similarity": best_similarity}
+
+    def store(self, embedding, scope, version, results, descriptions, llm_seconds=0.0):
+        """
+        Caches the final answer of a search.
+
+        Args:
+            embedding (list): Query embedding.
+            scope (str): Scope built by `make_scope`.
+            version (int): Collection version the results come from.
+            results (list): Listings returned by the search.
+            descriptions (dict): Listing id to augmented description.
+            llm_seconds (float): LLM latency the search waited for, credited to every later hit.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "id": entry_id,
+                "embedding": self._normalize(embedding),
+                "scope": scope,
+                "version": version,
+                "results": [dict(result) for result in results],
+                "descriptions": dict(descriptions),
+                "llm_seconds": llm_seconds,
+                "expires_at": time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+            }
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drops every entry (counters are kept).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Reports cache size and effectiveness.
+
+        Returns:
+            dict: Size, limit, threshold, hits, misses, hit rate and the LLM seconds hits avoided.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "llm_seconds_saved": self.llm_seconds_saved
+            }
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
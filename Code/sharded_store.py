@@ -0,0 +1,317 @@
+"""
+Module: sharded_store
+Description: Vector store partitioned into one shard per state (or city). Searches restricted to one location
+             hit a single shard; others fan out across the shards in a thread pool and merge the top k.
+"""
+
+import heapq
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SHARD_KEYS = ("state", "city")
+
+
+def shard_name(value):
+    """
+    Turns a shard key value into a name usable for directories and Chroma collections.
+
+    Args:
+        value (str): State or city, e.g. "New York".
+
+    Returns:
+        str: Lowercase slug, e.g. "new_york".
+    """
+    return re.sub(r"[^a-z0-9]+", "_", str(value).lower()).strip("_") or "unknown"
+
+
+def shard_values(where, shard_key):
+    """
+    Finds the shard key values a Chroma-style filter restricts the search to.
+
+    Args:
+        where (dict): Metadata filter, or None.
+        shard_key (str): Metadata field the store is sharded by.
+
+    Returns:
+        set: Allowed values, or None when any shard may match.
+    """
+    if not where:
+        return None
+    if "$and" in where:
+        restrictions = [values for values in (shard_values(clause, shard_key) for clause in where["$and"]) if values is not None]
+        return set.intersection(*restrictions) if restrictions else None
+    if "$or" in where:
+        restrictions = [shard_values(clause, shard_key) for clause in where["$or"]]
+        return set.union(*restrictions) if restrictions and None not in restrictions else None
+
+    condition = where.get(shard_key)
+    if condition is None:
+        return None
+    if not isinstance(condition, dict):
+        return {condition}
+    if "$eq" in condition:
+        return {condition["$eq"]}
+    if "$in" in condition:
+        return set(condition["$in"])
+    return None
+
+
+class ShardedVectorStore:
+    """
+    Vector store made of independent shards, one per value of `shard_key`, with the calls used by `VectorDatabase`.
+
+    Writes are grouped by shard, so re-indexing one market only touches (and persists) its own shard.
+    """
+
+    def __init__(self, shard_factory, shard_key="state", directory=None, max_workers=8):
+        """
+        Args:
+            shard_factory (callable): Creates the store of one shard from its name (see `shard_name`).
+            shard_key (str): Metadata field to shard by, "state" or "city".
+            directory (str, optional): Where the shard manifest (`shards.json`) is kept; None keeps it in memory.
+            max_workers (int): Shards searched in parallel by fan-out queries.
+        """
+        if shard_key not in SHARD_KEYS:
+            raise ValueError(f"Unknown shard key: {shard_key}")
+        self.shard_factory = shard_factory
+        self.shard_key = shard_key
+        self.directory = directory
+        self._shards = {}    # Shard key value -> store
+        self._location = {}  # Document id -> shard key value
+        self._dirty = set()
+        self._lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard")
+
+        manifest = self._manifest_path()
+        if manifest and os.path.exists(manifest):
+            with open(manifest, "r") as f:
+                saved = json.load(f)
+            if saved["shard_key"] != shard_key:
+                raise ValueError(f"❌ {directory} is sharded by {saved['shard_key']}, not {shard_key}.")
+            for value in saved["shards"]:
+                store = self._shards[value] = shard_factory(shard_name(value))
+                for doc_id in store.get(include=[])["ids"]:
+                    self._location[doc_id] = value
+
+    # ------------------------------------------------------------------ writes
+
+    def add_documents(self, documents, ids=None):
+        """
+        Upserts documents into the shard of their `shard_key` value, moving those whose value changed.
+
+        Returns:
+            list: The ids of the stored documents.
+        """
+        if not documents:
+            return []
+        ids = list(ids) if ids is not None else [doc.metadata["id"] for doc in documents]
+        groups = {}
+        for doc_id, doc in zip(ids, documents):
+            groups.setdefault(doc.metadata.get(self.shard_key), []).append((doc_id, doc))
+
+        with self._lock:
+            moved = [doc_id for doc_id, doc in zip(ids, documents)
+                     if self._location.get(doc_id, doc.metadata.get(self.shard_key)) != doc.metadata.get(self.shard_key)]
+            if moved:
+                self.delete(moved)
+            for value, group in groups.items():
+                self._shard(value, create=True).add_documents([doc for _, doc in group], ids=[doc_id for doc_id, _ in group])
+                for doc_id, _ in group:
+                    self._location[doc_id] = value
+                self._dirty.add(value)
+        return ids
+
+    def delete(self, ids=None):
+        """
+        Deletes documents by id from the shards holding them; unknown ids are ignored.
+        """
+        with self._lock:
+            groups = {}
+            for doc_id in ids or []:
+                if doc_id in self._location:
+                    groups.setdefault(self._location.pop(doc_id), []).append(doc_id)
+            for value, group in groups.items():
+                self._shards[value].delete(ids=group)
+                self._dirty.add(value)
+
+    def persist(self):
+        """
+        Persists the shards changed since the last call (backends that save explicitly) and the manifest.
+        """
+        with self._lock:
+            for value in self._dirty:
+                persist = getattr(self._shards[value], "persist", None)
+                if callable(persist):
+                    persist()
+            self._dirty.clear()
+
+            manifest = self._manifest_path()
+            if manifest:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(f"{manifest}.tmp", "w") as f:
+                    json.dump({"shard_key": self.shard_key, "shards": sorted(self._shards)}, f)
+                os.replace(f"{manifest}.tmp", manifest)
+
+    # ------------------------------------------------------------------- reads
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None):
+        """
+        Fetches stored documents from the shards that can hold them, like `Chroma.get`.
+
+        Returns:
+            dict: "ids" plus the requested fields, as parallel lists.
+        """
+        with self._lock:
+            if ids is not None:
+                groups = {}
+                for doc_id in ids:
+                    if doc_id in self._location:
+                        groups.setdefault(self._location[doc_id], []).append(doc_id)
+                requests = [(self._shards[value], group) for value, group in groups.items() if self._allowed(value, where)]
+            else:
+                requests = [(self._shards[value], None) for value in self._route(where)]
+
+        result = {"ids": [], **{field: [] for field in include}}
+        for store, shard_ids in requests:
+            found = store.get(ids=shard_ids, where=where, include=list(include))
+            for key in result:
+                result[key].extend(found.get(key) or [])
+        if limit is not None:
+            result = {key: values[:limit] for key, values in result.items()}
+        return result
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        """
+        Returns the k documents most similar to `embedding` across the shards matching `filter`.
+        """
+        return [doc for doc, _ in self.similarity_search_by_vector_with_scores(embedding, k=k, filter=filter)]
+
+    def similarity_search_by_vector_with_scores(self, embedding, k=4, filter=None):
+        """
+        Like `similarity_search_by_vector` but also returns the scores (higher is more similar).
+
+        A filter naming one shard key value searches that shard only; otherwise every candidate
+        shard is searched in the thread pool and their top k lists are merged.
+
+        Returns:
+            list: (Document, score) tuples, best first.
+        """
+        with self._lock:
+            stores = [self._shards[value] for value in self._route(filter)]
+        if not stores or k <= 0:
+            return []
+        if len(stores) == 1:
+            return _scored_search(stores[0], embedding, k, filter)
+        results = self._pool.map(lambda store: _scored_search(store, embedding, k, filter), stores)
+        return heapq.nlargest(k, (hit for hits in results for hit in hits), key=lambda hit: hit[1])
+
+    def similarity_search_by_vectors(self, embeddings, k=4, filters=None):
+        """
+        Searches many queries: queries routed to the same single shard are batched together
+        (when the shard backend supports it), the others fan out one by one.
+
+        Returns:
+            list: For each query, its Documents, most similar first.
+        """
+        filters = filters or [None] * len(embeddings)
+        results = [None] * len(embeddings)
+        single = {}
+        with self._lock:
+            for i, where in enumerate(filters):
+                values = self._route(where)
+                if len(values) == 1:
+                    single.setdefault(values[0], []).append(i)
+
+        for value, indices in single.items():
+            search_by_vectors = getattr(self._shards[value], "similarity_search_by_vectors", None)
+            if callable(search_by_vectors):
+                found = search_by_vectors([embeddings[i] for i in indices], k=k, filters=[filters[i] for i in indices])
+                for i, docs in zip(indices, found):
+                    results[i] = docs
+        for i, embedding in enumerate(embeddings):
+            if results[i] is None:
+                results[i] = self.similarity_search_by_vector(embedding, k=k, filter=filters[i])
+        return results
+
+    def stats(self):
+        """
+        Returns:
+            dict: Number of shards and documents per shard key value.
+        """
+        with self._lock:
+            counts = {value: 0 for value in self._shards}
+            for value in self._location.values():
+                counts[value] += 1
+        return {"shard_key": self.shard_key, "shards": len(counts), "documents": dict(sorted(counts.items()))}
+
+    def memory_footprint(self):
+        """
+        Sums the footprint of shards that report one (NumPy backend).
+
+        Returns:
+            dict: Summed numeric fields of the shards' `memory_footprint`.
+        """
+        total = {}
+        with self._lock:
+            for store in self._shards.values():
+                footprint = getattr(store, "memory_footprint", None)
+                if callable(footprint):
+                    for key, value in footprint().items():
+                        if isinstance(value, (int, float)) and not isinstance(value, bool):
+                            total[key] = total.get(key, 0) + value
+        return total
+
+    def __len__(self):
+        return len(self._location)
+
+    def close(self):
+        """
+        Stops the fan-out thread pool and closes the shards that can be closed.
+        """
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            for store in self._shards.values():
+                close = getattr(store, "close", None)
+                if callable(close):
+                    close()
+
+    # ----------------------------------------------------------------- helpers
+
+    def _shard(self, value, create=False):
+        store = self._shards.get(value)
+        if store is None and create:
+            store = self._shards[value] = self.shard_factory(shard_name(value))
+        return store
+
+    def _allowed(self, value, where):
+        values = shard_values(where, self.shard_key)
+        return values is None or value in values
+
+    def _route(self, where):
+        """
+        Returns the existing shard key values a filter can match.
+        """
+        values = shard_values(where, self.shard_key)
+        if values is None:
+            return list(self._shards)
+        return [value for value in values if value in self._shards]
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, "shards.json") if self.directory else None
+
+
+def _scored_search(store, embedding, k, where):
+    """
+    Runs a scored similarity search on one shard.
+
+    Returns:
+        list: (Document, score) tuples, higher scores first. Chroma reports distances, which are negated.
+    """
+    with_scores = getattr(store, "similarity_search_by_vector_with_scores", None)
+    if callable(with_scores):
+        return with_scores(embedding, k=k, filter=where)
+    hits = store.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=where)
+    return [(doc, -distance) for doc, distance in hits]
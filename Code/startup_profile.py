@@ -0,0 +1,162 @@
+"""
+Module: startup_profile
+Description: Measures where the serving process spends its startup time: named phases plus a
+             `python -X importtime` breakdown of the heaviest imports.
+"""
+
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Records the wall time of named startup phases."""
+
+    def __init__(self, enabled=True, start=None):
+        """
+        Args:
+            enabled (bool): When False, `phase` only runs its block and nothing is recorded.
+            start (float, optional): `time.perf_counter()` value the total is measured from.
+        """
+        self.enabled = enabled
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times the enclosed block as one phase.
+
+        Args:
+            name (str): Phase name shown in the report.
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def record(self, name, seconds):
+        """
+        Records a phase measured elsewhere (e.g. module imports timed before the profiler existed).
+        """
+        if self.enabled:
+            self.phases.append((name, seconds))
+
+    def report(self):
+        """
+        Prints the phases, slowest first, and the total time since `start`.
+        """
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self.start
+        print("\n⏱️ Startup profile")
+        for name, seconds in sorted(self.phases, key=lambda phase: phase[1], reverse=True):
+            print(f"   {name:<40} {seconds * 1000:9.1f} ms  {seconds / total if total else 0:6.1%}")
+        print(f"   {'total':<40} {total * 1000:9.1f} ms")
+
+
+def parse_importtime(stderr):
+    """
+    Parses the output of `python -X importtime`.
+
+    Args:
+        stderr (str): Standard error of the profiled interpreter.
+
+    Returns:
+        list: (package, self microseconds, cumulative microseconds, depth) tuples in import order.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip())) // 2  # Nested imports are indented by two spaces
+            imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return imports
+
+
+def profile_imports(module):
+    """
+    Imports `module` in a fresh interpreter with `-X importtime`.
+
+    Args:
+        module (str): Module to import (from the current working directory).
+
+    Returns:
+        list: Parsed entries, see `parse_importtime`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(f"❌ Error profiling imports of {module}: {result.stderr.strip().splitlines()[-1:]}")
+    return parse_importtime(result.stderr)
+
+
+def importtime_breakdown(imports, module, top=15):
+    """
+    Returns the heaviest direct imports of `module`.
+
+    Args:
+        imports (list): Entries returned by `profile_imports`.
+        module (str): Profiled module.
+        top (int): Number of entries to return.
+
+    Returns:
+        list: (module, cumulative seconds) tuples, slowest first.
+    """
+    # Entries are printed children first: the direct imports of `module` are the entries one
+    # level deeper that precede it, back to the previous entry at its own level
+    position = next((i for i, entry in enumerate(imports) if entry[0] == module), None)
+    if position is None:
+        return []
+    depth = imports[position][3]
+    direct = []
+    for name, _, cumulative, entry_depth in reversed(imports[:position]):
+        if entry_depth <= depth:
+            break
+        if entry_depth == depth + 1:
+            direct.append((name, cumulative / 1e6))
+    return sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+
+
+def heaviest_packages(imports, top=15):
+    """
+    Returns the top-level packages (gradio, torch, chromadb, ...) that took longest to import.
+
+    Args:
+        imports (list): Entries returned by `profile_imports`.
+        top (int): Number of entries to return.
+
+    Returns:
+        list: (package, cumulative seconds) tuples, slowest first. Packages imported by other
+        packages are counted in both.
+    """
+    packages = {}
+    for name, _, cumulative, _ in imports:
+        if "." not in name:
+            packages[name] = max(packages.get(name, 0), cumulative / 1e6)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def print_importtime_breakdown(module, top=15):
+    """
+    Prints the `-X importtime` breakdown of `module`: its direct imports and the heaviest packages overall.
+    """
+    imports = profile_imports(module)
+    print(f"\n📦 Direct imports of `{module}` (python -X importtime, cumulative)")
+    for name, seconds in importtime_breakdown(imports, module, top):
+        print(f"   {name:<40} {seconds * 1000:9.1f} ms")
+    print("\n📦 Heaviest packages")
+    for name, seconds in heaviest_packages(imports, top):
+        if name != module:
+            print(f"   {name:<40} {seconds * 1000:9.1f} ms")
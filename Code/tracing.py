@@ -0,0 +1,247 @@
+"""
+Module: tracing
+Description: Lightweight in-process tracing: timed spans per pipeline stage with attributes (tokens,
+             cache hits, ...), p50/p95/p99 summaries, and Prometheus-text / JSON export.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _NoopSpan:
+    """Span returned while tracing is disabled: every operation is a no-op."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Times one execution of a stage and carries its attributes."""
+
+    __slots__ = ("tracer", "name", "attributes", "start")
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._record(self.name, time.perf_counter() - self.start, self.attributes, exc_type is not None)
+        return False
+
+    def set(self, key, value):
+        """
+        Sets an attribute; numbers and booleans are summed per stage (e.g. tokens=120, cache_hit=True).
+        """
+        self.attributes[key] = value
+
+    def add(self, key, amount=1):
+        """
+        Increments a numeric attribute.
+        """
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+
+class Tracer:
+    """Collects span durations per stage in bounded sample windows."""
+
+    def __init__(self, enabled=False, max_samples=4096):
+        """
+        Args:
+            enabled (bool): Record spans; when False `span` returns a shared no-op object.
+            max_samples (int): Most recent durations kept per stage for the quantiles.
+        """
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def span(self, name, **attributes):
+        """
+        Returns a context manager timing one execution of stage `name`.
+
+        Args:
+            name (str): Stage name, e.g. "vector_db.embed_query".
+            **attributes: Initial attributes of the span.
+
+        Returns:
+            Span: Use as `with tracer.span("stage") as span: ...; span.set("tokens", n)`.
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def observe(self, name, seconds, **attributes):
+        """
+        Records a duration measured elsewhere, e.g. a milestone such as time to first result.
+
+        Args:
+            name (str): Stage name.
+            seconds (float): Measured duration.
+            **attributes: Attributes summed per stage.
+        """
+        if self.enabled:
+            self._record(name, seconds, attributes, False)
+
+    def _record(self, name, seconds, attributes, failed):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {
+                    "samples": deque(maxlen=self.max_samples), "count": 0, "errors": 0, "sum": 0.0, "attributes": {}
+                }
+            stage["samples"].append(seconds)
+            stage["count"] += 1
+            stage["sum"] += seconds
+            stage["errors"] += failed
+            for key, value in attributes.items():
+                if isinstance(value, (bool, int, float)):
+                    stage["attributes"][key] = stage["attributes"].get(key, 0) + value
+
+    def reset(self):
+        """
+        Drops every recorded span.
+        """
+        with self._lock:
+            self._stages.clear()
+
+    def stats(self):
+        """
+        Summarizes every stage.
+
+        Returns:
+            dict: Stage name to count, errors, total/mean/max seconds, p50/p95/p99 seconds
+            (over the most recent `max_samples` spans) and summed attributes.
+        """
+        with self._lock:
+            stages = {name: (sorted(stage["samples"]), dict(stage)) for name, stage in self._stages.items()}
+
+        report = {}
+        for name, (samples, stage) in sorted(stages.items()):
+            report[name] = {
+                "count": stage["count"],
+                "errors": stage["errors"],
+                "sum_seconds": stage["sum"],
+                "mean_seconds": stage["sum"] / stage["count"],
+                "max_seconds": samples[-1],
+                **{f"p{int(q * 100)}_seconds": samples[min(len(samples) - 1, int(q * len(samples)))] for q in QUANTILES},
+                "attributes": dict(stage["attributes"])
+            }
+        return report
+
+    def to_prometheus(self, prefix="homematch"):
+        """
+        Renders the stage statistics in the Prometheus text exposition format.
+
+        Returns:
+            str: One summary (`<prefix>_stage_seconds`) plus per-attribute counters.
+        """
+        lines = [
+            f"# HELP {prefix}_stage_seconds Latency of each HomeMatch pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds summary"
+        ]
+        stats = self.stats()
+        for name, stage in stats.items():
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="{q}"}} {stage[f"p{int(q * 100)}_seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stage["sum_seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+
+        lines.append(f"# HELP {prefix}_stage_errors_total Spans that ended with an exception.")
+        lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+        for name, stage in stats.items():
+            lines.append(f'{prefix}_stage_errors_total{{stage="{name}"}} {stage["errors"]}')
+
+        lines.append(f"# HELP {prefix}_stage_attribute_total Summed span attributes (tokens, cache hits, ...).")
+        lines.append(f"# TYPE {prefix}_stage_attribute_total counter")
+        for name, stage in stats.items():
+            for key, value in sorted(stage["attributes"].items()):
+                lines.append(f'{prefix}_stage_attribute_total{{stage="{name}",attribute="{key}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def export_json(self, path):
+        """
+        Atomically writes the stage statistics to a JSON file.
+
+        Args:
+            path (str): Destination file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(self.stats(), f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """
+        Serves `/metrics` (Prometheus text) and `/metrics.json` from a background thread.
+
+        Args:
+            port (int): Port to listen on.
+            host (str): Interface to bind; local only by default.
+
+        Returns:
+            ThreadingHTTPServer: The running server.
+        """
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = tracer.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(tracer.stats()).encode("utf-8"), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        print(f"📈 Metrics available at http://{host}:{port}/metrics")
+        return self._server
+
+
+# Process-wide tracer; `main` enables it from the settings
+tracer = Tracer()
+
+
+def span(name, **attributes):
+    """
+    Starts a span on the process-wide tracer (a no-op while tracing is disabled).
+    """
+    return tracer.span(name, **attributes)
@@ -3,88 +3,528 @@ Module: vector_database
 Description: Handles storing and searching real estate listings using ChromaDB and OpenAI embeddings.
 """
 
+import hashlib
 import json
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
+import os
+import re
 from langchain_core.documents import Document
+from embedding_cache import CachedEmbeddings
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from listing_store import iter_listings
+from config_loader import get_settings
+from openai_clients import get_embeddings_model
+from query_cache import LRUCache, normalize_query
+from tracing import span
+
+# Multipliers of the shorthand suffixes in typed amounts ("500k", "$1.2M")
+NUMBER_SUFFIXES = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mm": 1e6, "mil": 1e6, "million": 1e6}
+
+# A maximum price below this is a typo or unit mix-up, not a budget; the price filter is skipped
+MIN_PLAUSIBLE_PRICE = 10000
+
+
+def parse_number(value):
+    """
+    Parses numbers stored or typed as display strings, such as "$600,000", "2500 sqft", "500k" or "$1.2M".
+
+    Args:
+        value (str | int | float): Raw value.
+
+    Returns:
+        int | float: The parsed number, or None if the value holds no number.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    match = re.search(r"(\d[\d,]*(?:\.\d+)?)\s*(thousand|million|mil|mm|k|m)?\b", str(value or ""), re.IGNORECASE)
+    if not match:
+        return None
+    number = round(float(match.group(1).replace(",", "")) * NUMBER_SUFFIXES.get((match.group(2) or "").lower(), 1), 6)
+    return int(number) if number.is_integer() else number
+
+
+# Where each backend stores its embeddings unless `db_path` is given
+DEFAULT_DB_PATHS = {
+    "chroma": "../Data/chroma_langchain_db",
+    "numpy": "../Data/numpy_vector_store"
+}
+
 
 class VectorDatabase:
-    """Handles vector-based storage and retrieval of real estate listings using ChromaDB."""
+    """Handles vector-based storage and retrieval of real estate listings using ChromaDB (or a NumPy backend)."""
 
-    def __init__(self, listings_path="../Data/listings.json", db_path="../Data/chroma_langchain_db"):
+    def __init__(self, listings_path="../Data/listings.jsonl", db_path=None, backend="chroma", mmap_embeddings=False,
+                 embedding_model=None, embedding_cache_path="../Data/embedding_cache.sqlite3",
+                 embedding_batch_size=64, embedding_workers=4, query_cache_size=1024, query_cache_ttl=3600,
+                 result_cache_size=256, result_cache_ttl=600, lexical_index_path="../Data/bm25_index.json",
+                 search_mode="hybrid", hybrid_candidates=4, rrf_k=60, embedding_dimensions=None,
+                 quantization=None, rerank_factor=4, shard_by=None, shard_workers=8):
         """
         Initializes the vector store by loading real estate listings and setting up ChromaDB.
 
         Args:
-            listings_path (str): Path to the JSON file containing real estate listings.
-            db_path (str): Path to the directory where ChromaDB stores embeddings.
+            listings_path (str): Path to the JSON Lines file containing real estate listings.
+            db_path (str, optional): Directory where the backend stores embeddings; defaults per backend.
+            backend (str): "chroma" (ChromaDB) or "numpy" (in-process NumPy matrix, see `numpy_backend`).
+            mmap_embeddings (bool): With the NumPy backend, memory-map the persisted embedding matrix.
+            embedding_model (Embeddings, optional): Embedding model; the configured OpenAI model if omitted.
+            embedding_cache_path (str, optional): SQLite file caching listing embeddings; None keeps the cache in memory.
+            embedding_batch_size (int): Listings per embedding request.
+            embedding_workers (int): Embedding requests sent in parallel by `store_listings`.
+            query_cache_size (int): Maximum number of cached query embeddings.
+            query_cache_ttl (float): Seconds a query embedding stays cached.
+            result_cache_size (int): Maximum number of cached search result lists.
+            result_cache_ttl (float): Seconds a search result list stays cached.
+            lexical_index_path (str): JSON file persisting the BM25 index over listing texts.
+            search_mode (str): Default search mode, "hybrid" (BM25 + vectors) or "vector".
+            hybrid_candidates (int): In hybrid mode, each ranker contributes k * hybrid_candidates candidates.
+            rrf_k (int): Damping constant of reciprocal rank fusion.
+            embedding_dimensions (int, optional): Store shortened embeddings (e.g. 256 or 1024 of the 3072
+                `text-embedding-3-large` dimensions). Changing it needs a fresh `db_path`.
+            quantization (str, optional): NumPy backend only: "int8" or "binary" codes searched first,
+                the top `k * rerank_factor` candidates being re-ranked with the float32 embeddings.
+            rerank_factor (int): Full-precision candidates per requested result when quantized.
+            shard_by (str, optional): "state" or "city" to keep one shard per market (see `sharded_store`):
+                single-location searches hit one shard and each sync only rewrites the shards it changes.
+                Changing it needs a fresh `db_path`.
+            shard_workers (int): Shards searched in parallel by searches spanning several markets.
         """
         self.listings_path = listings_path
-        self.db_path = db_path
-        self.embedding_model = OpenAIEmbeddings(model="text-embedding-3-large")
+        self.backend = backend
+        self.db_path = db_path or DEFAULT_DB_PATHS[backend]
+        self.mmap_embeddings = mmap_embeddings
+        self.embedding_dimensions = embedding_dimensions
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self.shard_by = shard_by
+        self.shard_workers = shard_workers
+        if quantization and backend != "numpy":
+            raise ValueError("❌ Quantized embeddings require the numpy backend.")
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_workers = embedding_workers
+        self.embedding_model = CachedEmbeddings(
+            embedding_model or get_embeddings_model(dimensions=embedding_dimensions),
+            cache_path=embedding_cache_path or ":memory:",
+            batch_size=embedding_batch_size,
+            max_workers=embedding_workers,
+            dimensions=embedding_dimensions
+        )
+
+        # Query embeddings never go stale; result lists are dropped whenever the collection changes
+        self.query_embedding_cache = LRUCache(max_size=query_cache_size, ttl_seconds=query_cache_ttl)
+        self.search_cache = LRUCache(max_size=result_cache_size, ttl_seconds=result_cache_ttl)
+        self.collection_version = 0
+
+        # Lexical index over descriptions, kept in sync with the vector store by `store_listings`
+        self.lexical_index_path = lexical_index_path
+        self.lexical_index = BM25Index.load(lexical_index_path)
+        self.search_mode = search_mode
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+
+        # Listings are read from disk on first use (see `documents`), not at construction
+        self._documents = None
+        self._listings_complete = False  # Whether the last read reached the end of the listings file
+
+        # Initialize the vector store backend
+        self._chroma_client = None
+        self.vector_store = self._create_vector_store()
+
+    @classmethod
+    def from_settings(cls, settings=None, db_path=None, lexical_index_path=None, **overrides):
+        """
+        Opens the database configured by the settings (files, backend, embedding size, quantization, sharding,
+        caches), so every entry point searches the index the way it was built.
+
+        Args:
+            settings (Settings, optional): Typed settings; the current ones if omitted.
+            db_path (str, optional): Vector store directory; the configured one (or the backend default) if omitted.
+            lexical_index_path (str, optional): BM25 index file; the configured one if omitted.
+            **overrides: Constructor arguments taking precedence over the settings (e.g. `backend`).
+
+        Returns:
+            VectorDatabase: The configured database.
+        """
+        settings = settings or get_settings()
+        options = dict(
+            listings_path=settings.listings_path,
+            embedding_cache_path=settings.embedding_cache_path,
+            backend=settings.vector_backend,
+            search_mode=settings.search_mode,
+            embedding_batch_size=settings.embedding_batch_size,
+            embedding_workers=settings.embedding_workers,
+            query_cache_size=settings.query_cache_size,
+            query_cache_ttl=settings.query_cache_ttl,
+            result_cache_size=settings.result_cache_size,
+            result_cache_ttl=settings.result_cache_ttl,
+            embedding_dimensions=settings.embedding_dimensions or None,
+            quantization=settings.vector_quantization or None,
+            rerank_factor=settings.rerank_factor,
+            shard_by=settings.shard_by or None
+        )
+        options.update(overrides)
+        return cls(
+            db_path=db_path or settings.vector_db_path or None,
+            lexical_index_path=lexical_index_path or settings.bm25_index_path,
+            **options
+        )
+
+    def _create_vector_store(self):
+        """
+        Creates the vector store for the configured backend, sharded if `shard_by` is set.
+
+        Returns:
+            Chroma | NumpyVectorStore | ShardedVectorStore: The vector store.
+        """
+        if self.backend not in DEFAULT_DB_PATHS:
+            raise ValueError(f"Unknown vector store backend: {self.backend}")
+        # A sharded directory opened as one collection would look empty and silently return nothing
+        if not self.shard_by and os.path.exists(os.path.join(self.db_path, "shards.json")):
+            with open(os.path.join(self.db_path, "shards.json"), "r") as f:
+                shard_key = json.load(f).get("shard_key")
+            raise ValueError(f"❌ {self.db_path} is sharded by {shard_key}: open it with shard_by=\"{shard_key}\".")
+        if not self.shard_by:
+            return self._create_backend_store()
 
-        # Load and process listings
-        self.listings = self._load_listings()
-        self.documents = self._prepare_documents()
+        from sharded_store import ShardedVectorStore
+
+        return ShardedVectorStore(
+            self._create_backend_store, shard_key=self.shard_by, directory=self.db_path, max_workers=self.shard_workers
+        )
 
-        # Initialize ChromaDB for storage
-        self.vector_store = Chroma(
-            collection_name="real_estate_listings",
+    def _create_backend_store(self, shard=None):
+        """
+        Creates one store of the configured backend: the whole collection, or one shard of it.
+
+        Args:
+            shard (str, optional): Shard name; stored in its own subdirectory (NumPy) or collection (Chroma).
+        """
+        if self.backend == "numpy":
+            from numpy_backend import NumpyVectorStore
+
+            return NumpyVectorStore(
+                self.embedding_model,
+                persist_directory=os.path.join(self.db_path, "shards", shard) if shard else self.db_path,
+                mmap=self.mmap_embeddings,
+                quantization=self.quantization,
+                rerank_factor=self.rerank_factor
+            )
+
+        # Initialize ChromaDB for storage (imported here: it is slow to import and optional with NumPy)
+        from langchain_chroma import Chroma
+
+        return Chroma(
+            collection_name=self._collection_name(shard),
             embedding_function=self.embedding_model,
-            persist_directory=self.db_path
+            client=self.chroma_client
         )
 
-    def _load_listings(self):
+    @staticmethod
+    def _collection_name(shard=None):
+        return f"real_estate_listings_{shard}" if shard else "real_estate_listings"
+
+    @property
+    def chroma_client(self):
         """
-        Loads real estate listings from a JSON file.
+        The Chroma client of `db_path`, shared by every collection (shard) of this database and closed by `close`.
 
         Returns:
-            list: A list of real estate listings.
+            chromadb.ClientAPI: Persistent client, created on first use.
+        """
+        if self._chroma_client is None:
+            import chromadb
+
+            self._chroma_client = chromadb.PersistentClient(path=self.db_path)
+        return self._chroma_client
+
+    def close(self):
         """
+        Releases the vector store: shard search threads and the Chroma client (its SQLite connections).
+
+        The database must not be searched afterwards.
+        """
+        close = getattr(self.vector_store, "close", None)
+        if callable(close):
+            close()
+        if self._chroma_client is not None:
+            self._chroma_client.close()
+            self._chroma_client = None
+
+    @property
+    def documents(self):
+        """
+        Listings as Document objects, read from the listings file on first access.
+
+        Returns:
+            list: Documents prepared by `_prepare_documents`.
+        """
+        if self._documents is None:
+            self._documents = self._prepare_documents()
+        return self._documents
+
+    def _load_listings(self):
+        """
+        Lazily streams real estate listings from a JSON Lines file.
+
+        `_listings_complete` is only set once the whole file was read; after a missing file or a
+        malformed line the listings read so far are yielded but must not be taken as the inventory.
+
+        Yields:
+            dict: One real estate listing at a time.
+        """
+        self._listings_complete = False
         try:
-            with open(self.listings_path, "r") as f:
-                return json.load(f)
+            yield from iter_listings(self.listings_path)
+            self._listings_complete = True
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"❌ Error loading listings file: {e}")
-            return []
 
     def _prepare_documents(self):
         """
         Converts listings into Document objects with metadata.
 
+        Each document carries a content hash of its text and metadata so that
+        `store_listings` can tell unchanged listings apart from edited ones.
+
         Returns:
             list: A list of Document objects with structured metadata.
         """
-        return [
-            Document(
-                page_content=listing["Description"],  # Store property description
-                metadata={
-                    "id": listing["id"],  
-                    "property_type": listing["Property Type"],
-                    "neighborhood": listing["Neighborhood"],
-                    "city": listing["City"],
-                    "state": listing["State"],
-                    "price": listing["Price"],
-                    "house_size": listing["House Size"],
-                    "bedrooms": listing["Bedrooms"],
-                    "bathrooms": listing["Bathrooms"],
-                    "neighborhood_description": listing["Neighborhood Description"],
-                    "image_path": listing["image_path"]
-                }
-            )
-            for listing in self.listings
-        ]
+        documents = []
+        for listing in self._load_listings():
+            page_content = listing["Description"]  # Store property description
+            metadata = {
+                "id": listing["id"],
+                "property_type": listing["Property Type"],
+                "neighborhood": listing["Neighborhood"],
+                "city": listing["City"],
+                "state": listing["State"],
+                "price": listing["Price"],
+                "house_size": listing["House Size"],
+                "bedrooms": listing["Bedrooms"],
+                "bathrooms": listing["Bathrooms"],
+                "neighborhood_description": listing["Neighborhood Description"],
+                "image_path": listing["image_path"]
+            }
+
+            # Numeric copies of the display fields, used for hard filters in `search`
+            numeric_fields = {
+                "price_value": parse_number(listing["Price"]),
+                "house_size_value": parse_number(listing["House Size"]),
+                "bedrooms": parse_number(listing["Bedrooms"]),
+                "bathrooms": parse_number(listing["Bathrooms"])
+            }
+            metadata.update({key: value for key, value in numeric_fields.items() if value is not None})
+
+            metadata["content_hash"] = self._content_hash(page_content, metadata)
+            documents.append(Document(page_content=page_content, metadata=metadata))
+        return documents
+
+    @staticmethod
+    def _content_hash(page_content, metadata):
+        """
+        Computes a stable hash of a document's text and metadata.
+
+        Args:
+            page_content (str): Text that gets embedded.
+            metadata (dict): Metadata stored alongside the embedding.
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        payload = json.dumps({"page_content": page_content, "metadata": metadata}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    def store_listings(self):
+    def store_listings(self, augmenter=None, states=None):
         """
-        Stores real estate listings in ChromaDB.
+        Incrementally syncs the listings file into the vector store and the BM25 index.
+
+        Listings are upserted under their `id`, so re-running never duplicates vectors.
+        Listings whose content hash is unchanged are skipped (no embedding cost), and
+        listings that disappeared from the listings file are deleted. A complete sync of the
+        whole file records its size and modification time for `listings_changed`.
+
+        Args:
+            augmenter (LlmAugmentation, optional): If given, augmented descriptions missing
+                from its cache are precomputed for every listing once the sync is done.
+            states (list, optional): Only sync the listings of these states; listings elsewhere
+                (and, with `shard_by`, their shards) are left untouched.
+
+        Returns:
+            dict: Counts of "added", "updated", "skipped" and "removed" listings.
         """
+        summary = {"added": 0, "updated": 0, "skipped": 0, "removed": 0}
         try:
-            self.vector_store.add_documents(self.documents)
-            print("✅ Listings successfully stored in ChromaDB!")
+            signature = self._listings_signature()  # Taken first: a write during the sync forces the next one
+            current, to_upsert, stale_ids, complete, summary = self._plan_sync(states)
+
+            # Each chunk is embedded as several batches in parallel by the cached embedder
+            chunk_size = self.embedding_batch_size * max(1, self.embedding_workers)
+            for i in range(0, len(to_upsert), chunk_size):
+                chunk = to_upsert[i:i + chunk_size]
+                self.vector_store.add_documents(chunk, ids=[doc.metadata["id"] for doc in chunk])
+
+            if not complete:
+                print("⚠️ Listings file not fully read: keeping every stored listing.")
+            if stale_ids:
+                self.vector_store.delete(ids=stale_ids)
+
+            self._sync_lexical_index(current, removed=stale_ids if states or not complete else None)
+
+            if summary["added"] or summary["updated"] or summary["removed"]:
+                # Chroma persists on write; the NumPy backend saves explicitly
+                persist = getattr(self.vector_store, "persist", None)
+                if callable(persist):
+                    persist()
+                self.collection_version += 1
+                self.search_cache.clear()
+
+            if complete and not states:
+                self._write_sync_marker(signature)
+
+            print(
+                f"✅ Listings synced to the {self.backend} vector store: {summary['added']} added, {summary['updated']} updated, "
+                f"{summary['skipped']} skipped, {summary['removed']} removed."
+            )
+            cache_stats = self.embedding_model.stats()
+            print(f"🧠 Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate).")
+
+            if augmenter is not None:
+                augmenter.precompute([self._to_listing(doc) for doc in current.values()])
         except Exception as e:
             print(f"❌ Error storing listings: {e}")
+        return summary
+
+    def listings_changed(self):
+        """
+        Cheaply checks whether the listings file may differ from what the last complete sync indexed.
+
+        Compares the file's size and modification time with the marker written by `store_listings`,
+        without reading the file or the vector store.
+
+        Returns:
+            bool: False only when the file is unchanged since the last complete sync.
+        """
+        try:
+            with open(self._sync_marker_path(), "r") as f:
+                marker = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return True
+        signature = self._listings_signature()
+        return signature is None or marker != {"listings_path": os.path.abspath(self.listings_path), **signature}
+
+    def _listings_signature(self):
+        try:
+            stat = os.stat(self.listings_path)
+        except OSError:
+            return None
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _sync_marker_path(self):
+        return os.path.join(self.db_path, "listings_sync.json")
+
+    def _write_sync_marker(self, signature):
+        """
+        Records the listings file size and modification time a complete sync indexed (see `listings_changed`).
+        """
+        if signature is None:
+            return
+        os.makedirs(self.db_path, exist_ok=True)
+        marker = self._sync_marker_path()
+        with open(f"{marker}.tmp", "w") as f:
+            json.dump({"listings_path": os.path.abspath(self.listings_path), **signature}, f)
+        os.replace(f"{marker}.tmp", marker)
+
+    def pending_changes(self, states=None):
+        """
+        Compares the listings file with the vector store without writing anything.
+
+        Args:
+            states (list, optional): See `store_listings`.
+
+        Returns:
+            dict: Counts of "added", "updated", "skipped" and "removed" listings a sync would apply.
+        """
+        return self._plan_sync(states)[-1]
+
+    def _plan_sync(self, states=None):
+        """
+        Re-reads the listings file and works out what `store_listings` has to write.
+
+        Returns:
+            tuple: (current documents by id, documents to upsert, stale ids to delete,
+            whether the listings file was read completely, summary counts).
+        """
+        summary = {"added": 0, "updated": 0, "skipped": 0, "removed": 0}
+        self._documents = None  # Re-read the listings file so edits since the last sync are picked up
+        scope = {"state": {"$in": list(states)}} if states else None
+        existing = self.vector_store.get(where=scope, include=["metadatas"])
+        existing_hashes = {
+            doc_id: (metadata or {}).get("content_hash")
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+        }
+
+        # Last occurrence wins if the file lists the same id twice
+        current = {doc.metadata["id"]: doc for doc in self.documents if not states or doc.metadata["state"] in states}
+
+        to_upsert = []
+        for doc_id, doc in current.items():
+            if doc_id not in existing_hashes:
+                summary["added"] += 1
+            elif existing_hashes[doc_id] != doc.metadata["content_hash"]:
+                summary["updated"] += 1
+            else:
+                summary["skipped"] += 1
+                continue
+            to_upsert.append(doc)
+
+        # Never delete listings because the listings file failed to load, even partially
+        complete = self._listings_complete and bool(current)
+        stale_ids = [doc_id for doc_id in existing_hashes if doc_id not in current] if complete else []
+        summary["removed"] = len(stale_ids)
+        return current, to_upsert, stale_ids, complete, summary
+
+    def _sync_lexical_index(self, current, removed=None):
+        """
+        Brings the BM25 index in line with the current documents and persists it if it changed.
+
+        Args:
+            current (dict): Listing id to Document for every synced listing.
+            removed (list, optional): Ids to drop; by default every indexed id missing from `current`.
+        """
+        for doc_id, doc in current.items():
+            self.lexical_index.upsert(doc_id, self._lexical_text(doc), doc.metadata["content_hash"])
+        if removed is not None:
+            for doc_id in removed:
+                if doc_id in self.lexical_index:
+                    self.lexical_index.remove(doc_id)
+        elif current:
+            for doc_id in self.lexical_index.doc_ids():
+                if doc_id not in current:
+                    self.lexical_index.remove(doc_id)
+        if self.lexical_index.dirty:
+            self.lexical_index.save(self.lexical_index_path)
+
+    @staticmethod
+    def _lexical_text(doc):
+        """
+        Returns the text indexed by BM25: the description plus the neighborhood description.
+        """
+        return f"{doc.page_content}\n{doc.metadata.get('neighborhood_description', '')}"
 
+    @staticmethod
+    def format_lexical_query(user_prefs):
+        """
+        Builds the keyword query for BM25 from the amenities and free-text description.
+
+        Args:
+            user_prefs (dict): Dictionary containing user preferences.
+
+        Returns:
+            str: Keywords to match against listing texts.
+        """
+        amenities = user_prefs.get("amenities") or ""
+        if isinstance(amenities, (list, tuple)):
+            amenities = " ".join(amenities)
+        return f"{amenities} {user_prefs.get('description') or ''}".strip()
 
     def format_user_prefs(self, user_prefs):
         """
@@ -110,51 +550,324 @@ class VectorDatabase:
             print(f"❌ Error formatting user preferences: {e}")
             return ""
 
-    def search(self, user_prefs, k=5):
+    def embed_query(self, query):
+        """
+        Embeds a search query, reusing the embedding of an identical normalized query.
+
+        Args:
+            query (str): Natural language query.
+
+        Returns:
+            list: The query embedding.
+        """
+        with span("vector_db.embed_query") as trace:
+            key = normalize_query(query)
+            query_embedding = self.query_embedding_cache.get(key)
+            trace.set("cache_hit", query_embedding is not None)
+            if query_embedding is None:
+                query_embedding = self.embedding_model.embed_query(query)
+                self.query_embedding_cache.set(key, query_embedding)
+            return query_embedding
+
+    def embed_queries(self, queries):
+        """
+        Embeds many queries, sending only uncached ones to the model in batched calls.
+
+        Args:
+            queries (list): Natural language queries.
+
+        Returns:
+            list: One embedding per query, in input order.
+        """
+        keys = [normalize_query(query) for query in queries]
+        embeddings = {key: self.query_embedding_cache.get(key) for key in set(keys)}
+        missing = {}
+        for key, query in zip(keys, queries):
+            if embeddings[key] is None:
+                missing.setdefault(key, query)
+
+        if missing:
+            # Batched calls; kept in the in-memory query cache only, never in the persistent listing cache
+            for key, embedding in zip(missing, self.embedding_model.embed_queries(list(missing.values()))):
+                embeddings[key] = embedding
+                self.query_embedding_cache.set(key, embedding)
+
+        return [embeddings[key] for key in keys]
+
+    def cache_stats(self):
+        """
+        Reports the size and hit rate of every cache used by the database.
+
+        Returns:
+            dict: Stats for query embeddings, search results and listing embeddings.
+        """
+        return {
+            "query_embeddings": self.query_embedding_cache.stats(),
+            "search_results": self.search_cache.stats(),
+            "listing_embeddings": self.embedding_model.stats()
+        }
+
+    @staticmethod
+    def build_filter(user_prefs):
+        """
+        Translates the hard constraints in the user preferences into a Chroma `where` filter.
+
+        City and state must match exactly (a list of values matches any of them), the
+        price must not exceed `max_price`, and the listing needs at least `num_bedrooms`.
+        A maximum price below `MIN_PLAUSIBLE_PRICE` (e.g. "500" for 500k) is ignored.
+
+        Args:
+            user_prefs (dict): Dictionary containing user search preferences.
+
+        Returns:
+            dict: The `where` filter, or None when there is no constraint.
+        """
+        conditions = []
+        for field in ("city", "state"):
+            value = user_prefs.get(field)
+            if isinstance(value, (list, tuple, set)):
+                values = [v for v in value if v]
+                if len(values) == 1:
+                    conditions.append({field: {"$eq": values[0]}})
+                elif values:
+                    conditions.append({field: {"$in": list(values)}})
+            elif value:
+                conditions.append({field: {"$eq": value}})
+
+        max_price = parse_number(user_prefs.get("max_price"))
+        if max_price and max_price >= MIN_PLAUSIBLE_PRICE:
+            conditions.append({"price_value": {"$lte": max_price}})
+
+        min_bedrooms = parse_number(user_prefs.get("num_bedrooms"))
+        if min_bedrooms:
+            conditions.append({"bedrooms": {"$gte": min_bedrooms}})
+
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def search(self, user_prefs, k=5, use_filters=True, mode=None, relax_filters=True):
         """
         Performs a similarity search based on user preferences and retrieves matching listings with images.
 
+        Hard constraints (location, maximum price, minimum bedrooms) are pushed down to
+        the vector store as a metadata filter, so only qualifying listings are ranked. This
+        is for correctness, not speed: Chroma evaluates the filter before the vector search,
+        so a filtered search is slower than an unfiltered one (see `bench_metadata_filter`).
+        When no listing meets every constraint (e.g. a city without inventory), the search
+        keeps only the location, then drops the filter, and flags the listings it returns
+        with "filters_relaxed".
+        In hybrid mode the vector ranking is fused with a BM25 ranking of the amenities
+        and description keywords using reciprocal rank fusion.
+
         Args:
             user_prefs (dict): Dictionary containing user search preferences.
             k (int): Number of top matches to return.
+            use_filters (bool): Apply the hard constraints as a metadata filter.
+            mode (str, optional): "hybrid" or "vector"; defaults to `search_mode`.
+            relax_filters (bool): Fall back to looser filters when the hard constraints match nothing.
 
         Returns:
             list: A list of dictionaries containing listing details and image paths.
         """
-        try:
-            # Convert user preferences into a natural language query
-            query = self.format_user_prefs(user_prefs)
-
-            # Generate embeddings for the query
-            query_embedding = self.embedding_model.embed_query(query)
-
-            if not isinstance(query_embedding, list):
-                raise ValueError("❌ Embedding function did not return a valid vector list.")
-
-            # Perform similarity search using the embedding
-            results = self.vector_store.similarity_search_by_vector(query_embedding, k=k)
-
-            # Extract relevant metadata, including image paths
-            listings_with_images = [
-                {
-                    "description": doc.page_content,
-                    "id": doc.metadata.get("id"),
-                    "city": doc.metadata.get("city", "Unknown"),
-                    "state": doc.metadata.get("state", "Unknown"),
-                    "price": doc.metadata.get("price", "N/A"),
-                    "bedrooms": doc.metadata.get("bedrooms", "N/A"),
-                    "bathrooms": doc.metadata.get("bathrooms", "N/A"),
-                    "house_size": doc.metadata.get("house_size", "N/A"),
-                    "neighborhood": doc.metadata.get("neighborhood", "Unknown"),
-                    "neighborhood_description": doc.metadata.get("neighborhood_description", ""),
-                    "image_path": doc.metadata.get("image_path", "❌ No image available")  # Ensure image path is included
-                }
-                for doc in results
-            ]
-
-            return listings_with_images
+        with span("vector_db.search", k=k) as trace:
+            try:
+                mode = mode or self.search_mode
+
+                # Convert user preferences into a natural language query
+                with span("vector_db.format_query"):
+                    query = self.format_user_prefs(user_prefs)
+                    lexical_query = self.format_lexical_query(user_prefs) if mode == "hybrid" else ""
+                    where = self.build_filter(user_prefs) if use_filters else None
+
+                result_key = (normalize_query(query), normalize_query(lexical_query), k, json.dumps(where, sort_keys=True), relax_filters)
+                cached_results = self.search_cache.get(result_key)
+                trace.set("cache_hit", cached_results is not None)
+                if cached_results is not None:
+                    return [dict(listing) for listing in cached_results]
+
+                # Generate embeddings for the query
+                query_embedding = self.embed_query(query)
+
+                if not isinstance(query_embedding, list):
+                    raise ValueError("❌ Embedding function did not return a valid vector list.")
+
+                results = self._ranked_search(query_embedding, lexical_query, k, where)
+                relaxed = False
+                if not results and where is not None and relax_filters:
+                    # Nothing meets every constraint: show the closest listings rather than an empty page
+                    for fallback in self._relaxed_filters(user_prefs, where):
+                        results = self._ranked_search(query_embedding, lexical_query, k, fallback)
+                        if results:
+                            relaxed = True
+                            break
+                trace.set("filters_relaxed", relaxed)
+
+                # Extract relevant metadata, including image paths
+                listings_with_images = [self._to_listing(doc) for doc in results]
+                if relaxed:
+                    for listing in listings_with_images:
+                        listing["filters_relaxed"] = True
+                trace.set("results", len(listings_with_images))
+
+                self.search_cache.set(result_key, listings_with_images)
+                return [dict(listing) for listing in listings_with_images]
+
+            except Exception as e:
+                trace.add("errors")
+                print(f"❌ Error during search: {e}")
+                return []
+
+    def _ranked_search(self, query_embedding, lexical_query, k, where):
+        """
+        Ranks the listings matching `where`, fusing the BM25 ranking in when there is a lexical query.
+
+        Returns:
+            list: Documents, best first.
+        """
+        if lexical_query and len(self.lexical_index):
+            with span("vector_db.hybrid_search"):
+                return self._hybrid_search(query_embedding, lexical_query, k, where)
+        # Perform similarity search using the embedding
+        with span("vector_db.similarity_search"):
+            return self.vector_store.similarity_search_by_vector(query_embedding, k=k, filter=where)
+
+    def _relaxed_filters(self, user_prefs, where):
+        """
+        Yields the looser filters tried when `where` matches nothing: the location alone, then no filter.
+        """
+        location = self.build_filter({field: user_prefs.get(field) for field in ("city", "state")})
+        if location is not None and location != where:
+            yield location
+        yield None
+
+    def search_many(self, profiles, k=5, batch_size=256, use_filters=True):
+        """
+        Matches many buyer profiles, yielding results profile by profile.
+
+        Profiles are processed in batches: queries are embedded in batched calls and each
+        batch is scored with one matrix-level similarity computation (NumPy backend) or with
+        one Chroma query per distinct metadata filter. Only vector ranking is used, and unlike
+        `search` the filters are never relaxed: a profile nothing qualifies for gets no matches.
+
+        Args:
+            profiles (iterable): User preference dictionaries; may be a lazy iterator.
+            k (int): Number of matches per profile.
+            batch_size (int): Profiles embedded and scored together.
+            use_filters (bool): Apply each profile's hard constraints as a metadata filter.
+
+        Yields:
+            tuple: (profile, list of listing dictionaries), in input order.
+        """
+        batch = []
+        for profile in profiles:
+            batch.append(profile)
+            if len(batch) >= batch_size:
+                yield from self._search_batch(batch, k, use_filters)
+                batch = []
+        if batch:
+            yield from self._search_batch(batch, k, use_filters)
 
+    def _search_batch(self, profiles, k, use_filters):
+        """
+        Scores one batch of profiles for `search_many`.
+
+        Yields:
+            tuple: (profile, list of listing dictionaries).
+        """
+        try:
+            embeddings = self.embed_queries([self.format_user_prefs(profile) for profile in profiles])
+            wheres = [self.build_filter(profile) if use_filters else None for profile in profiles]
+            results = self._vector_search_many(embeddings, k, wheres)
         except Exception as e:
-            print(f"❌ Error during search: {e}")
-            return []
+            print(f"❌ Error during batch search: {e}")
+            results = [[] for _ in profiles]
+
+        for profile, docs in zip(profiles, results):
+            yield profile, [self._to_listing(doc) for doc in docs]
+
+    def _vector_search_many(self, embeddings, k, wheres):
+        """
+        Runs several vector searches, batched as far as the backend allows.
+
+        Returns:
+            list: For each embedding, its Documents, best first.
+        """
+        search_by_vectors = getattr(self.vector_store, "similarity_search_by_vectors", None)
+        if callable(search_by_vectors):
+            return search_by_vectors(embeddings, k=k, filters=wheres)
+
+        # Chroma: one query call per distinct filter, carrying all of that filter's embeddings
+        groups = {}
+        for i, where in enumerate(wheres):
+            groups.setdefault(json.dumps(where, sort_keys=True), []).append(i)
+
+        collection = self.chroma_client.get_collection(self._collection_name())
+        results = [[] for _ in embeddings]
+        for indices in groups.values():
+            where = wheres[indices[0]]
+            response = collection.query(
+                query_embeddings=[embeddings[i] for i in indices],
+                n_results=k,
+                where=where,
+                include=["documents", "metadatas"]
+            )
+            for i, documents, metadatas in zip(indices, response["documents"], response["metadatas"]):
+                results[i] = [
+                    Document(page_content=page_content, metadata=metadata)
+                    for page_content, metadata in zip(documents, metadatas)
+                ]
+        return results
 
+    def _hybrid_search(self, query_embedding, lexical_query, k, where):
+        """
+        Fuses the vector and BM25 rankings with reciprocal rank fusion.
+
+        BM25 candidates are checked against the metadata filter through the vector store,
+        so hard constraints hold for both rankers.
+
+        Args:
+            query_embedding (list): Embedding of the natural language query.
+            lexical_query (str): Keywords for BM25.
+            k (int): Number of results.
+            where (dict): Metadata filter, or None.
+
+        Returns:
+            list: Up to k Documents, best first.
+        """
+        n_candidates = k * self.hybrid_candidates
+        vector_docs = self.vector_store.similarity_search_by_vector(query_embedding, k=n_candidates, filter=where)
+        vector_ranking = [doc.metadata["id"] for doc in vector_docs]
+        docs_by_id = dict(zip(vector_ranking, vector_docs))
+
+        # Over-fetch BM25 hits since some will fail the metadata filter
+        lexical_ids = [doc_id for doc_id, _ in self.lexical_index.search(lexical_query, k=n_candidates * 5)]
+        lexical_ranking = []
+        if lexical_ids:
+            found = self.vector_store.get(ids=lexical_ids, where=where, include=["documents", "metadatas"])
+            for doc_id, page_content, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+                docs_by_id.setdefault(doc_id, Document(page_content=page_content, metadata=metadata))
+            allowed = set(found["ids"])
+            lexical_ranking = [doc_id for doc_id in lexical_ids if doc_id in allowed][:n_candidates]
+
+        fused = reciprocal_rank_fusion([vector_ranking, lexical_ranking], rrf_k=self.rrf_k)
+        return [docs_by_id[doc_id] for doc_id in fused[:k]]
+
+    @staticmethod
+    def _to_listing(doc):
+        """
+        Converts a retrieved Document into the listing dictionary returned by `search`.
+        """
+        return {
+            "description": doc.page_content,
+            "id": doc.metadata.get("id"),
+            "city": doc.metadata.get("city", "Unknown"),
+            "state": doc.metadata.get("state", "Unknown"),
+            "price": doc.metadata.get("price", "N/A"),
+            "bedrooms": doc.metadata.get("bedrooms", "N/A"),
+            "bathrooms": doc.metadata.get("bathrooms", "N/A"),
+            "house_size": doc.metadata.get("house_size", "N/A"),
+            "neighborhood": doc.metadata.get("neighborhood", "Unknown"),
+            "neighborhood_description": doc.metadata.get("neighborhood_description", ""),
+            "image_path": doc.metadata.get("image_path", "❌ No image available")  # Ensure image path is included
+        }
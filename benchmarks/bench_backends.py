@@ -0,0 +1,88 @@
+"""
+Module: bench_backends
+Description: Compares the Chroma and NumPy vector store backends on indexing time and search latency at several corpus sizes.
+
+Usage (from the repository root):
+    python benchmarks/bench_backends.py --sizes 1000 10000 100000 --queries 200
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import random_user_prefs, write_synthetic_listings
+from fakes import FakeEmbeddings
+from vector_database import VectorDatabase
+
+
+def bench_backend(backend, listings_path, workdir, args):
+    """
+    Indexes the corpus with one backend and times random searches.
+
+    Returns:
+        dict: Index seconds and search latency percentiles, with and without filters.
+    """
+    vector_db = VectorDatabase(
+        listings_path=listings_path,
+        db_path=f"{workdir}/{backend}",
+        backend=backend,
+        embedding_model=FakeEmbeddings(dimensions=args.dimensions),
+        embedding_cache_path=f"{workdir}/embedding_cache.sqlite3",  # Shared, so both backends index from cache
+        embedding_batch_size=1000,
+        query_cache_size=0,
+        result_cache_size=0,
+        lexical_index_path=f"{workdir}/{backend}_bm25.json",
+        search_mode="vector"
+    )
+    start = time.perf_counter()
+    vector_db.store_listings()
+    index_seconds = time.perf_counter() - start
+
+    rng = random.Random(args.seed)
+    latencies = {"filtered": [], "unfiltered": []}
+    for _ in range(args.queries):
+        user_prefs = random_user_prefs(rng)
+        for label, use_filters in (("filtered", True), ("unfiltered", False)):
+            start = time.perf_counter()
+            vector_db.search(user_prefs, k=args.k, use_filters=use_filters)
+            latencies[label].append((time.perf_counter() - start) * 1000)
+
+    report = {"index_seconds": index_seconds}
+    for label, values in latencies.items():
+        report[f"{label}_ms_p50"] = float(np.percentile(values, 50))
+        report[f"{label}_ms_p95"] = float(np.percentile(values, 95))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dimensions", type=int, default=256, help="Fake embedding dimensions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    report = {"benchmark": "backends", "queries": args.queries, "k": args.k, "dimensions": args.dimensions, "results": []}
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix=f"homematch_backends_{size}_")
+        listings_path = write_synthetic_listings(f"{workdir}/listings.jsonl", size, args.seed)
+        for backend in args.backends:
+            result = bench_backend(backend, listings_path, workdir, args)
+            result.update({"size": size, "backend": backend})
+            report["results"].append(result)
+            print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
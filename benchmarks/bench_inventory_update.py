@@ -0,0 +1,110 @@
+"""
+Module: bench_inventory_update
+Description: Measures snapshot build and swap latency of the inventory updater, and search latency while updates run, on a synthetic corpus.
+
+Usage (from the repository root):
+    python benchmarks/bench_inventory_update.py --size 50000 --add 1000 --rounds 3 --readers 4
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from synthetic import iter_synthetic_listings, random_user_prefs, write_synthetic_listings
+from fakes import FakeEmbeddings
+from inventory_updater import InventoryUpdater, SnapshotHolder
+from vector_database import VectorDatabase
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--size", type=int, default=50000, help="Listings indexed before the first update")
+    parser.add_argument("--add", type=int, default=1000, help="Listings appended before each update")
+    parser.add_argument("--rounds", type=int, default=3, help="Number of updates")
+    parser.add_argument("--readers", type=int, default=4, help="Threads searching continuously")
+    parser.add_argument("--backend", default="numpy", choices=["chroma", "numpy"])
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="homematch_inventory_")
+    listings_path = write_synthetic_listings(f"{workdir}/listings.jsonl", args.size, args.seed)
+
+    def open_database(db_path, lexical_index_path):
+        return VectorDatabase(
+            listings_path=listings_path,
+            db_path=db_path,
+            backend=args.backend,
+            embedding_model=FakeEmbeddings(dimensions=args.dimensions),
+            embedding_cache_path=f"{workdir}/embedding_cache.sqlite3",
+            embedding_batch_size=1000,
+            result_cache_size=0,
+            lexical_index_path=lexical_index_path
+        )
+
+    database = open_database(f"{workdir}/initial", f"{workdir}/initial_bm25.json")
+    database.store_listings()
+    holder = SnapshotHolder(database)
+    updater = InventoryUpdater(holder, open_database, snapshot_root=f"{workdir}/snapshots")
+
+    latencies = {"idle": [], "during_update": []}
+    stop = threading.Event()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            updating = holder.updating
+            user_prefs = random_user_prefs(rng)
+            start = time.perf_counter()
+            holder.current.search(user_prefs, k=args.k)
+            latencies["during_update" if updating or holder.updating else "idle"].append(time.perf_counter() - start)
+
+    readers = [threading.Thread(target=reader, args=(args.seed + i,), daemon=True) for i in range(args.readers)]
+    for thread in readers:
+        thread.start()
+
+    updates = []
+    for round_ in range(args.rounds):
+        time.sleep(1.0)  # Idle searches between updates
+        with open(listings_path, "a") as f:
+            for listing in iter_synthetic_listings(args.add, seed=args.seed + 1000 + round_):
+                f.write(json.dumps(listing) + "\n")
+        summary = updater.update()
+        updates.append(summary)
+        print(f"✅ update {round_ + 1}: {json.dumps(summary)}")
+    time.sleep(1.0)
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    def summary_ms(values):
+        values = np.array(values) * 1000
+        if not len(values):
+            return None
+        return {"searches": len(values), "p50_ms": float(np.percentile(values, 50)), "p95_ms": float(np.percentile(values, 95))}
+
+    report = {
+        "benchmark": "inventory_update",
+        "size": args.size,
+        "added_per_update": args.add,
+        "documents_after": len(holder.current.vector_store.get(include=[])["ids"]),
+        "build_seconds": [update["build_seconds"] for update in updates],
+        "swap_us": [update["swap_seconds"] * 1e6 for update in updates if update["swapped"]],
+        "search_idle": summary_ms(latencies["idle"]),
+        "search_during_update": summary_ms(latencies["during_update"])
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Module: bench_metadata_filter
+Description: Measures the recall gain, and the latency cost, of metadata pre-filtered search over query-only search on a synthetic corpus.
+
+Usage (from the repository root):
+    python benchmarks/bench_metadata_filter.py --size 100000 --queries 200
+"""
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import random_user_prefs, write_synthetic_listings
+from fakes import FakeEmbeddings
+from listing_store import iter_listings
+from vector_database import VectorDatabase, parse_number
+
+
+def qualifying_mask(columns, user_prefs):
+    """
+    Evaluates the hard constraints of `VectorDatabase.build_filter` with NumPy.
+
+    Returns:
+        np.ndarray: Boolean mask of listings satisfying every constraint.
+    """
+    mask = (columns["city"] == user_prefs["city"]) & (columns["state"] == user_prefs["state"])
+    max_price = parse_number(user_prefs.get("max_price"))
+    if max_price:
+        mask &= columns["price_value"] <= max_price
+    min_bedrooms = parse_number(user_prefs.get("num_bedrooms"))
+    if min_bedrooms:
+        mask &= columns["bedrooms"] >= min_bedrooms
+    return mask
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--size", type=int, default=100000, help="Number of synthetic listings")
+    parser.add_argument("--queries", type=int, default=200, help="Number of random searches")
+    parser.add_argument("--k", type=int, default=5, help="Results per search")
+    parser.add_argument("--dimensions", type=int, default=64, help="Fake embedding dimensions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="homematch_bench_")
+    listings_path = write_synthetic_listings(f"{workdir}/listings.jsonl", args.size, args.seed)
+    embedder = FakeEmbeddings(dimensions=args.dimensions)
+
+    vector_db = VectorDatabase(
+        listings_path=listings_path,
+        db_path=f"{workdir}/chroma",
+        embedding_model=embedder,
+        embedding_cache_path=None,
+        embedding_batch_size=1000,
+        query_cache_size=0,
+        result_cache_size=0
+    )
+    start = time.perf_counter()
+    vector_db.store_listings()
+    index_seconds = time.perf_counter() - start
+
+    # Exact ground truth: best qualifying listings by cosine similarity
+    listings = list(iter_listings(listings_path))
+    ids = np.array([listing["id"] for listing in listings])
+    matrix = np.array(embedder.embed_documents([listing["Description"] for listing in listings]), dtype=np.float32)
+    columns = {
+        "city": np.array([listing["City"] for listing in listings]),
+        "state": np.array([listing["State"] for listing in listings]),
+        "price_value": np.array([parse_number(listing["Price"]) for listing in listings]),
+        "bedrooms": np.array([parse_number(listing["Bedrooms"]) for listing in listings])
+    }
+
+    rng = random.Random(args.seed + 1)
+    results = {mode: {"latencies": [], "recall": [], "qualifying": []} for mode in ("query_only", "filtered")}
+    for _ in range(args.queries):
+        user_prefs = random_user_prefs(rng)
+        query_embedding = np.array(vector_db.embed_query(vector_db.format_user_prefs(user_prefs)), dtype=np.float32)
+        mask = qualifying_mask(columns, user_prefs)
+        scores = np.where(mask, matrix @ query_embedding, -np.inf)
+        n_truth = min(args.k, int(mask.sum()))
+        truth = set(ids[np.argsort(-scores)[:n_truth]])
+
+        for mode, use_filters in (("query_only", False), ("filtered", True)):
+            start = time.perf_counter()
+            found = vector_db.search(user_prefs, k=args.k, use_filters=use_filters)
+            results[mode]["latencies"].append((time.perf_counter() - start) * 1000)
+            found_ids = {listing["id"] for listing in found}
+            if truth:
+                results[mode]["recall"].append(len(found_ids & truth) / len(truth))
+            if found:
+                qualifying = sum(mask[np.where(ids == doc_id)[0][0]] for doc_id in found_ids)
+                results[mode]["qualifying"].append(qualifying / len(found_ids))
+
+    report = {
+        "benchmark": "metadata_filter",
+        "size": args.size,
+        "queries": args.queries,
+        "k": args.k,
+        "index_seconds": index_seconds,
+        "modes": {
+            mode: {
+                "recall_at_k": statistics.mean(values["recall"]) if values["recall"] else 0.0,
+                "qualifying_fraction": statistics.mean(values["qualifying"]) if values["qualifying"] else 0.0,
+                "latency_ms_p50": percentile(values["latencies"], 50),
+                "latency_ms_p95": percentile(values["latencies"], 95)
+            }
+            for mode, values in results.items()
+        }
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
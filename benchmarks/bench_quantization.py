@@ -0,0 +1,127 @@
+"""
+Module: bench_quantization
+Description: Measures memory footprint, recall@k and latency of shortened and int8/binary-quantized embeddings against the full-precision NumPy store.
+
+Usage (from the repository root):
+    python benchmarks/bench_quantization.py --size 100000 --dimensions 1024 --truncate 256 512 --queries 200
+
+Embeddings come from the dense fake embedder. It spreads information evenly over its dimensions,
+unlike `text-embedding-3` models whose leading dimensions carry most of it, so recall of shortened
+embeddings here is a lower bound. Recall counts ties: a result is correct when its exact similarity
+reaches that of the k-th true neighbour.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import random_user_prefs, write_synthetic_listings
+from fakes import FakeEmbeddings
+from vector_database import VectorDatabase
+
+
+def directory_size(path):
+    """
+    Returns:
+        int: Total bytes of the files in `path`.
+    """
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def build(listings_path, workdir, name, args, dimensions=None, quantization=None):
+    """
+    Indexes the corpus into a NumPy store, then reopens it the way the app does after a restart
+    (float32 rows memory-mapped when quantized).
+
+    Returns:
+        VectorDatabase: The reopened database.
+    """
+    options = dict(
+        listings_path=listings_path,
+        db_path=f"{workdir}/{name}",
+        backend="numpy",
+        embedding_model=FakeEmbeddings(dimensions=args.dimensions, dense=True),
+        embedding_cache_path=f"{workdir}/embedding_cache.sqlite3",  # Shared, so each text is embedded once per size
+        embedding_batch_size=1000,
+        query_cache_size=0,
+        result_cache_size=0,
+        lexical_index_path=f"{workdir}/{name}_bm25.json",
+        search_mode="vector",
+        embedding_dimensions=dimensions,
+        quantization=quantization,
+        rerank_factor=args.rerank_factor
+    )
+    VectorDatabase(**options).store_listings()
+    return VectorDatabase(**options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--size", type=int, default=100000, help="Number of synthetic listings")
+    parser.add_argument("--dimensions", type=int, default=1024, help="Full fake embedding dimensions")
+    parser.add_argument("--truncate", type=int, nargs="*", default=[256, 512], help="Shortened dimensions to test")
+    parser.add_argument("--quantizations", nargs="+", default=["none", "int8", "binary"])
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="homematch_quantization_")
+    listings_path = write_synthetic_listings(f"{workdir}/listings.jsonl", args.size, args.seed)
+
+    # Ground truth: exact top-k of the full-precision, full-dimension store
+    baseline = build(listings_path, workdir, "baseline", args)
+    rng = random.Random(args.seed + 1)
+    queries = [baseline.format_user_prefs(random_user_prefs(rng)) for _ in range(args.queries)]
+    query_embeddings = [np.array(baseline.embed_query(query)) for query in queries]
+    kth_scores = [
+        baseline.vector_store.similarity_search_by_vector_with_scores(embedding, k=args.k)[-1][1]
+        for embedding in query_embeddings
+    ]
+
+    report = {"benchmark": "quantization", "size": args.size, "k": args.k, "queries": args.queries, "results": []}
+    for dimensions in [None] + args.truncate:
+        for quantization in args.quantizations:
+            quantization = None if quantization == "none" else quantization
+            name = f"d{dimensions or args.dimensions}_{quantization or 'float32'}"
+            vector_db = baseline if dimensions is None and quantization is None else build(
+                listings_path, workdir, name, args, dimensions, quantization
+            )
+
+            recalls, latencies = [], []
+            for query, full_embedding, kth_score in zip(queries, query_embeddings, kth_scores):
+                embedding = vector_db.embed_query(query)
+                start = time.perf_counter()
+                found = vector_db.vector_store.similarity_search_by_vector(embedding, k=args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+                # Exact full-precision similarity of what was found
+                stored = baseline.vector_store.get(ids=[doc.metadata["id"] for doc in found], include=["embeddings"])
+                exact = np.array(stored["embeddings"]) @ full_embedding if stored["ids"] else np.array([])
+                recalls.append(float((exact >= kth_score - 1e-6).sum()) / args.k)
+
+            result = {
+                "config": name,
+                **vector_db.vector_store.memory_footprint(),
+                "disk_bytes": directory_size(vector_db.db_path),
+                f"recall_at_{args.k}": float(np.mean(recalls)),
+                "latency_ms_p50": float(np.percentile(latencies, 50)),
+                "latency_ms_p95": float(np.percentile(latencies, 95))
+            }
+            report["results"].append(result)
+            print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Module: bench_suite
+Description: Offline end-to-end benchmarks (indexing, search at several k, the full Gradio search path and listing generation) with fake OpenAI and image backends.
+
+Usage (from the repository root):
+    python benchmarks/bench_suite.py --sizes 1000 10000 --output bench.json
+    python benchmarks/bench_suite.py --sizes 1000 10000 --compare bench.json   # after a change
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from synthetic import CODE_DIR, random_user_prefs, write_synthetic_listings
+from fakes import FakeAsyncOpenAI, FakeChatModel, FakeEmbeddings, FakeImagePipeline, FakeOpenAI
+from answer_augmentation import LlmAugmentation
+from gradio_ui import build_search_handler
+from image_derivatives import DerivativeManifest
+from listings_generator import ImagePipelineHolder, ListingsGenerator
+from vector_database import VectorDatabase
+
+BENCHMARKS = ["store", "search", "search_houses", "generate"]
+
+
+def latency_summary(seconds):
+    """
+    Returns:
+        dict: p50 / p95 / p99 and mean of the given durations, in milliseconds.
+    """
+    values = np.array(seconds) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean())
+    }
+
+
+@contextmanager
+def quiet(enabled=True):
+    """Silences the per-batch progress prints of the application code."""
+    if not enabled:
+        yield
+        return
+    stdout = sys.stdout
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            yield
+        finally:
+            sys.stdout = stdout
+
+
+def git_commit():
+    """
+    Returns:
+        str: Current commit of the repository (with "-dirty" for uncommitted changes), or None.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=CODE_DIR)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, cwd=CODE_DIR)
+        return commit.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "") if commit.returncode == 0 else None
+    except OSError:
+        return None
+
+
+def bench_store(size, workdir, args):
+    """
+    Indexes a synthetic corpus from scratch.
+
+    Returns:
+        tuple: (VectorDatabase, metrics) with the indexing time and throughput.
+    """
+    listings_path = write_synthetic_listings(f"{workdir}/listings.jsonl", size, args.seed)
+    vector_db = VectorDatabase(
+        listings_path=listings_path,
+        db_path=f"{workdir}/{args.backend}",
+        backend=args.backend,
+        embedding_model=FakeEmbeddings(dimensions=args.dimensions, latency=args.embedding_latency),
+        embedding_cache_path=None,  # Every listing is embedded: this measures the cold path
+        embedding_batch_size=args.embedding_batch_size,
+        query_cache_size=0,
+        result_cache_size=0,
+        lexical_index_path=f"{workdir}/bm25.json",
+        search_mode=args.search_mode,
+        shard_by=args.shard_by
+    )
+    start = time.perf_counter()
+    with quiet(not args.verbose):
+        vector_db.store_listings()
+    seconds = time.perf_counter() - start
+    return vector_db, {"seconds": seconds, "listings_per_second": size / seconds}
+
+
+def bench_search(vector_db, args):
+    """
+    Times `VectorDatabase.search` for random preferences at each k (query and result caches disabled).
+
+    Returns:
+        dict: k to latency summary.
+    """
+    metrics = {}
+    for k in args.k:
+        rng = random.Random(args.seed + 1)
+        latencies = []
+        for _ in range(args.queries):
+            user_prefs = random_user_prefs(rng)
+            start = time.perf_counter()
+            vector_db.search(user_prefs, k=k)
+            latencies.append(time.perf_counter() - start)
+        metrics[f"k{k}"] = latency_summary(latencies)
+    return metrics
+
+
+def bench_search_houses(vector_db, workdir, args):
+    """
+    Runs the Gradio search handler end to end (normalization, refinement, search, streamed
+    descriptions) with `--concurrency` searches in flight on one event loop.
+
+    Returns:
+        dict: Time to first result, time to completion and searches per second.
+    """
+    search_houses = build_search_handler(
+        vector_db,
+        llm_augm=LlmAugmentation(llm=FakeChatModel(latency=args.llm_latency, chunk_latency=args.chunk_latency)),
+        client=FakeAsyncOpenAI(latency=args.llm_latency),
+        image_manifest=DerivativeManifest(f"{workdir}/derivatives")
+    )
+    rng = random.Random(args.seed + 2)
+    requests = []
+    for _ in range(args.queries):
+        prefs = random_user_prefs(rng)
+        amenities = [amenity.strip() for amenity in prefs["amenities"].split(",")]
+        requests.append((f"{prefs['city']}, {prefs['state']}", prefs["house_size"], prefs["max_price"],
+                         prefs["num_bedrooms"], prefs["num_bathrooms"], amenities, prefs["description"], args.k[0]))
+
+    first_results, totals = [], []
+
+    async def one(request):
+        start = time.perf_counter()
+        first = None
+        async for _ in search_houses(*request):
+            if first is None:
+                first = time.perf_counter() - start
+        first_results.append(first)
+        totals.append(time.perf_counter() - start)
+
+    async def run():
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def limited(request):
+            async with semaphore:
+                await one(request)
+
+        await asyncio.gather(*(limited(request) for request in requests))
+
+    start = time.perf_counter()
+    with quiet(not args.verbose):
+        asyncio.run(run())
+    seconds = time.perf_counter() - start
+    return {
+        "time_to_first_result": latency_summary(first_results),
+        "total": latency_summary(totals),
+        "searches_per_second": len(requests) / seconds
+    }
+
+
+def bench_generate(workdir, args):
+    """
+    Generates listings through `ListingsGenerator` with a fake chat client and image pipeline.
+
+    Returns:
+        dict: Elapsed seconds and listings per second.
+    """
+    pipe = FakeImagePipeline(per_image_latency=args.image_latency, size=args.image_size)
+    holder = ImagePipelineHolder(pipe=pipe, generator_factory=pipe.make_generator)
+    cwd = os.getcwd()
+    os.chdir(CODE_DIR)  # The generator reads ../Data/city_choices.txt relative to Code/, like main.py
+    try:
+        generator = ListingsGenerator(
+            total_listings=args.generate_listings,
+            batch_size=1,  # The fake client answers one listing per request, like the real prompt
+            output_file=f"{workdir}/generated.jsonl",
+            image_dir=f"{workdir}/images",
+            client=FakeOpenAI(latency=args.llm_latency, seed=args.seed),
+            max_in_flight=args.max_in_flight,
+            requests_per_second=args.requests_per_second,
+            pipeline=holder
+        )
+        start = time.perf_counter()
+        with quiet(not args.verbose):
+            generator.generate_listings()
+        seconds = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+    return {
+        "listings": generator.writer.count,
+        "seconds": seconds,
+        "listings_per_second": generator.writer.count / seconds
+    }
+
+
+def flatten(metrics, prefix=""):
+    """
+    Flattens nested metrics into "a.b.c" keys, so results of different commits compare key by key.
+    """
+    flat = {}
+    for key, value in metrics.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        else:
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """
+    Prints the relative change of every metric present in both runs.
+
+    Throughputs (`*_per_second`) should go up; latencies (`*_ms`) should go down. Counts and
+    totals depend on the configuration and are not compared.
+
+    Returns:
+        list: Names of the metrics that regressed by more than `threshold` (a fraction).
+    """
+    regressions = []
+    print(f"\n📊 Compared with {baseline.get('commit')} ({baseline.get('timestamp')})")
+    for name, value in current["metrics"].items():
+        previous = baseline["metrics"].get(name)
+        if not name.endswith(("_per_second", "_ms")) or not isinstance(value, (int, float)) or not previous:
+            continue
+        change = (value - previous) / previous
+        worse = -change if name.endswith("_per_second") else change
+        flag = "❌" if worse > threshold else "✅" if worse < -threshold else "  "
+        if worse > threshold:
+            regressions.append(name)
+        print(f"{flag} {name:<45} {previous:12.3f} → {value:12.3f}  {change:+7.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="Corpus sizes (synthetic listings), e.g. 1000 10000 100000 1000000")
+    parser.add_argument("--backend", default="numpy", choices=["chroma", "numpy"])
+    parser.add_argument("--search-mode", default="hybrid", choices=["hybrid", "vector"])
+    parser.add_argument("--shard-by", choices=["state", "city"], help="Shard the index by market")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10, 50], help="Results per search")
+    parser.add_argument("--queries", type=int, default=100, help="Searches per measurement")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent searches for search_houses")
+    parser.add_argument("--dimensions", type=int, default=256, help="Fake embedding dimensions")
+    parser.add_argument("--embedding-batch-size", type=int, default=256)
+    parser.add_argument("--embedding-latency", type=float, default=0.0, help="Seconds per fake embedding call")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM request")
+    parser.add_argument("--chunk-latency", type=float, default=0.0, help="Seconds between fake streamed chunks")
+    parser.add_argument("--image-latency", type=float, default=0.05, help="Seconds per fake rendered image")
+    parser.add_argument("--image-size", type=int, default=256)
+    parser.add_argument("--generate-listings", type=int, default=50, help="Listings for the generation benchmark")
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--requests-per-second", type=float, default=100.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file for the results")
+    parser.add_argument("--compare", help="Results JSON of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change reported as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Keep the application's progress output")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes if {"store", "search", "search_houses"} & set(args.benchmarks) else []:
+        workdir = tempfile.mkdtemp(prefix=f"homematch_suite_{size}_")
+        vector_db, results[f"store.{size}"] = bench_store(size, workdir, args)
+        print(f"✅ store {size}: {json.dumps(results[f'store.{size}'])}")
+        if "search" in args.benchmarks:
+            results[f"search.{size}"] = bench_search(vector_db, args)
+            print(f"✅ search {size}: {json.dumps(results[f'search.{size}'])}")
+        if "search_houses" in args.benchmarks:
+            results[f"search_houses.{size}"] = bench_search_houses(vector_db, workdir, args)
+            print(f"✅ search_houses {size}: {json.dumps(results[f'search_houses.{size}'])}")
+        if "store" not in args.benchmarks:
+            del results[f"store.{size}"]
+
+    if "generate" in args.benchmarks:
+        results["generate"] = bench_generate(tempfile.mkdtemp(prefix="homematch_generate_"), args)
+        print(f"✅ generate: {json.dumps(results['generate'])}")
+
+    report = {
+        "benchmark": "suite",
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "metrics": flatten(results)
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
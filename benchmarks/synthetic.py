@@ -0,0 +1,100 @@
+"""
+Module: synthetic
+Description: Generates synthetic listing corpora in the listings file schema for offline benchmarks.
+"""
+
+import json
+import os
+import random
+import sys
+import uuid
+
+# Benchmarks import the application modules from Code/
+CODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Code")
+sys.path.insert(0, CODE_DIR)
+
+from fakes import fake_listing  # noqa: E402
+
+CITIES = [
+    ("Tucson", "Arizona"), ("Los Angeles", "California"), ("San Francisco", "California"),
+    ("Santa Barbara", "California"), ("Denver", "Colorado"), ("Atlanta", "Georgia"),
+    ("Honolulu", "Hawaii"), ("Chicago", "Illinois"), ("Boston", "Massachusetts"),
+    ("Baltimore", "Maryland"), ("Portland", "Maine"), ("Las Vegas", "Nevada"),
+    ("Newark", "New Jersey"), ("New York City", "New York"), ("Cincinnati", "Ohio"),
+    ("Pittsburgh", "Pennsylvania"), ("Nashville", "Tennessee"), ("Houston", "Texas"),
+    ("Salt Lake City", "Utah"), ("New Orleans", "Louisiana")
+]
+
+# (type, price range, size range, bedroom range, bathroom range), mirroring the generator prompt
+PROPERTY_TYPES = [
+    ("Studio Apartment", (60000, 180000), (400, 800), (1, 1), (1, 1)),
+    ("One-Bedroom Apartment", (100000, 250000), (600, 1000), (1, 2), (1, 2)),
+    ("Townhouse", (150000, 500000), (1000, 2500), (2, 4), (1, 3)),
+    ("Single-Family Home", (200000, 800000), (1200, 3500), (3, 6), (2, 4)),
+    ("Luxury Estate", (1000000, 5000000), (4000, 15000), (5, 15), (3, 6)),
+    ("Mobile Home", (50000, 150000), (500, 1200), (1, 3), (1, 2)),
+    ("Ranch-Style Home", (120000, 400000), (1000, 2500), (2, 4), (1, 3)),
+    ("Condo", (120000, 600000), (700, 2000), (1, 3), (1, 2))
+]
+
+
+def iter_synthetic_listings(n, seed=0):
+    """
+    Yields `n` reproducible synthetic listings.
+
+    Args:
+        n (int): Number of listings.
+        seed (int): Random seed.
+
+    Yields:
+        dict: Listing with "id" and "image_path".
+    """
+    rng = random.Random(seed)
+    for _ in range(n):
+        city, state = rng.choice(CITIES)
+        property_type, price_range, size_range, bed_range, bath_range = rng.choice(PROPERTY_TYPES)
+        listing = fake_listing(rng, property_type, city, state, price_range, bed_range, bath_range, size_range)
+        listing["id"] = str(uuid.UUID(int=rng.getrandbits(128)))
+        listing["image_path"] = f"../Data/Images/{listing['id']}.png"
+        yield listing
+
+
+def write_synthetic_listings(path, n, seed=0):
+    """
+    Streams `n` synthetic listings to a JSON Lines file.
+
+    Args:
+        path (str): Output file.
+        n (int): Number of listings.
+        seed (int): Random seed.
+
+    Returns:
+        str: The output path.
+    """
+    with open(path, "w") as f:
+        for listing in iter_synthetic_listings(n, seed):
+            f.write(json.dumps(listing) + "\n")
+    return path
+
+
+def random_user_prefs(rng):
+    """
+    Draws a plausible set of Gradio search preferences.
+
+    Args:
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        dict: User preferences as built by `search_houses`.
+    """
+    city, state = rng.choice(CITIES)
+    return {
+        "state": state,
+        "city": city,
+        "house_size": str(rng.choice([800, 1500, 2000, 3000])),
+        "max_price": str(rng.choice([200000, 350000, 500000, 800000, 1500000])),
+        "num_bedrooms": rng.randint(1, 4),
+        "num_bathrooms": rng.randint(1, 3),
+        "amenities": ", ".join(rng.sample(["Pool", "Garage", "Garden", "Gym", "Fireplace", "Balcony", "Basement"], 2)),
+        "description": rng.choice(["quiet street near schools", "modern kitchen", "close to parks", "historic charm", ""])
+    }
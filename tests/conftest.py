@@ -0,0 +1,29 @@
+import os
+import sys
+
+# Tests import the application modules from Code/ and the synthetic corpus from benchmarks/
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "Code"))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def vector_db(tmp_path):
+    """NumPy vector database over 300 synthetic listings, embedded by the local fake embedder."""
+    from fakes import FakeEmbeddings
+    from synthetic import write_synthetic_listings
+    from vector_database import VectorDatabase
+
+    listings_path = write_synthetic_listings(str(tmp_path / "listings.jsonl"), 300, seed=0)
+    database = VectorDatabase(
+        listings_path=listings_path,
+        db_path=str(tmp_path / "vectors"),
+        backend="numpy",
+        embedding_model=FakeEmbeddings(),
+        embedding_cache_path=str(tmp_path / "embedding_cache.sqlite3"),
+        lexical_index_path=str(tmp_path / "bm25_index.json")
+    )
+    database.store_listings()
+    return database
@@ -0,0 +1,43 @@
+import json
+import os
+
+import pytest
+
+import config_loader
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_loader, "RELOAD_CHECK_INTERVAL", 0.0)
+    path = tmp_path / "config.json"
+    version = [0]
+
+    def write(text):
+        path.write_text(text)
+        version[0] += 1
+        os.utime(path, ns=(version[0] * 10**9, version[0] * 10**9))  # Distinct mtimes, however fast the writes
+    return str(path), write
+
+
+def test_invalid_edit_keeps_the_last_valid_settings(config_file, capsys):
+    path, write = config_file
+    write(json.dumps({"homematch": {"chat_model": "first"}}))
+    assert config_loader.get_settings(path).chat_model == "first"
+
+    write('{"homematch": {"chat_model": "sec')
+    capsys.readouterr()
+    for _ in range(3):
+        assert config_loader.get_settings(path).chat_model == "first"
+        assert config_loader.load_config(path) == {"homematch": {"chat_model": "first"}}
+    assert capsys.readouterr().out.count("Invalid configuration") == 1
+
+    write(json.dumps({"homematch": {"chat_model": "second"}}))
+    assert config_loader.get_settings(path).chat_model == "second"
+
+
+def test_invalid_from_the_start_uses_defaults(config_file):
+    path, write = config_file
+    write("{not json")
+    assert config_loader.get_settings(path) == config_loader.Settings()
+    with pytest.raises(json.JSONDecodeError):
+        config_loader.load_config(path)
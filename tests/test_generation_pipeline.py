@@ -0,0 +1,52 @@
+from fakes import FakeAPIError, FakeRateLimitError
+from generation_pipeline import ConcurrentListingsPipeline
+
+
+class Client:
+    """Stands in for `OpenAI`: only the SDK retry setting matters here."""
+
+    def __init__(self, max_retries=3):
+        self.max_retries = max_retries
+
+    def with_options(self, max_retries):
+        return Client(max_retries)
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+class Generator:
+    """Minimal `ListingsGenerator` whose requests fail with the given errors first."""
+
+    total_listings = 1
+    batch_size = 1
+
+    def __init__(self, *errors):
+        self.client = Client()
+        self.errors = list(errors)
+        self.sdk_retries = []
+
+    def request_listings(self, client=None):
+        self.sdk_retries.append(client.max_retries)
+        if self.errors:
+            raise self.errors.pop(0)
+        return []
+
+
+def run(generator):
+    return ConcurrentListingsPipeline(generator, max_in_flight=1, requests_per_second=1000, backoff_seconds=0).run()
+
+
+def test_sdk_retries_are_disabled_and_transient_errors_retried_once_each():
+    generator = Generator(FakeRateLimitError(retry_after=0), FakeAPIError())
+    report = run(generator)
+    assert generator.sdk_retries == [0, 0, 0]
+    assert (report["rate_limited"], report["retried_errors"], report["batches"], report["failed_batches"]) == (1, 1, 1, 0)
+
+
+def test_client_errors_are_not_retried():
+    generator = Generator(BadRequestError())
+    report = run(generator)
+    assert len(generator.sdk_retries) == 1
+    assert report["failed_batches"] == 1
@@ -0,0 +1,34 @@
+import asyncio
+
+import gradio_ui
+from answer_augmentation import LlmAugmentation
+from fakes import FakeAsyncOpenAI, FakeChatModel
+from image_derivatives import DerivativeManifest
+
+
+class RecordingAsyncOpenAI(FakeAsyncOpenAI):
+    """Fake refinement client remembering the prompts it was sent."""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    async def _create(self, model, messages, temperature=None, **kwargs):
+        self.prompts.append(messages[-1]["content"])
+        return await super()._create(model, messages, temperature, **kwargs)
+
+
+def test_llm_refines_the_raw_description(vector_db, tmp_path):
+    client = RecordingAsyncOpenAI()
+    handler = gradio_ui.build_search_handler(
+        vector_db, LlmAugmentation(llm=FakeChatModel()), client=client,
+        image_manifest=DerivativeManifest(str(tmp_path / "derivatives"))
+    )
+
+    async def consume():
+        async for _ in handler("Denver, Colorado", "2000", "800000", 2, 1, [], "Modern kitchn zorblax glimp", 3):
+            pass
+    asyncio.run(consume())
+
+    assert len(client.prompts) == 1
+    assert 'User Input: "Modern kitchn zorblax glimp"' in client.prompts[0]
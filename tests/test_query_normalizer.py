@@ -0,0 +1,47 @@
+import pytest
+
+from query_normalizer import QueryNormalizer
+
+
+@pytest.fixture
+def normalizer():
+    return QueryNormalizer()
+
+
+@pytest.mark.parametrize("text", [
+    "bonfire places near lake",
+    "3br w/ pool",
+    "walking distance to the beach",
+    "pool + garden",
+])
+def test_correct_text_is_kept(normalizer, text):
+    assert normalizer.normalize(text)["text"] == text
+
+
+def test_walking_is_not_fuzzy_corrected(normalizer):
+    result = normalizer.normalize("walking distance to the beach")
+    assert result["corrections"] == []
+    assert "walk-in" not in result["text"]
+
+
+def test_typos_are_fixed_and_casing_kept(normalizer):
+    result = normalizer.normalize("Modern Kitchn in Denver, Fire place and balcany")
+    assert result["text"] == "Modern kitchen in Denver, fireplace, balcony"
+    assert ("fire place", "fireplace") in result["corrections"]
+
+
+def test_fuzzy_guesses_need_the_same_first_letter(normalizer):
+    assert normalizer.normalize("sunny hous with gardn")["text"] == "sunny house with garden"
+    assert normalizer.normalize("ool")["corrections"] == []
+
+
+def test_synonyms_are_reported_apart_from_corrections(normalizer):
+    result = normalizer.normalize("cozy condominium with a wardrobe")
+    assert result["text"] == "cozy condo with a closet"
+    assert result["corrections"] == []
+    assert result["synonyms"] == [("condominium", "condo"), ("wardrobe", "closet")]
+
+
+def test_one_unknown_word_in_three_asks_the_llm(normalizer):
+    assert normalizer.normalize("quiet house zorblax")["needs_llm"]
+    assert not normalizer.normalize("quiet modern house near the park")["needs_llm"]
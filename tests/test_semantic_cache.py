@@ -0,0 +1,42 @@
+import asyncio
+
+import gradio_ui
+from answer_augmentation import LlmAugmentation
+from fakes import FakeAsyncOpenAI, FakeChatModel
+from image_derivatives import DerivativeManifest
+from semantic_cache import SemanticCache
+
+
+def run_search(handler, description, location="Denver, Colorado"):
+    async def consume():
+        async for _ in handler(location, "2000", "800000", 2, 1, ["Pool"], description, 3):
+            pass
+    asyncio.run(consume())
+
+
+def test_different_descriptions_with_identical_filters_miss(vector_db, tmp_path):
+    cache = SemanticCache(threshold=0.95)
+    handler = gradio_ui.build_search_handler(
+        vector_db, LlmAugmentation(llm=FakeChatModel()), client=FakeAsyncOpenAI(),
+        image_manifest=DerivativeManifest(str(tmp_path / "derivatives")), semantic_cache=cache
+    )
+
+    run_search(handler, "modern kitchen and pool")
+    assert len(cache) == 1
+
+    for description in ("xqzt blorf wibble", "", "quiet street near schools"):
+        run_search(handler, description)
+    assert cache.hits == 0
+
+    run_search(handler, "modern kitchen and pool")
+    assert cache.hits == 1
+
+
+def test_same_description_with_other_filters_misses(vector_db):
+    user_prefs = {"state": "Colorado", "city": "Denver", "house_size": "2000", "max_price": "800000",
+                  "num_bedrooms": 2, "num_bathrooms": 1, "amenities": "Pool", "description": "modern kitchen"}
+    text, scope = gradio_ui.semantic_cache_query(vector_db, user_prefs, 3)
+    assert text == "modern kitchen"
+    for field, value in (("house_size", "3000"), ("num_bathrooms", 2), ("amenities", "Garage"), ("city", "Boston")):
+        assert gradio_ui.semantic_cache_query(vector_db, {**user_prefs, field: value}, 3)[1] != scope
+    assert gradio_ui.semantic_cache_query(vector_db, {**user_prefs, "description": ""}, 3)[1] != scope
@@ -0,0 +1,44 @@
+import pytest
+
+from vector_database import VectorDatabase, parse_number
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("$600,000", 600000), ("2500 sqft", 2500), ("500k", 500000), ("$1.2M", 1200000),
+    ("1.5 million", 1500000), ("800000", 800000), (3, 3), ("", None), ("any", None)
+])
+def test_parse_number(value, expected):
+    assert parse_number(value) == expected
+
+
+def test_build_filter_reads_shorthand_and_skips_implausible_prices():
+    assert VectorDatabase.build_filter({"max_price": "500k"}) == {"price_value": {"$lte": 500000}}
+    assert VectorDatabase.build_filter({"max_price": "500"}) is None
+
+
+def user_prefs(**overrides):
+    prefs = {"state": "Colorado", "city": "Denver", "house_size": "2000", "max_price": "800000",
+             "num_bedrooms": 2, "num_bathrooms": 1, "amenities": "Pool", "description": "modern kitchen"}
+    return {**prefs, **overrides}
+
+
+def test_matching_filters_are_not_relaxed(vector_db):
+    results = vector_db.search(user_prefs(), k=3)
+    assert results
+    assert all(result["city"] == "Denver" and not result.get("filters_relaxed") for result in results)
+
+
+def test_city_without_inventory_falls_back_to_unfiltered_search(vector_db):
+    results = vector_db.search(user_prefs(city="Springfield", state="Oregon"), k=3)
+    assert len(results) == 3
+    assert all(result["filters_relaxed"] for result in results)
+
+
+def test_constraints_nothing_meets_keep_the_location(vector_db):
+    results = vector_db.search(user_prefs(max_price="20000", num_bedrooms=9), k=3)
+    assert results
+    assert all(result["city"] == "Denver" and result["filters_relaxed"] for result in results)
+
+
+def test_strict_search_returns_nothing(vector_db):
+    assert vector_db.search(user_prefs(city="Springfield", state="Oregon"), k=3, relax_filters=False) == []